@@ -0,0 +1,110 @@
+"""index foreign keys
+
+Revision ID: 2e9b6f04c1d8
+Revises: 8c41d7a2e6b3
+Create Date: 2026-10-18 21:17:52.904611
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2e9b6f04c1d8'
+down_revision = '8c41d7a2e6b3'
+branch_labels = None
+depends_on = None
+
+# Foreign key columns, including both sides of the association tables,
+# that are not already the first column of a primary key
+FOREIGN_KEYS = [
+    ('audio_cassettes', 'cassette_format_type_id'),
+    ('audio_cassettes', 'generation_id'),
+    ('audio_cassettes', 'tape_subtype_id'),
+    ('collection', 'contact_id'),
+    ('file_annotations', 'file_id'),
+    ('file_annotations', 'type_id'),
+    ('file_notes', 'file_id'),
+    ('films', 'color_id'),
+    ('films', 'emulsion_id'),
+    ('films', 'film_base_id'),
+    ('films', 'film_gauge_id'),
+    ('films', 'film_speed_id'),
+    ('films', 'image_type_id'),
+    ('films', 'soundtrack_id'),
+    ('films', 'wind_id'),
+    ('formats', 'format_type_id'),
+    ('formats', 'object_id'),
+    ('grooved_discs', 'disc_base_id'),
+    ('grooved_discs', 'disc_diameter_id'),
+    ('grooved_discs', 'disc_material_id'),
+    ('grooved_discs', 'playback_direction_id'),
+    ('grooved_discs', 'playback_speed_id'),
+    ('instantiation_files', 'item_id'),
+    ('item_has_contacts', 'contact_id'),
+    ('item_has_contacts', 'item_id'),
+    ('item_has_notes', 'item_id'),
+    ('item_has_notes', 'notes_id'),
+    ('notes', 'note_type_id'),
+    ('object_has_notes', 'notes_id'),
+    ('object_has_notes', 'object_id'),
+    ('open_reels', 'base_id'),
+    ('open_reels', 'generation_id'),
+    ('open_reels', 'reel_diameter_id'),
+    ('open_reels', 'reel_speed_id'),
+    ('open_reels', 'reel_thickness_id'),
+    ('open_reels', 'reel_width_id'),
+    ('open_reels', 'subtype_id'),
+    ('open_reels', 'track_configuration_id'),
+    ('open_reels', 'wind_id'),
+    ('optical', 'optical_type_id'),
+    ('project', 'status_id'),
+    ('project_has_notes', 'notes_id'),
+    ('project_has_notes', 'project_id'),
+    ('treatment', 'item_id'),
+    ('tyko_object', 'collection_id'),
+    ('tyko_object', 'contact_id'),
+    ('tyko_object', 'project_id'),
+    ('vendor_has_contacts', 'contact_id'),
+    ('vendor_has_contacts', 'vendor_id'),
+    ('vendor_transfer', 'vendor_id'),
+    ('vendor_transfer_has_an_object', 'object_id'),
+    ('vendor_transfer_has_an_object', 'vendor_transfer_id'),
+    ('video_cassettes', 'cassette_type_id'),
+    ('video_cassettes', 'generation_id'),
+]
+
+
+def _leading_columns(inspector, table_name):
+    leading = {
+        index['column_names'][0]
+        for index in inspector.get_indexes(table_name)
+        if index['column_names']
+    }
+    primary_key = inspector.get_pk_constraint(table_name)
+    if primary_key['constrained_columns']:
+        leading.add(primary_key['constrained_columns'][0])
+    return leading
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    existing_tables = set(inspector.get_table_names())
+    for table_name, column_name in FOREIGN_KEYS:
+        # MySQL already has an index for each foreign key constraint
+        if table_name not in existing_tables or \
+                column_name in _leading_columns(inspector, table_name):
+            continue
+        op.create_index(
+            f'ix_{table_name}_{column_name}', table_name, [column_name]
+        )
+
+
+def downgrade():
+    inspector = sa.inspect(op.get_bind())
+    for table_name, column_name in FOREIGN_KEYS:
+        index_name = f'ix_{table_name}_{column_name}'
+        if index_name in {
+            index['name'] for index in inspector.get_indexes(table_name)
+        }:
+            op.drop_index(index_name, table_name=table_name)
@@ -0,0 +1,38 @@
+"""add table versions
+
+Revision ID: 5f2c8e1b9a47
+Revises: d008a138763c
+Create Date: 2026-10-18 09:12:41.318022
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5f2c8e1b9a47'
+down_revision = 'd008a138763c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    versions_table = op.create_table(
+        'table_versions',
+        sa.Column('table_name', sa.String(length=64), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('table_name')
+    )
+    conn = op.get_bind()
+    op.bulk_insert(
+        versions_table,
+        [
+            {"table_name": table_name, "version": 0}
+            for table_name in sa.inspect(conn).get_table_names()
+            if table_name not in ["alembic_version", "table_versions"]
+        ]
+    )
+
+
+def downgrade():
+    op.drop_table('table_versions')
@@ -0,0 +1,35 @@
+"""add barcode indexes
+
+Revision ID: 8c41d7a2e6b3
+Revises: 5f2c8e1b9a47
+Create Date: 2026-10-18 20:41:07.512394
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c41d7a2e6b3'
+down_revision = '5f2c8e1b9a47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('tyko_object') as batch_op:
+        batch_op.add_column(sa.Column('barcode', sa.Text(), nullable=True))
+
+    op.create_index(
+        'ix_formats_barcode', 'formats', ['barcode'], mysql_length=64
+    )
+    op.create_index(
+        'ix_tyko_object_barcode', 'tyko_object', ['barcode'], mysql_length=64
+    )
+
+
+def downgrade():
+    op.drop_index('ix_tyko_object_barcode', table_name='tyko_object')
+    op.drop_index('ix_formats_barcode', table_name='formats')
+    with op.batch_alter_table('tyko_object') as batch_op:
+        batch_op.drop_column('barcode')
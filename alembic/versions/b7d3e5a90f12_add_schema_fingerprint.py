@@ -0,0 +1,31 @@
+"""add schema fingerprint
+
+Revision ID: b7d3e5a90f12
+Revises: 2e9b6f04c1d8
+Create Date: 2026-10-18 23:05:52.104217
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7d3e5a90f12'
+down_revision = '2e9b6f04c1d8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Left empty, so the next start runs the full initialization and
+    # records the fingerprint
+    op.create_table(
+        'schema_fingerprint',
+        sa.Column('name', sa.String(length=64), nullable=False),
+        sa.Column('fingerprint', sa.String(length=64), nullable=False),
+        sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade():
+    op.drop_table('schema_fingerprint')
@@ -0,0 +1,110 @@
+"""Fixtures of the benchmark suite.
+
+The suite needs pytest-benchmark and is not part of the regular test run.
+Run it with:
+
+    pytest benchmarks --catalog-projects 4 --catalog-objects 25
+
+Each benchmark records the number of SQL statements one request executes in
+the extra_info of its results, so a change in query count shows up next to
+the change in time when comparing runs.
+"""
+import dataclasses
+
+import pytest
+import sqlalchemy
+from flask import Flask
+
+import tyko.database
+from tyko import data_generator
+from tyko.api import api
+from tyko.site import site
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("tyko benchmarks")
+    group.addoption(
+        "--catalog-projects",
+        type=int,
+        default=4,
+        help="Number of projects in the synthetic catalog"
+    )
+    group.addoption(
+        "--catalog-objects",
+        type=int,
+        default=25,
+        help="Number of objects in each project of the synthetic catalog"
+    )
+    group.addoption(
+        "--catalog-files",
+        type=int,
+        default=2,
+        help="Number of files of each item of the synthetic catalog"
+    )
+
+
+@pytest.fixture(scope="session")
+def catalog_size(request):
+    return data_generator.CatalogSize(
+        projects=request.config.getoption("--catalog-projects"),
+        objects_per_project=request.config.getoption("--catalog-objects"),
+        files_per_item=request.config.getoption("--catalog-files"),
+    )
+
+
+@pytest.fixture(scope="session")
+def catalog_app(tmp_path_factory, catalog_size):
+    database_file = tmp_path_factory.mktemp("catalog") / "tyko.sqlite"
+    app = Flask(__name__, template_folder="../tyko/templates")
+    app.config["TESTING"] = True
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{database_file}"
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    app.register_blueprint(site)
+    app.register_blueprint(api)
+    tyko.database.db.init_app(app)
+    with app.app_context():
+        engine = tyko.database.db.get_engine(app)
+        tyko.database.init_database(engine)
+        data_generator.generate_catalog(engine, catalog_size)
+    return app
+
+
+@dataclasses.dataclass
+class QueryCounter:
+    statements: int = 0
+
+    def __call__(self, *_):
+        self.statements += 1
+
+
+@pytest.fixture()
+def client(catalog_app):
+    with catalog_app.test_client() as server:
+        server.get("/")
+        yield server
+
+
+@pytest.fixture()
+def measure(benchmark, catalog_app):
+    """Benchmark a request and record how many queries it makes."""
+    engine = tyko.database.db.get_engine(catalog_app)
+
+    def run(send_request, expected_status=200):
+        counter = QueryCounter()
+        sqlalchemy.event.listen(engine, "before_cursor_execute", counter)
+        try:
+            response = send_request()
+            assert response.status_code == expected_status, response.data
+            response.get_data()
+        finally:
+            sqlalchemy.event.remove(engine, "before_cursor_execute", counter)
+        benchmark.extra_info["queries"] = counter.statements
+
+        def send_and_read():
+            resp = send_request()
+            resp.get_data()
+            return resp
+
+        return benchmark(send_and_read)
+
+    return run
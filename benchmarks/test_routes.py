@@ -0,0 +1,64 @@
+import json
+
+import pytest
+from flask import url_for
+
+pytest.importorskip("pytest_benchmark")
+
+
+def test_api_projects(client, measure):
+    measure(lambda: client.get(url_for("api.projects")))
+
+
+def test_api_projects_page(client, measure):
+    measure(lambda: client.get(url_for("api.projects", limit=20)))
+
+
+def test_api_items(client, measure):
+    measure(lambda: client.get(url_for("api.items")))
+
+
+def test_api_items_page(client, measure):
+    measure(lambda: client.get(url_for("api.items", limit=100)))
+
+
+def test_api_items_fields(client, measure):
+    measure(lambda: client.get(
+        url_for("api.items", fields="name,barcode,format,parent_object_id")
+    ))
+
+
+def test_api_object(client, measure):
+    measure(lambda: client.get(url_for("api.object", object_id=1)))
+
+
+def test_site_project_details(client, measure):
+    measure(
+        lambda: client.get(url_for("site.page_project_details", project_id=1))
+    )
+
+
+def test_object_pbcore(client, measure):
+    measure(lambda: client.get(url_for("api.object_pbcore", object_id=1)))
+
+
+def test_project_pbcore_archive(client, measure):
+    measure(lambda: client.get(url_for("api.project_pbcore", project_id=1)))
+
+
+def test_note_crud(client, measure):
+    def create_read_update_delete():
+        new_note = client.post(
+            url_for("api.add_note"),
+            data=json.dumps({"note_type_id": 1, "text": "benchmark note"}),
+            content_type="application/json"
+        ).get_json()
+        client.get(new_note["url"])
+        client.put(
+            new_note["url"],
+            data=json.dumps({"text": "changed benchmark note"}),
+            content_type="application/json"
+        )
+        return client.delete(new_note["url"])
+
+    measure(create_read_update_delete, expected_status=204)
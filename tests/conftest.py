@@ -7,7 +7,7 @@ import tyko.data_provider
 from tyko.api import api
 from tyko.exceptions import DataError
 from tyko.site import site
-from tyko import run
+from tyko import run, unit_of_work
 
 
 @pytest.fixture()
@@ -22,6 +22,7 @@ def app():
     tyko.database.db.init_app(testing_app)
     engine = tyko.database.db.get_engine(testing_app)
     tyko.database.init_database(engine)
+    unit_of_work.init_app(testing_app)
     return testing_app
 
 
@@ -35,6 +36,7 @@ def server_with_project():
     testing_app.register_blueprint(api)
     tyko.database.db.init_app(testing_app)
     tyko.database.init_database(tyko.database.db.get_engine(testing_app))
+    unit_of_work.init_app(testing_app)
     # db = SQLAlchemy(testing_app)
     # tyko.create_app(testing_app, verify_db=False)
     # tyko.database.init_database(db.engine)
@@ -62,6 +64,7 @@ def server_with_object():
     testing_app.register_blueprint(api)
     tyko.database.db.init_app(testing_app)
     tyko.database.init_database(tyko.database.db.get_engine(testing_app))
+    unit_of_work.init_app(testing_app)
     with testing_app.test_client() as server:
         server.get('/')
         new_collection_response = server.post(
@@ -131,6 +134,7 @@ def server_with_object_and_item():
     testing_app.register_blueprint(api)
     tyko.database.db.init_app(testing_app)
     tyko.database.init_database(tyko.database.db.get_engine(testing_app))
+    unit_of_work.init_app(testing_app)
     # db = SQLAlchemy(testing_app)
     # tyko.create_app(testing_app, verify_db=False)
     # tyko.database.init_database(db.engine)
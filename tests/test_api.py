@@ -3,8 +3,10 @@ from typing import Dict
 from unittest.mock import Mock
 
 import pytest
+import sqlalchemy
 from flask import url_for, Flask, request
 
+from tyko import data_provider, middleware
 from tyko.schema.formats import format_types
 from tyko.views import object_item
 from tyko.data_provider import DataProvider
@@ -722,6 +724,210 @@ def test_collection_delete(app):
         assert delete_resp.status_code == 204
 
 
+def test_project_list_paging_sorting_and_filtering(app):
+    with app.test_client() as server:
+        server.get('/')
+        for title in ["charlie", "alpha", "bravo", "alpha two"]:
+            server.post(
+                url_for('api.add_project'),
+                data=json.dumps(
+                    {
+                        "title": title,
+                        "project_code": f"code {title}",
+                        "current_location": "old location",
+                        "status": "No Work Done"
+                    }
+                ),
+                content_type='application/json'
+            )
+
+        page = json.loads(
+            server.get(
+                url_for('api.projects', limit=2, offset=1, sort="-title")
+            ).data
+        )
+        assert page["total"] == 4
+        assert [p["title"] for p in page["projects"]] == \
+               ["bravo", "alpha two"]
+
+        filtered = json.loads(
+            server.get(url_for('api.projects', filter="title:alpha")).data
+        )
+        assert filtered["total"] == 2
+        assert {p["title"] for p in filtered["projects"]} == \
+               {"alpha", "alpha two"}
+
+
+def test_project_list_cursor_walk(app):
+    with app.test_client() as server:
+        server.get('/')
+        for i in range(5):
+            server.post(
+                url_for('api.add_project'),
+                data=json.dumps(
+                    {
+                        "title": f"project {i}",
+                        "project_code": f"code {i}",
+                        "current_location": "old location",
+                        "status": "No Work Done"
+                    }
+                ),
+                content_type='application/json'
+            )
+        titles = []
+        query_args = {"limit": 2}
+        while True:
+            page = json.loads(
+                server.get(url_for('api.projects', **query_args)).data
+            )
+            assert page["total"] == 5
+            titles += [p["title"] for p in page["projects"]]
+            if "next" not in page:
+                break
+            query_args["after"] = page["next"]
+        assert titles == [f"project {i}" for i in range(5)]
+
+
+def test_full_list_is_streamed(app):
+    with app.test_client() as server:
+        server.get('/')
+        for i in range(3):
+            server.post(
+                url_for('api.add_project'),
+                data=json.dumps(
+                    {
+                        "title": f"project {i}",
+                        "project_code": f"code {i}",
+                        "current_location": "old location",
+                        "status": "No Work Done"
+                    }
+                ),
+                content_type='application/json'
+            )
+        streamed = server.get(url_for('api.projects'))
+        assert "Content-Length" not in streamed.headers
+        assert streamed.headers["ETag"]
+
+        paged = server.get(url_for('api.projects', limit=10))
+        assert "Content-Length" in paged.headers
+
+        assert json.loads(streamed.data) == json.loads(paged.data)
+
+
+@pytest.mark.parametrize("query_args", [
+    {},
+    {"sort": "-title"},
+    {"offset": 1},
+    {"fields": "title"},
+    {"title": "project", "after": data_provider.encode_cursor(1)},
+])
+def test_full_list_is_streamed_in_batches(app, monkeypatch, query_args):
+    monkeypatch.setattr(
+        data_provider.data_provider.PagedListConnector,
+        "STREAM_BATCH_SIZE",
+        2
+    )
+    with app.test_client() as server:
+        server.get('/')
+        for i in range(5):
+            server.post(
+                url_for('api.add_project'),
+                data=json.dumps({"title": f"project {i}"}),
+                content_type='application/json'
+            )
+        streamed = json.loads(
+            server.get(url_for('api.projects', **query_args)).data
+        )
+        paged = json.loads(
+            server.get(url_for('api.projects', limit=10, **query_args)).data
+        )
+        assert streamed["projects"] == paged["projects"]
+        assert streamed["total"] == paged["total"]
+
+
+def test_failed_stream_ends_with_an_error(app, monkeypatch):
+    def fail(*_):
+        raise sqlalchemy.exc.OperationalError("SELECT", {}, Exception())
+
+    with app.test_client() as server:
+        server.get('/')
+        server.post(
+            url_for('api.add_project'),
+            data=json.dumps({"title": "project"}),
+            content_type='application/json'
+        )
+        monkeypatch.setattr(
+            data_provider.ProjectDataConnector, "_serialize_record", fail
+        )
+        streamed = json.loads(server.get(url_for('api.projects')).data)
+    assert streamed["projects"] == []
+    assert "total" not in streamed
+    assert streamed["error"]
+
+
+@pytest.mark.parametrize("endpoint", [
+    "api.projects", "api.items", "api.collections", "api.notes"
+])
+def test_list_not_modified(app, endpoint):
+    with app.test_client() as server:
+        server.get('/')
+        first = server.get(url_for(endpoint))
+        etag = first.headers["ETag"]
+
+        again = server.get(url_for(endpoint), headers={"If-None-Match": etag})
+        assert again.status_code == 304
+        assert again.data == b""
+
+        other_page = server.get(
+            url_for(endpoint, limit=1), headers={"If-None-Match": etag}
+        )
+        assert other_page.status_code == 200
+
+
+def test_project_list_etag_changes_after_write(app):
+    with app.test_client() as server:
+        server.get('/')
+        etag = server.get(url_for('api.projects')).headers["ETag"]
+        server.post(
+            url_for('api.add_project'),
+            data=json.dumps(
+                {
+                    "title": "my dumb project",
+                    "project_code": "my dumb project code",
+                    "current_location": "old location",
+                    "status": "No Work Done"
+                }
+            ),
+            content_type='application/json'
+        )
+        resp = server.get(
+            url_for('api.projects'), headers={"If-None-Match": etag}
+        )
+        assert resp.status_code == 200
+        assert resp.headers["ETag"] != etag
+        assert resp.get_json()["total"] == 1
+
+
+@pytest.mark.parametrize(
+    "query_args",
+    [
+        {"sort": "not_a_field"},
+        {"filter": "not_a_field:1"},
+        {"filter": "missing_separator"},
+        {"limit": "-1"},
+        {"after": "not a cursor"},
+        {"after": "MQ==", "sort": "-title"},
+    ]
+)
+def test_list_invalid_page_request(app, query_args):
+    with app.test_client() as server:
+        server.get('/')
+        for endpoint in ["api.projects", "api.items", "api.objects",
+                         "api.collections", "api.notes"]:
+            resp = server.get(url_for(endpoint, **query_args))
+            assert resp.status_code == 400, endpoint
+
+
 def test_add_object_to_project(server_with_project):
     project_api_url = url_for("api.project", project_id=1)
     new_object_api_url = url_for('api.project_add_object', project_id=1)
@@ -1366,6 +1572,15 @@ def test_api_get_application_data_has_version(app):
         response = server.get(url_for('api.get_application_data'))
         assert "version" in response.get_json()
 
+
+def test_app_middleware_is_shared_between_requests(app):
+    with app.test_request_context('/api/project'):
+        first = middleware.get_app_middleware()
+    with app.test_request_context('/api/item'):
+        second = middleware.get_app_middleware()
+    assert first is second
+    assert first.projects._data_provider is first.data_provider
+
 class TestItemTreatment:
     @pytest.fixture()
     def server(self, app):
@@ -1507,6 +1722,29 @@ class TestItemTreatment:
         response = server.get(item_api_url).get_json()
         assert response['treatment'][0]['message'] == 'bacon'
 
+    @pytest.mark.parametrize("query_string", [
+        {"treatment_id": "spam"},
+        {"item_id": "spam"},
+    ])
+    def test_non_numeric_ids_are_not_found(
+            self,
+            server,
+            project_id,
+            object_id,
+            item_id,
+            query_string
+    ):
+        treatment_url = url_for(
+            "api.item_treatment",
+            project_id=project_id,
+            object_id=object_id,
+        )
+        response = server.get(
+            treatment_url,
+            query_string={"item_id": item_id, **query_string}
+        )
+        assert response.status_code == 404
+
 
 class TestObjectItemTreatmentAPI:
     @pytest.fixture()
@@ -1553,3 +1791,417 @@ class TestObjectItemTreatmentAPI:
             response = client.get("/dummy/1/1/1?item_id=1&treatment_id=1")
             assert response.get_json()['treatment_id'] == 1
 
+
+
+def test_import_items_to_object(server_with_object):
+    server, data = server_with_object
+    test_project = server.get(url_for("api.projects")).get_json()['projects'][0]
+    object_id = test_project['objects'][0]['object_id']
+    import_url = url_for(
+        "api.object_item_import",
+        project_id=test_project['project_id'],
+        object_id=object_id
+    )
+    resp = server.post(
+        import_url,
+        data=json.dumps([
+            {"name": "reel", "format": "open reel", "barcode": "1234"},
+            {
+                "name": "cassette",
+                "format": "audio cassette",
+                "generation": "dub",
+                "recording_date": "11/1950",
+                "inspection_date": "12/10/2019"
+            }
+        ]),
+        content_type='application/json'
+    )
+    assert resp.status_code == 201, resp.data
+    assert resp.get_json()['total'] == 2
+
+    resp = server.post(
+        import_url,
+        data="name,format,obj_sequence\nfilm,film,3\n",
+        content_type='text/csv'
+    )
+    assert resp.status_code == 201, resp.data
+
+    items = server.get(
+        url_for("api.object", object_id=object_id)
+    ).get_json()['object']['items']
+    assert sorted(item['name'] for item in items) == \
+           ["cassette", "film", "reel"]
+    cassette = server.get(
+        url_for(
+            "api.item",
+            item_id=next(
+                item['item_id'] for item in items
+                if item['name'] == "cassette"
+            )
+        )
+    ).get_json()['item']
+    assert cassette['format_details']['generation']['name'] == "Dub"
+    assert cassette['format_details']['date_of_cassette'] == "11/1950"
+
+
+def test_import_items_reports_every_bad_row(server_with_object):
+    server, data = server_with_object
+    test_project = server.get(url_for("api.projects")).get_json()['projects'][0]
+    object_id = test_project['objects'][0]['object_id']
+    resp = server.post(
+        url_for(
+            "api.object_item_import",
+            project_id=test_project['project_id'],
+            object_id=object_id
+        ),
+        data=json.dumps([
+            {"name": "good", "format": "open reel"},
+            {"format": "open reel"},
+            {"name": "bad format", "format": "wax cylinder"},
+            {"name": "bad enum", "format": "audio cassette",
+             "generation": "nope"},
+            {"name": "bad field", "format": "film", "spam": "eggs"},
+        ]),
+        content_type='application/json'
+    )
+    assert resp.status_code == 400
+    assert [error['row'] for error in resp.get_json()['errors']] == \
+           [2, 3, 4, 5]
+    items = server.get(
+        url_for("api.object", object_id=object_id)
+    ).get_json()['object']['items']
+    assert items == []
+
+
+@pytest.mark.parametrize("row", [
+    {"name": "dummy", "format": "film", "obj_sequence": [1]},
+    {"name": {"x": 1}, "format": "film"},
+    {"name": "dummy", "format": "film", "inspection_date": 2020},
+    {"name": "dummy", "format": "film", "transfer_date": 2020},
+])
+def test_import_items_rejects_non_scalar_values(server_with_object, row):
+    server, data = server_with_object
+    test_project = server.get(url_for("api.projects")).get_json()['projects'][0]
+    object_id = test_project['objects'][0]['object_id']
+    resp = server.post(
+        url_for(
+            "api.object_item_import",
+            project_id=test_project['project_id'],
+            object_id=object_id
+        ),
+        data=json.dumps([row]),
+        content_type='application/json'
+    )
+    assert resp.status_code == 400
+    assert [error['row'] for error in resp.get_json()['errors']] == [1]
+
+
+def test_import_items_checks_the_project(server_with_object):
+    server, data = server_with_object
+    test_project = server.get(url_for("api.projects")).get_json()['projects'][0]
+    other_project_id = server.post(
+        url_for("api.add_project"),
+        data=json.dumps({"title": "other project"}),
+        content_type='application/json'
+    ).get_json()['id']
+    resp = server.post(
+        url_for(
+            "api.object_item_import",
+            project_id=other_project_id,
+            object_id=test_project['objects'][0]['object_id']
+        ),
+        data=json.dumps([{"name": "reel", "format": "open reel"}]),
+        content_type='application/json'
+    )
+    assert resp.status_code == 404
+
+
+def test_item_note_route_checks_ids(server_with_enums):
+    server, data = server_with_enums
+    item = server.post(
+        url_for(
+            "api.object_item",
+            project_id=data['project']['id'],
+            object_id=data['object']['object_id']
+        ),
+        data=json.dumps({"name": "dummy", "format_id": 4}),
+        content_type='application/json'
+    ).get_json()['item']
+    add_note_url = url_for(
+        "api.project_object_item_add_note",
+        project_id=data['project']['id'],
+        object_id=data['object']['object_id'],
+        item_id=item['item_id']
+    )
+    note = {"note_type_id": "3", "text": "MY dumb note"}
+    assert server.post(
+        add_note_url, data=json.dumps(note), content_type='application/json'
+    ).status_code == 200
+    note_id = server.get(
+        url_for("api.item", item_id=item['item_id'])
+    ).get_json()['item']['notes'][0]['note_id']
+
+    assert server.post(
+        url_for(
+            "api.project_object_item_add_note",
+            project_id=data['project']['id'] + 1,
+            object_id=data['object']['object_id'],
+            item_id=item['item_id']
+        ),
+        data=json.dumps(note),
+        content_type='application/json'
+    ).status_code == 404
+
+    note_url = url_for(
+        "api.item_notes",
+        project_id=data['project']['id'],
+        object_id=data['object']['object_id'],
+        item_id=item['item_id'],
+        note_id=note_id
+    )
+    assert server.get(note_url).status_code == 200
+    assert server.get(
+        url_for(
+            "api.item_notes",
+            project_id=data['project']['id'],
+            object_id=data['object']['object_id'],
+            item_id=item['item_id'],
+            note_id=note_id + 1
+        )
+    ).status_code == 404
+
+
+def test_project_and_object_note_routes_check_ids(server_with_enums):
+    server, data = server_with_enums
+    project_id = data['project']['id']
+    object_id = data['object']['object_id']
+    note = {"note_type_id": "3", "text": "MY dumb note"}
+    project_note_id = server.post(
+        url_for("api.project_add_note", project_id=project_id),
+        data=json.dumps(note),
+        content_type='application/json'
+    ).get_json()['project']['notes'][0]['note_id']
+    other_project_id = server.post(
+        url_for("api.add_project"),
+        data=json.dumps({"title": "other project"}),
+        content_type='application/json'
+    ).get_json()['id']
+
+    assert server.get(
+        url_for(
+            "api.project_notes",
+            project_id=project_id,
+            note_id=project_note_id
+        )
+    ).status_code == 200
+    assert server.get(
+        url_for(
+            "api.project_notes",
+            project_id=other_project_id,
+            note_id=project_note_id
+        )
+    ).status_code == 404
+
+    assert server.post(
+        url_for(
+            "api.project_object_add_note",
+            project_id=other_project_id,
+            object_id=object_id
+        ),
+        data=json.dumps(note),
+        content_type='application/json'
+    ).status_code == 404
+    object_note_id = server.post(
+        url_for(
+            "api.project_object_add_note",
+            project_id=project_id,
+            object_id=object_id
+        ),
+        data=json.dumps(note),
+        content_type='application/json'
+    ).get_json()['object']['notes'][0]['note_id']
+
+    assert server.get(
+        url_for(
+            "api.object_notes",
+            project_id=project_id,
+            object_id=object_id,
+            note_id=object_note_id
+        )
+    ).status_code == 200
+    for ids in [
+        {"project_id": other_project_id, "note_id": object_note_id},
+        {"project_id": project_id, "note_id": project_note_id},
+    ]:
+        assert server.delete(
+            url_for("api.object_notes", object_id=object_id, **ids)
+        ).status_code == 404
+
+
+def test_item_files_non_numeric_id(server_with_object_item_file):
+    server, data = server_with_object_item_file
+    assert server.get(
+        url_for(
+            "api.item_files",
+            project_id=data['project_id'],
+            object_id=data['object_id'],
+            item_id=data['item_id'],
+            id="spam"
+        )
+    ).status_code == 404
+
+
+def test_search(server_with_enums):
+    server, data = server_with_enums
+    project_id = data['project']['id']
+    object_id = data['object']['object_id']
+    item = server.post(
+        url_for(
+            "api.object_item", project_id=project_id, object_id=object_id
+        ),
+        data=json.dumps({"name": "oral history reel", "format_id": 4}),
+        content_type='application/json'
+    ).get_json()['item']
+    assert server.post(
+        url_for(
+            "api.project_object_item_add_note",
+            project_id=project_id,
+            object_id=object_id,
+            item_id=item['item_id']
+        ),
+        data=json.dumps({"note_type_id": "3", "text": "oral history tape"}),
+        content_type='application/json'
+    ).status_code == 200
+
+    resp = server.get(url_for("api.search", q="oral hist"))
+    assert resp.status_code == 200
+    results = resp.get_json()
+    assert results['total'] == 2
+    hits = {result['type']: result for result in results['results']}
+    assert hits['item']['route'] == \
+           url_for("api.item", item_id=item['item_id'])
+    assert hits['item']['parents'] == [
+        url_for("api.project", project_id=project_id),
+        url_for("api.object", object_id=object_id),
+    ]
+    assert hits['note']['parents'] == [
+        url_for("api.item", item_id=item['item_id'])
+    ]
+
+    resp = server.get(url_for("api.search", q="oral", type="note", limit=1))
+    assert [result['type'] for result in resp.get_json()['results']] == \
+           ["note"]
+
+    assert server.put(
+        url_for("api.item", item_id=item['item_id']),
+        data=json.dumps({"name": "spoken word reel"}),
+        content_type='application/json'
+    ).status_code == 200
+    assert server.get(
+        url_for("api.search", q="spoken")
+    ).get_json()['total'] == 1
+
+    assert server.delete(
+        url_for("api.item", item_id=item['item_id'])
+    ).status_code == 204
+    results = server.get(url_for("api.search", q="reel")).get_json()
+    assert results['total'] == 0
+
+
+@pytest.mark.parametrize("query_string", [
+    {"q": "  "},
+    {"q": "reel", "type": "cylinder"},
+    {"q": "reel", "sort": "name"},
+])
+def test_search_invalid_request(server_with_enums, query_string):
+    server, _ = server_with_enums
+    assert server.get(
+        url_for("api.search", **query_string)
+    ).status_code == 400
+
+
+def test_barcode_lookup(server_with_enums):
+    server, data = server_with_enums
+    project_id = data['project']['id']
+    object_id = data['object']['object_id']
+    assert server.put(
+        url_for("api.object", object_id=object_id),
+        data=json.dumps({"barcode": "5551234"}),
+        content_type='application/json'
+    ).status_code == 200
+    item = server.post(
+        url_for(
+            "api.object_item", project_id=project_id, object_id=object_id
+        ),
+        data=json.dumps({"name": "reel", "format_id": 4}),
+        content_type='application/json'
+    ).get_json()['item']
+    assert server.put(
+        url_for("api.item", item_id=item['item_id']),
+        data=json.dumps({"barcode": "5551234"}),
+        content_type='application/json'
+    ).status_code == 200
+
+    resp = server.get(url_for("api.barcode_lookup", barcode="5551234"))
+    assert resp.status_code == 200
+    results = {
+        result['type']: result for result in resp.get_json()['results']
+    }
+    assert results['item']['route'] == \
+           url_for("api.item", item_id=item['item_id'])
+    assert results['item']['parents'] == [
+        url_for("api.project", project_id=project_id),
+        url_for("api.object", object_id=object_id),
+    ]
+    assert results['object']['route'] == \
+           url_for("api.object", object_id=object_id)
+    assert results['object']['parents'] == [
+        url_for("api.project", project_id=project_id)
+    ]
+
+    assert server.get(
+        url_for("api.barcode_lookup", barcode="0000")
+    ).status_code == 404
+
+
+def test_list_fields(server_with_enums):
+    server, data = server_with_enums
+    project_id = data['project']['id']
+    object_id = data['object']['object_id']
+    item = server.post(
+        url_for(
+            "api.object_item", project_id=project_id, object_id=object_id
+        ),
+        data=json.dumps({"name": "reel", "format_id": 4}),
+        content_type='application/json'
+    ).get_json()['item']
+    full_item = server.get(
+        url_for("api.items", limit=10)
+    ).get_json()['items'][0]
+
+    for query_string in [{}, {"limit": 10}]:
+        resp = server.get(
+            url_for("api.items", fields="name,format", **query_string)
+        )
+        assert resp.status_code == 200
+        assert resp.get_json()['items'] == [{
+            "item_id": item['item_id'],
+            "name": "reel",
+            "format": full_item['format'],
+        }]
+
+    objects = server.get(
+        url_for("api.objects", fields="parent_project_id", limit=10)
+    ).get_json()['objects']
+    assert objects == [
+        {"object_id": object_id, "parent_project_id": project_id}
+    ]
+
+
+@pytest.mark.parametrize("endpoint", ["api.items", "api.objects",
+                                      "api.projects"])
+def test_list_unknown_field(server_with_enums, endpoint):
+    server, _ = server_with_enums
+    assert server.get(
+        url_for(endpoint, fields="not_a_field")
+    ).status_code == 400
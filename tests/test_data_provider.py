@@ -1,7 +1,9 @@
 from datetime import datetime
 from unittest.mock import Mock
 from sqlalchemy.orm.session import Session, sessionmaker
+from sqlalchemy import inspect
 from sqlalchemy.orm import Query
+from sqlalchemy.orm.util import AliasedClass
 import pytest
 import tyko.data_provider.formats
 from tyko import data_provider
@@ -385,6 +387,9 @@ def test_update_video_cassette(data_changed, expected_values):
 class TestItemDataConnector:
     def test_invalid_request_raises(self):
         def query(*args):
+            if isinstance(args[0], AliasedClass):
+                # with_polymorphic() entities query the base formats table
+                args = (inspect(args[0]).mapper.class_, *args[1:])
             if args[0] == objects.CollectionObject:
                 mock_object = Mock()
                 return Mock(
@@ -468,6 +473,9 @@ class TestItemDataConnector:
         mock_object = Mock(spec=objects.CollectionObject)
 
         def query(*args):
+            if isinstance(args[0], AliasedClass):
+                # with_polymorphic() entities query the base formats table
+                args = (inspect(args[0]).mapper.class_, *args[1:])
             if args[0] == objects.CollectionObject:
                 return Mock(
                         spec=Query,
@@ -504,9 +512,10 @@ class TestItemDataConnector:
                 formats.GroovedDisc,
                 formats.OpenReel,
                 formats.CollectionItem,
+                formats.AVFormat,
             ]:
                 mock_format = Mock()
-                return Mock(
+                mock_query = Mock(
                     spec=Query,
                     name='Query',
                     all=Mock(
@@ -514,6 +523,9 @@ class TestItemDataConnector:
                         return_value=[mock_format]
                     )
                 )
+                # eager loading options return the same query
+                mock_query.options.return_value = mock_query
+                return mock_query
         session = Mock(
             name='session',
             spec=Session,
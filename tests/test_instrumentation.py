@@ -0,0 +1,99 @@
+import json
+import logging
+import re
+
+import pytest
+import sqlalchemy
+import sqlalchemy.exc
+from flask import Flask, url_for
+
+import tyko.database
+from tyko import instrumentation
+from tyko.api import api
+from tyko.site import site
+
+
+@pytest.fixture()
+def instrumented_app():
+    testing_app = Flask(__name__, template_folder="../tyko/templates")
+    testing_app.config["TESTING"] = True
+    testing_app.config["SQLALCHEMY_DATABASE_URI"] = 'sqlite:///:memory:'
+    testing_app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    testing_app.register_blueprint(site)
+    testing_app.register_blueprint(api)
+    tyko.database.db.init_app(testing_app)
+    engine = tyko.database.db.get_engine(testing_app)
+    tyko.database.init_database(engine)
+    instrumentation.init_app(testing_app, engine)
+    return testing_app
+
+
+def test_server_timing_header(instrumented_app):
+    with instrumented_app.test_client() as server:
+        server.get('/')
+        server.post(
+            url_for('api.add_project'),
+            data=json.dumps(
+                {
+                    "title": "my dumb project",
+                    "project_code": "my dumb project code",
+                    "current_location": "old location",
+                    "status": "No Work Done"
+                }
+            ),
+            content_type='application/json'
+        )
+        resp = server.get(url_for('api.projects', limit=10))
+        match = re.fullmatch(
+            r'db;dur=[0-9.]+;desc="(\d+) queries, (\d+) rows"',
+            resp.headers["Server-Timing"]
+        )
+        assert match is not None
+        queries, rows = map(int, match.groups())
+        assert queries > 0 and rows > 0
+
+
+def test_stats_are_logged(instrumented_app, caplog):
+    with instrumented_app.test_client() as server:
+        server.get('/')
+        with caplog.at_level(logging.INFO):
+            server.get(url_for('api.projects', limit=10))
+    assert any(
+        "path=/api/project" in message and "queries=" in message
+        for message in caplog.messages
+    )
+
+
+def test_streamed_stats_are_logged_when_done(instrumented_app, caplog):
+    with instrumented_app.test_client() as server:
+        server.get('/')
+        server.post(
+            url_for('api.add_collection'),
+            data=json.dumps({"collection_name": "dummy collection"}),
+            content_type='application/json'
+        )
+        with caplog.at_level(logging.INFO):
+            resp = server.get(url_for('api.collections'))
+            assert len(resp.get_json()["collections"]) == 1
+            resp.close()
+    logged_rows = [
+        int(re.search(r"rows=(\d+)", message).group(1))
+        for message in caplog.messages
+        if "path=/api/collection" in message
+    ]
+    assert logged_rows == [1]
+
+
+def test_stats_without_request():
+    assert instrumentation.current_stats() is None
+
+
+def test_failed_statement_leaves_no_start_time():
+    app = Flask(__name__)
+    engine = sqlalchemy.create_engine('sqlite:///:memory:')
+    instrumentation.init_app(app, engine)
+    with engine.connect() as connection:
+        with pytest.raises(sqlalchemy.exc.OperationalError):
+            connection.execute(sqlalchemy.text("SELECT * FROM missing"))
+        connection.execute(sqlalchemy.text("SELECT 1"))
+        assert connection.info[instrumentation._START_TIMES_KEY] == {}
@@ -1,4 +1,6 @@
+import io
 import json
+import zipfile
 
 import pytest
 import flask
@@ -124,3 +126,184 @@ def test_pbcore_valid_id():
         assert \
             PBCORE_SCHEMA.validate(doc) is True, \
             PBCORE_SCHEMA.error_log.filter_from_errors().last_error.message
+
+
+def add_object_with_files(session_maker, number_of_files):
+    session = session_maker()
+    annotation_type = tyko.schema.FileAnnotationType(name="speed")
+    project = tyko.schema.Project(title="my dumb project")
+    collection_object = tyko.schema.CollectionObject(
+        name="My dummy object",
+        project=project,
+        collection=tyko.schema.Collection(
+            collection_name="My dummy collection"
+        ),
+        notes=[tyko.schema.Note(text="object note", note_type_id=1)],
+    )
+    item = tyko.schema.formats.AudioCassette(
+        name="My dummy item",
+        notes=[tyko.schema.Note(text="item note", note_type_id=1)],
+    )
+    for file_number in range(number_of_files):
+        item.files.append(
+            tyko.schema.InstantiationFile(
+                file_name=f"file_{file_number}.wav",
+                notes=[tyko.schema.FileNotes(message="file note")],
+                annotations=[
+                    tyko.schema.FileAnnotation(
+                        annotation_type=annotation_type,
+                        annotation_content="7.5 ips"
+                    )
+                ]
+            )
+        )
+    collection_object.items.append(item)
+    session.add(collection_object)
+    session.commit()
+    object_id = collection_object.id
+    session.close()
+    return object_id
+
+
+def test_pbcore_query_count_does_not_grow_with_files():
+    engine = sqlalchemy.create_engine("sqlite:///:memory:")
+    tyko.database.init_database(engine)
+    data_provider = tyko.data_provider.data_provider.DataProvider(engine)
+
+    def count_queries(object_id):
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        sqlalchemy.event.listen(
+            engine, "before_cursor_execute", before_cursor_execute
+        )
+        try:
+            pbcore.create_pbcore_from_object(
+                object_id=object_id,
+                data_provider=data_provider
+            )
+        finally:
+            sqlalchemy.event.remove(
+                engine, "before_cursor_execute", before_cursor_execute
+            )
+        return len(statements)
+
+    assert count_queries(
+        add_object_with_files(data_provider.db_session_maker, 1)
+    ) == count_queries(
+        add_object_with_files(data_provider.db_session_maker, 20)
+    )
+
+
+def test_pbcore_has_files_and_notes():
+    engine = sqlalchemy.create_engine("sqlite:///:memory:")
+    tyko.database.init_database(engine)
+    data_provider = tyko.data_provider.data_provider.DataProvider(engine)
+    object_id = add_object_with_files(data_provider.db_session_maker, 2)
+
+    doc = etree.fromstring(
+        bytes(
+            pbcore.create_pbcore_from_object(
+                object_id=object_id,
+                data_provider=data_provider
+            ),
+            encoding="utf-8"
+        )
+    )
+    namespaces = {
+        "pbcore": "http://www.pbcore.org/PBCore/PBCoreNamespace.html"
+    }
+    assert doc.xpath(
+        "//pbcore:pbcoreTitle[@titleType='Project Title']/text()",
+        namespaces=namespaces
+    ) == ["my dumb project"]
+    assert doc.xpath(
+        "//pbcore:instantiationIdentifier/text()",
+        namespaces=namespaces
+    ) == ["file_0.wav", "file_1.wav"]
+    assert doc.xpath(
+        "//pbcore:instantiationAnnotation[@annotationType='speed']/text()",
+        namespaces=namespaces
+    ) == ["7.5 ips", "7.5 ips"]
+    assert PBCORE_SCHEMA.validate(doc) is True, \
+        PBCORE_SCHEMA.error_log.filter_from_errors().last_error.message
+
+
+@pytest.mark.parametrize("endpoint, key", [
+    ("api.project_pbcore", "project_id"),
+    ("api.collection_pbcore", "collection_id"),
+])
+def test_pbcore_archive(endpoint, key):
+    app = flask.Flask(__name__, template_folder="../tyko/templates")
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    app.config["TESTING"] = True
+    app.register_blueprint(site)
+    app.register_blueprint(api)
+    tyko.database.db.init_app(app)
+    engine = tyko.database.db.get_engine(app)
+    tyko.database.init_database(engine)
+    session_maker = sqlalchemy.orm.sessionmaker(bind=engine)
+    object_ids = [
+        add_object_with_files(session_maker, number_of_files)
+        for number_of_files in range(3)
+    ]
+    session = session_maker()
+    session.query(tyko.schema.CollectionObject).update(
+        {"project_id": 1, "collection_id": 1}
+    )
+    session.commit()
+    session.close()
+    with app.test_client() as server:
+        server.get("/")
+        assert server.get(url_for(endpoint, **{key: 100})).status_code == 404
+
+        resp = server.get(url_for(endpoint, **{key: 1}))
+        assert resp.status_code == 200
+        assert resp.mimetype == "application/zip"
+        archive = zipfile.ZipFile(io.BytesIO(resp.get_data()))
+        assert archive.namelist() == [
+            f"{object_id}-pbcore.xml" for object_id in object_ids
+        ]
+        for object_id in object_ids:
+            document = archive.read(f"{object_id}-pbcore.xml")
+            assert document == bytes(
+                pbcore.create_pbcore_from_object(
+                    object_id=object_id,
+                    data_provider=tyko.data_provider.DataProvider(engine)
+                ),
+                encoding="utf-8"
+            )
+            doc = etree.fromstring(document)
+            assert PBCORE_SCHEMA.validate(doc) is True, \
+                PBCORE_SCHEMA.error_log.filter_from_errors().last_error.message
+
+
+def test_rendering_with_processes_keeps_order():
+    contexts = [
+        {
+            "object_id": object_id,
+            "name": f"object {object_id}",
+            "barcode": None,
+            "project": {"title": "my dumb project"},
+            "notes": [],
+            "items": [
+                {
+                    "name": "My dummy item",
+                    "notes": [],
+                    "files": [
+                        {
+                            "file_name": f"file_{object_id}.wav",
+                            "generation": None,
+                            "notes": [],
+                            "annotations": []
+                        }
+                    ]
+                }
+            ],
+        } for object_id in range(1, 20)
+    ]
+    assert list(pbcore.iter_rendered_objects(contexts, workers=3)) == \
+           list(pbcore.iter_rendered_objects(contexts, workers=1))
@@ -2,11 +2,13 @@ from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy.orm import sessionmaker
 
 import tyko
-from tyko import schema, data_provider
+from tyko import schema, data_provider, data_generator
 from tyko.api import api
 from tyko.run import is_correct_db_version
 import tyko.database
+import tyko.search_index
 import sqlalchemy
+from sqlalchemy.dialects import mysql
 import pytest
 import json
 from flask import Flask, url_for
@@ -338,6 +340,50 @@ class TestProjectDataConnector:
         )
         assert note_retrieved == note_created
 
+    def test_get_serialized_query_count_is_constant(self, dummy_session):
+        project_provider = \
+            data_provider.ProjectDataConnector(dummy_session)
+
+        def add_project(number_of_objects):
+            session = dummy_session()
+            project = schema.Project(title="dummy")
+            for object_number in range(number_of_objects):
+                collection_object = schema.CollectionObject(
+                    name=f"object {object_number}",
+                    notes=[schema.Note(text="note", note_type_id=1)],
+                )
+                collection_object.items = [
+                    schema.formats.AudioCassette(name="cassette"),
+                    schema.formats.Film(name="film"),
+                ]
+                project.objects.append(collection_object)
+            session.add(project)
+            session.commit()
+            project_id = project.id
+            session.close()
+            return project_id
+
+        def count_queries(project_id):
+            statements = []
+
+            def before_cursor_execute(conn, cursor, statement, *args):
+                statements.append(statement)
+
+            engine = dummy_session.kw["bind"]
+            sqlalchemy.event.listen(
+                engine, "before_cursor_execute", before_cursor_execute
+            )
+            try:
+                project_provider.get(project_id, serialize=True)
+            finally:
+                sqlalchemy.event.remove(
+                    engine, "before_cursor_execute", before_cursor_execute
+                )
+            return len(statements)
+
+        assert count_queries(add_project(1)) == \
+               count_queries(add_project(10))
+
 
 class TestItemDataConnector:
     @pytest.fixture()
@@ -365,6 +411,27 @@ class TestItemDataConnector:
 
         assert retrieved_note["text"] == "spam"
 
+    def test_get_all_includes_every_format(self, item_provider,
+                                           dummy_session):
+        session = dummy_session()
+        session.add_all([
+            schema.formats.Film(name="film"),
+            schema.formats.AudioCassette(name="audio cassette"),
+            schema.formats.VideoCassette(name="video cassette"),
+            schema.formats.Optical(name="optical"),
+            schema.formats.CollectionItem(name="collection item"),
+        ])
+        session.commit()
+        session.close()
+        items = item_provider.get(serialize=False)
+        assert {type(item) for item in items} == {
+            schema.formats.Film,
+            schema.formats.AudioCassette,
+            schema.formats.VideoCassette,
+            schema.formats.Optical,
+            schema.formats.CollectionItem,
+        }
+
     def test_get_invalid_note(self, item_provider):
         new_item_data = item_provider.create(name="dummy", format_id=4)
 
@@ -435,6 +502,86 @@ class TestObjectDataConnector:
         assert note_retrieved['text'] == "dummy"
 
 
+class TestNotesDataConnector:
+    @pytest.fixture()
+    def dummy_session(self):
+        engine = sqlalchemy.create_engine(SQLITE_IN_MEMORY)
+        tyko.database.init_database(engine)
+        return sessionmaker(bind=engine)
+
+    @staticmethod
+    def add_notes(dummy_session, number_of_notes):
+        session = dummy_session()
+        project = schema.Project(title="dummy")
+        collection_object = schema.CollectionObject(name="object")
+        item = schema.formats.Film(name="film")
+        for _ in range(number_of_notes):
+            note = schema.Note(text="note", note_type_id=1)
+            project.notes.append(note)
+            collection_object.notes.append(note)
+            item.notes.append(note)
+        session.add_all([project, collection_object, item])
+        session.commit()
+        ids = project.id, collection_object.id, item.table_id
+        session.close()
+        return ids
+
+    @staticmethod
+    def count_queries(dummy_session, get_notes):
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        engine = dummy_session.kw["bind"]
+        sqlalchemy.event.listen(
+            engine, "before_cursor_execute", before_cursor_execute
+        )
+        try:
+            get_notes()
+        finally:
+            sqlalchemy.event.remove(
+                engine, "before_cursor_execute", before_cursor_execute
+            )
+        return len(statements)
+
+    def test_get_parent_ids(self, dummy_session):
+        project_id, object_id, item_id = self.add_notes(dummy_session, 2)
+        notes = data_provider.NotesDataConnector(dummy_session).get(
+            serialize=True
+        )
+        assert len(notes) == 2
+        for note in notes:
+            assert note['parent_project_ids'] == [project_id]
+            assert note['parent_object_ids'] == [object_id]
+            assert note['parent_item_ids'] == [item_id]
+
+    def test_get_serialized_query_count_is_constant(self, dummy_session):
+        notes_provider = data_provider.NotesDataConnector(dummy_session)
+
+        def get_all_notes():
+            notes_provider.get(serialize=True)
+
+        self.add_notes(dummy_session, 1)
+        count = self.count_queries(dummy_session, get_all_notes)
+        self.add_notes(dummy_session, 10)
+        assert self.count_queries(dummy_session, get_all_notes) == count
+
+    def test_without_parents(self, dummy_session):
+        self.add_notes(dummy_session, 10)
+        notes_provider = data_provider.NotesDataConnector(
+            dummy_session, include_parents=False
+        )
+        page_request = data_provider.PageRequest(limit=5)
+
+        def get_page():
+            notes, _ = notes_provider.get_page(page_request, serialize=True)
+            assert "parent_project_ids" not in notes[0]
+
+        # the page and its total
+        assert self.count_queries(dummy_session, get_page) == 2
+
+
 def test_project_default_status():
     engine = sqlalchemy.create_engine(SQLITE_IN_MEMORY)
     tyko.database.init_database(engine)
@@ -516,3 +663,630 @@ def test_create_samples_creates_a_collection():
     assert session.query(schema.Collection).first() is None
     tyko.database.create_samples(engine)
     assert session.query(schema.Collection).first() is not None
+
+
+class TestEnumCache:
+    @pytest.fixture()
+    def engine(self):
+        engine = sqlalchemy.create_engine(SQLITE_IN_MEMORY)
+        tyko.database.init_database(engine)
+        return engine
+
+    @staticmethod
+    def count_selects(engine):
+        statements = []
+
+        def count(conn, cursor, statement, *_):
+            if statement.lstrip().upper().startswith("SELECT"):
+                statements.append(statement)
+
+        sqlalchemy.event.listen(engine, "before_cursor_execute", count)
+        return statements
+
+    def test_rows_are_read_once(self, engine):
+        provider = data_provider.DataProvider(engine)
+        first = provider.get_formats(serialize=True)
+        selects = self.count_selects(engine)
+        assert provider.get_formats(serialize=True) == first
+        assert provider.get_formats(id=4, serialize=True) == \
+               [{"id": 4, "name": "open reel"}]
+        assert selects == []
+
+    def test_write_invalidates(self, engine):
+        session_maker = sessionmaker(bind=engine)
+        connector = \
+            data_provider.data_provider.CassetteTypeConnector(session_maker)
+        session = session_maker()
+        try:
+            data_provider.enum_getter(session, "CassetteType")
+            new_type = connector.create(name="dummy type")
+            assert new_type in data_provider.enum_getter(
+                session, "CassetteType"
+            )
+            connector.update(new_type["id"], {"name": "renamed"})
+            names = [
+                enum["name"] for enum in
+                data_provider.enum_getter(session, "CassetteType")
+            ]
+            assert "renamed" in names and "dummy type" not in names
+
+            connector.delete(new_type["id"])
+            assert new_type["id"] not in [
+                enum["id"] for enum in
+                data_provider.enum_getter(session, "CassetteType")
+            ]
+        finally:
+            session.close()
+
+    def test_rows_expire(self, engine, monkeypatch):
+        cache = data_provider.enum_cache.EnumCache(ttl=10)
+        session = sessionmaker(bind=engine)()
+        now = 1000.0
+        monkeypatch.setattr(
+            data_provider.enum_cache.time, "monotonic", lambda: now
+        )
+        try:
+            cache.rows(session, schema.NoteTypes)
+            selects = self.count_selects(engine)
+            cache.rows(session, schema.NoteTypes)
+            assert selects == []
+            now += 11
+            cache.rows(session, schema.NoteTypes)
+            assert len(selects) == 1
+        finally:
+            session.close()
+
+    def test_instances_are_detached_copies(self, engine):
+        session_maker = sessionmaker(bind=engine)
+        connector = data_provider.ProjectDataConnector(session_maker)
+        first = connector.get_all_project_status()
+        second = connector.get_all_project_status()
+        assert [status.name for status in first] == \
+               [status.name for status in second]
+        assert first[0] is not second[0]
+        assert sqlalchemy.inspect(first[0]).detached
+
+
+class TestTableVersions:
+    @pytest.fixture()
+    def engine(self):
+        engine = sqlalchemy.create_engine(SQLITE_IN_MEMORY)
+        tyko.database.init_database(engine)
+        return engine
+
+    @staticmethod
+    def project_version(engine):
+        session = sessionmaker(bind=engine)()
+        try:
+            return data_provider.table_versions.get_versions(
+                session, ["project"]
+            ).get("project")
+        finally:
+            session.close()
+
+    def test_bumped_once_per_transaction(self, engine):
+        start = self.project_version(engine)
+        session_maker = sessionmaker(bind=engine)
+        data_provider.table_versions.track(session_maker)
+        session = session_maker()
+        for title in ["first", "second"]:
+            session.add(schema.Project(title=title))
+            session.flush()
+        session.add(schema.Project(title="third"))
+        session.commit()
+        session.close()
+        assert self.project_version(engine) == start + 1
+
+    def test_rollback_is_not_counted(self, engine):
+        start = self.project_version(engine)
+        session_maker = sessionmaker(bind=engine)
+        data_provider.table_versions.track(session_maker)
+        session = session_maker()
+        session.add(schema.Project(title="first"))
+        session.flush()
+        session.rollback()
+        session.commit()
+        session.close()
+        assert self.project_version(engine) == start
+
+    def test_untracked_sessions_are_ignored(self, engine):
+        start = self.project_version(engine)
+        session = sessionmaker(bind=engine)()
+        session.add(schema.Project(title="first"))
+        session.commit()
+        session.close()
+        assert self.project_version(engine) == start
+
+
+class TestHierarchyValidator:
+    @pytest.fixture()
+    def dummy_session(self):
+        engine = sqlalchemy.create_engine(SQLITE_IN_MEMORY)
+        tyko.database.init_database(engine)
+        return sessionmaker(bind=engine)
+
+    @pytest.fixture()
+    def records(self, dummy_session):
+        session = dummy_session()
+        item = schema.formats.OpenReel(
+            name="reel",
+            files=[schema.InstantiationFile(file_name="reel.wav")],
+            notes=[schema.Note(text="note", note_type_id=1)],
+            treatments=[schema.Treatment(message="clean")],
+        )
+        project = schema.Project(
+            title="dummy",
+            objects=[schema.CollectionObject(name="object", items=[item])]
+        )
+        other_project = schema.Project(
+            title="other",
+            objects=[schema.CollectionObject(name="other object")]
+        )
+        session.add_all([project, other_project])
+        session.commit()
+        ids = {
+            "project_id": project.id,
+            "object_id": project.objects[0].id,
+            "item_id": item.table_id,
+            "file_id": item.files[0].file_id,
+            "note_id": item.notes[0].id,
+            "treatment_id": item.treatments[0].id,
+            "other_project_id": other_project.id,
+            "other_object_id": other_project.objects[0].id,
+        }
+        session.close()
+        return ids
+
+    def test_matching_ids(self, dummy_session, records):
+        validator = data_provider.HierarchyValidator(dummy_session)
+        assert validator.exists(records["project_id"], records["object_id"])
+        assert validator.exists(
+            records["project_id"],
+            records["object_id"],
+            records["item_id"],
+            file_id=records["file_id"],
+            note_id=records["note_id"],
+            treatment_id=records["treatment_id"]
+        )
+
+    @pytest.mark.parametrize(
+        "key", ["project_id", "object_id", "item_id", "file_id"]
+    )
+    def test_missing_ids(self, dummy_session, records, key):
+        ids = {
+            "project_id": records["project_id"],
+            "object_id": records["object_id"],
+            "item_id": records["item_id"],
+            "file_id": records["file_id"],
+        }
+        ids[key] = 999
+        validator = data_provider.HierarchyValidator(dummy_session)
+        assert validator.exists(**ids) is False
+
+    def test_other_project(self, dummy_session, records):
+        validator = data_provider.HierarchyValidator(dummy_session)
+        assert validator.exists(
+            records["other_project_id"], records["object_id"]
+        ) is False
+
+    def test_has_note(self, dummy_session):
+        session = dummy_session()
+        project = schema.Project(
+            title="dummy",
+            notes=[schema.Note(text="project note", note_type_id=1)],
+            objects=[
+                schema.CollectionObject(
+                    name="object",
+                    notes=[schema.Note(text="object note", note_type_id=1)]
+                )
+            ]
+        )
+        session.add(project)
+        session.commit()
+        project_id = project.id
+        object_id = project.objects[0].id
+        project_note_id = project.notes[0].id
+        object_note_id = project.objects[0].notes[0].id
+        session.close()
+
+        validator = data_provider.HierarchyValidator(dummy_session)
+        assert validator.has_note(project_id, project_note_id)
+        assert validator.has_note(project_id, object_note_id, object_id)
+        assert validator.has_note(project_id, object_note_id) is False
+        assert validator.has_note(
+            project_id, project_note_id, object_id
+        ) is False
+        assert validator.has_note(
+            project_id + 1, object_note_id, object_id
+        ) is False
+
+
+def test_generate_catalog():
+    engine = sqlalchemy.create_engine(SQLITE_IN_MEMORY)
+    tyko.database.init_database(engine)
+    size = data_generator.CatalogSize(
+        projects=2,
+        objects_per_project=3,
+        items_per_format=1,
+        files_per_item=2,
+        notes_per_record=1
+    )
+    data_generator.generate_catalog(engine, size, seed=1)
+    session = sessionmaker(bind=engine)()
+    try:
+        assert session.query(schema.Project).count() == 2
+        assert session.query(schema.CollectionObject).count() == 6
+        items = session.query(schema.formats.AVFormat).all()
+        assert len(items) == 6 * (len(schema.formats.format_types))
+        assert {type(item) for item in items} == {
+            format_class[1]
+            for format_class in schema.formats.format_types.values()
+        }
+        assert session.query(schema.InstantiationFile).count() == \
+               2 * len(items)
+        assert session.query(schema.FileAnnotation).count() == \
+               2 * len(items)
+        assert session.query(schema.Treatment).count() == len(items)
+        assert all(len(item.notes) == 1 for item in items)
+        assert all(item.object is not None for item in items)
+    finally:
+        session.close()
+
+
+def test_generate_catalog_adds_to_existing_records():
+    engine = sqlalchemy.create_engine(SQLITE_IN_MEMORY)
+    tyko.database.init_database(engine)
+    size = data_generator.CatalogSize(
+        projects=1,
+        collections=1,
+        objects_per_project=2,
+        files_per_item=1
+    )
+    progress = []
+    data_generator.generate_catalog(engine, size, seed=1, batch_size=7)
+    data_generator.generate_catalog(
+        engine, size, seed=2,
+        progress=lambda done, total: progress.append((done, total))
+    )
+    assert progress == [(1, 1)]
+    session = sessionmaker(bind=engine)()
+    try:
+        assert session.query(schema.Project).count() == 2
+        assert session.query(schema.CollectionObject).count() == 4
+        assert session.query(schema.FileAnnotationType).count() == \
+               len(data_generator.ANNOTATION_TYPES)
+        versions = data_provider.table_versions.get_versions(
+            session, ["project", "formats"]
+        )
+        assert versions == {"project": 2, "formats": 2}
+    finally:
+        session.close()
+
+
+def test_generate_data_command():
+    args = tyko.run.generate_data_args(
+        ["--projects", "1", "--objects", "2", "--files", "1", "--seed", "3"]
+    )
+    assert args.projects == 1
+    assert args.batch_size == data_generator.DEFAULT_BATCH_SIZE
+
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = SQLITE_IN_MEMORY
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    tyko.database.db.init_app(app)
+    with app.app_context():
+        tyko.run.generate_data(app, args)
+        session = sessionmaker(bind=tyko.database.db.get_engine(app))()
+        try:
+            assert session.query(schema.CollectionObject).count() == 2
+            assert session.query(schema.InstantiationFile).count() == \
+                   2 * len(schema.formats.format_types)
+        finally:
+            session.close()
+
+
+class TestSearch:
+    @pytest.fixture()
+    def engine(self):
+        engine = sqlalchemy.create_engine(SQLITE_IN_MEMORY)
+        tyko.database.init_database(engine)
+        return engine
+
+    def test_validate_tables_ignores_index(self, engine):
+        table_names = sqlalchemy.inspect(engine).get_table_names()
+        assert tyko.search_index.INDEX_TABLE in table_names
+        assert tyko.database.validate_tables(engine) is True
+
+    def test_new_index_is_filled(self):
+        engine = sqlalchemy.create_engine(SQLITE_IN_MEMORY)
+        schema.AVTables.metadata.create_all(bind=engine)
+        session = sessionmaker(bind=engine)()
+        session.add(schema.Project(title="existing project"))
+        session.commit()
+        session.close()
+
+        tyko.search_index.create_index(engine)
+        connector = data_provider.SearchConnector(sessionmaker(bind=engine))
+        hits, total = connector.search("existing")
+        assert total == 1
+        assert hits[0]['type'] == "project"
+
+    def test_stale_hits_are_dropped(self, engine):
+        session = sessionmaker(bind=engine)()
+        session.add(schema.Project(title="stale project"))
+        session.commit()
+        session.execute(schema.Project.__table__.delete())
+        session.commit()
+        session.close()
+
+        connector = data_provider.SearchConnector(sessionmaker(bind=engine))
+        assert connector.search("stale") == ([], 1)
+
+    def test_bulk_changes_update_only_their_rows(self, engine):
+        session = sessionmaker(bind=engine)()
+        first = schema.Project(title="first reel")
+        second = schema.Project(title="second reel")
+        session.add_all([first, second])
+        session.commit()
+        first_id, second_id = first.id, second.id
+        with engine.begin() as connection:
+            # Not seen by the index, which keeps the old title
+            connection.execute(
+                schema.Project.__table__.update()
+                .where(schema.Project.__table__.c.project_id == second_id)
+                .values(title="renamed")
+            )
+
+        session.query(schema.Project) \
+            .filter(schema.Project.id == first_id).delete()
+        session.commit()
+        connector = data_provider.SearchConnector(sessionmaker(bind=engine))
+        hits, total = connector.search("reel")
+        assert total == 1
+        assert (hits[0]['id'], hits[0]['text']) == (second_id, "second reel")
+
+        session.query(schema.Project) \
+            .filter(schema.Project.id == second_id) \
+            .update({"title": "second cassette"})
+        session.commit()
+        session.close()
+        assert connector.search("reel")[1] == 0
+        assert connector.search("cassette")[1] == 1
+
+    def test_like_index(self):
+        index = tyko.search_index.LikeSearchIndex()
+        engine = sqlalchemy.create_engine(SQLITE_IN_MEMORY)
+        with engine.begin() as connection:
+            index.create(connection)
+            index.replace(
+                connection,
+                {9: "sample reel", 17: "sample cassette", 25: "reel"}
+            )
+            rows, total = index.search(connection, "reel sample")
+        assert total == 1
+        assert rows == [(9, "sample reel", None)]
+
+    def test_short_term(self, engine):
+        session = sessionmaker(bind=engine)()
+        session.add_all([
+            schema.Project(title="tv recordings"),
+            schema.Project(title="radio recordings"),
+        ])
+        session.commit()
+        session.close()
+        connector = data_provider.SearchConnector(sessionmaker(bind=engine))
+        hits, total = connector.search("tv recordings")
+        assert total == 1
+        assert hits[0]['text'] == "tv recordings"
+
+    @pytest.mark.parametrize("terms, full_text, like", [
+        (["tv", "recordings"], ["+recordings*"], ["tv"]),
+        (["the", "reel"], ["+reel*"], ["the"]),
+        (["tv", "of"], [], ["tv", "of"]),
+    ])
+    def test_mysql_terms_not_in_the_index(self, terms, full_text, like):
+        index = tyko.search_index.MySQLFullTextIndex()
+        compiled = index.match(terms).compile(
+            dialect=mysql.dialect(),
+            compile_kwargs={"literal_binds": True}
+        )
+        sql = str(compiled)
+        assert ("MATCH" in sql) == bool(full_text)
+        for term in full_text:
+            assert f"'{term}" in sql
+        for term in like:
+            assert f"LIKE concat(concat('%%', '{term}'), '%%')" in sql
+        score, _ = index.ranked(terms)
+        assert isinstance(score, sqlalchemy.sql.elements.Null) != \
+            bool(full_text)
+
+    def test_generated_catalog_is_indexed(self, engine):
+        data_generator.generate_catalog(
+            engine,
+            data_generator.CatalogSize(projects=1, objects_per_project=1)
+        )
+        connector = data_provider.SearchConnector(sessionmaker(bind=engine))
+        hits, total = connector.search("object 1", record_types=["object"])
+        assert total == 1
+        assert hits[0]['parent_project_ids'] == [1]
+
+
+def test_foreign_keys_are_indexed():
+    for table in schema.AVTables.metadata.tables.values():
+        leading_columns = {
+            list(index.columns)[0] for index in table.indexes
+        }
+        if table.primary_key.columns:
+            leading_columns.add(list(table.primary_key.columns)[0])
+        for column in table.columns:
+            if column.foreign_keys:
+                assert column in leading_columns, \
+                    f"{table.name}.{column.name} is not indexed"
+
+
+def test_validate_tables_warns_of_missing_index(capsys):
+    engine = sqlalchemy.create_engine(SQLITE_IN_MEMORY)
+    tyko.database.init_database(engine)
+    assert tyko.database.missing_indexes(engine) == []
+
+    with engine.begin() as connection:
+        connection.execute(sqlalchemy.text("DROP INDEX ix_formats_object_id"))
+    capsys.readouterr()
+    assert tyko.database.validate_tables(engine) is True
+    assert tyko.database.missing_indexes(engine) == [
+        ("formats", "ix_formats_object_id", ["object_id"])
+    ]
+    assert "ix_formats_object_id" in capsys.readouterr().err
+
+
+def test_database_is_current(monkeypatch):
+    engine = sqlalchemy.create_engine(SQLITE_IN_MEMORY)
+    assert tyko.database.database_is_current(engine) is False
+    tyko.database.init_database(engine)
+    assert tyko.database.database_is_current(engine) is True
+
+    monkeypatch.setattr(
+        tyko.database, "STARTING_PROJECT_STATUSES",
+        tyko.database.STARTING_PROJECT_STATUSES + ["On Hold"]
+    )
+    assert tyko.database.database_is_current(engine) is False
+    tyko.database.init_database(engine)
+    assert tyko.database.database_is_current(engine) is True
+
+
+def test_create_app_skips_init_of_current_database(tmp_path, monkeypatch):
+    settings = tmp_path / "settings.cfg"
+    settings.write_text(
+        f"SQLALCHEMY_DATABASE_URI = 'sqlite:///{tmp_path / 'tyko.db'}'\n"
+        "SQLALCHEMY_TRACK_MODIFICATIONS = False\n"
+    )
+    monkeypatch.setenv("TYKO_SETTINGS", str(settings))
+    initialized = []
+
+    def init_database(engine):
+        initialized.append(engine)
+        tyko.database.init_database(engine)
+
+    monkeypatch.setattr(tyko.run, "init_database", init_database)
+    tyko.run.create_app()
+    tyko.run.create_app()
+    assert len(initialized) == 1
+
+
+def test_init_database_reads_each_enum_table_once():
+    engine = sqlalchemy.create_engine(SQLITE_IN_MEMORY)
+    tyko.database.init_database(engine)
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    sqlalchemy.event.listen(
+        engine, "before_cursor_execute", before_cursor_execute
+    )
+    try:
+        tyko.database.init_database(engine)
+    finally:
+        sqlalchemy.event.remove(
+            engine, "before_cursor_execute", before_cursor_execute
+        )
+    # The format and note types are read again to validate them
+    for table_name, reads in [("film_color", 1),
+                              ("project_status_type", 1),
+                              ("format_types", 2),
+                              ("note_types", 2)]:
+        assert len([
+            statement for statement in statements
+            if statement.startswith("SELECT") and
+            f"FROM {table_name}" in statement
+        ]) == reads, table_name
+
+
+def test_init_database_repairs_enum_drift(capsys):
+    engine = sqlalchemy.create_engine(SQLITE_IN_MEMORY)
+    tyko.database.init_database(engine)
+    with engine.begin() as connection:
+        connection.execute(sqlalchemy.text(
+            "UPDATE format_types SET name = 'reel' WHERE format_id = 4"
+        ))
+        connection.execute(sqlalchemy.text(
+            "INSERT INTO note_types (note_types_id, type_name) "
+            "VALUES (99, 'Extra')"
+        ))
+        connection.execute(sqlalchemy.text("DELETE FROM film_color"))
+    capsys.readouterr()
+
+    tyko.database.init_database(engine)
+
+    errors = capsys.readouterr().err
+    assert "Type reel with id 4 is not expected." in errors
+    assert "Type Extra with id 99 is not expected." in errors
+    assert tyko.database.validate_enumerated_tables(engine) is True
+    session = sessionmaker(bind=engine)()
+    try:
+        assert session.query(schema.FormatTypes.name).filter(
+            schema.FormatTypes.id == 4
+        ).scalar() == "open reel"
+        assert session.query(schema.NoteTypes).count() == \
+               len(schema.notes.note_types)
+        assert session.query(schema.formats.FilmColor).count() == \
+               len(schema.formats.FilmColor.default_values)
+    finally:
+        session.close()
+
+
+def test_init_database_keeps_enum_rows_in_use(capsys):
+    engine = sqlalchemy.create_engine(SQLITE_IN_MEMORY)
+    tyko.database.init_database(engine)
+    with engine.begin() as connection:
+        connection.execute(sqlalchemy.text(
+            "INSERT INTO note_types (note_types_id, type_name) "
+            "VALUES (99, 'Extra')"
+        ))
+        connection.execute(sqlalchemy.text(
+            "INSERT INTO notes (text, note_type_id) VALUES ('note', 99)"
+        ))
+    capsys.readouterr()
+
+    tyko.database.init_database(engine)
+
+    errors = capsys.readouterr().err
+    assert "Type Extra with id 99 is not removed" in errors
+    assert tyko.database.validate_enumerated_tables(engine) is True
+    session = sessionmaker(bind=engine)()
+    try:
+        assert session.query(schema.NoteTypes.name).filter(
+            schema.NoteTypes.id == 99
+        ).scalar() == "Extra"
+        assert session.query(schema.Note.note_type_id).scalar() == 99
+    finally:
+        session.close()
+
+
+def test_create_app_without_version(tmp_path, monkeypatch, caplog):
+    settings = tmp_path / "settings.cfg"
+    settings.write_text(
+        f"SQLALCHEMY_DATABASE_URI = 'sqlite:///{tmp_path / 'tyko.db'}'\n"
+        "SQLALCHEMY_TRACK_MODIFICATIONS = False\n"
+    )
+    monkeypatch.setenv("TYKO_SETTINGS", str(settings))
+
+    def not_installed(*_):
+        raise tyko.utils.InvalidVersionStrategy()
+
+    def not_a_checkout(*_):
+        raise tyko.utils.subprocess.CalledProcessError(128, "git")
+
+    monkeypatch.setattr(
+        tyko.utils.PkgResourceDistributionVersionStrategy,
+        "get_version",
+        not_installed
+    )
+    monkeypatch.setattr(
+        tyko.utils.GitVersionStrategy, "get_git_commit", not_a_checkout
+    )
+    tyko.run.create_app()
+    assert any(
+        "Unable to find the version" in message
+        for message in caplog.messages
+    )
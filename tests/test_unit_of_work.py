@@ -0,0 +1,123 @@
+import json
+
+import pytest
+import sqlalchemy
+from flask import Flask, make_response, url_for
+
+import tyko.database
+from tyko import middleware, schema, unit_of_work
+from tyko.api import api
+from tyko.site import site
+
+
+@pytest.fixture()
+def uow_app():
+    testing_app = Flask(__name__, template_folder="../tyko/templates")
+    testing_app.config["TESTING"] = True
+    testing_app.config["SQLALCHEMY_DATABASE_URI"] = 'sqlite:///:memory:'
+    testing_app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    testing_app.register_blueprint(site)
+    testing_app.register_blueprint(api)
+    tyko.database.db.init_app(testing_app)
+    engine = tyko.database.db.get_engine(testing_app)
+    tyko.database.init_database(engine)
+    middleware.init_app(testing_app, engine)
+    unit_of_work.init_app(testing_app)
+
+    @testing_app.route("/add_project/<int:status_code>")
+    def add_project(status_code):
+        connector = middleware.get_app_middleware().project_connector
+        project_id = connector.create(title="dummy")
+        return make_response(json.dumps({"id": project_id}), status_code)
+
+    @testing_app.route("/copy_project/<int:project_id>")
+    def copy_project(project_id):
+        # Left for the commit at the end of the request, which fails
+        session = middleware.get_app_middleware().data_provider \
+            .db_session_maker()
+        session.add(schema.Project(id=project_id, title="copy"))
+        return make_response("", 200)
+
+    return testing_app
+
+
+def count_projects(app):
+    with app.app_context():
+        session = middleware.get_app_middleware().data_provider \
+            .db_session_maker()
+        try:
+            return session.query(schema.Project).count()
+        finally:
+            session.close()
+
+
+def test_connectors_share_the_request_session(uow_app):
+    with uow_app.test_request_context("/"):
+        session_maker = middleware.get_app_middleware().data_provider \
+            .db_session_maker
+        first = session_maker()
+        second = session_maker()
+        assert isinstance(first, unit_of_work.RequestSession)
+        assert first.session is second.session
+        first.close()
+        assert schema.Session.registry.has()
+    assert not schema.Session.registry.has()
+
+
+def test_sessions_outside_of_requests(uow_app):
+    with uow_app.app_context():
+        session_maker = middleware.get_app_middleware().data_provider \
+            .db_session_maker
+        session = session_maker()
+        try:
+            assert not isinstance(session, unit_of_work.RequestSession)
+        finally:
+            session.close()
+    assert not schema.Session.registry.has()
+
+
+@pytest.mark.parametrize("status_code, projects", [(200, 1), (400, 0)])
+def test_request_is_committed_once(uow_app, status_code, projects):
+    with uow_app.test_client() as server:
+        server.get('/')
+        resp = server.get(url_for("add_project", status_code=status_code))
+        assert resp.status_code == status_code
+    assert count_projects(uow_app) == projects
+
+
+def test_api_writes_are_committed(uow_app):
+    with uow_app.test_client() as server:
+        server.get('/')
+        assert server.post(
+            url_for("api.add_project"),
+            data=json.dumps({"title": "my project"}),
+            content_type='application/json'
+        ).status_code == 200
+        projects = server.get(url_for("api.projects")).get_json()
+    assert [project['title'] for project in projects['projects']] == \
+           ["my project"]
+
+
+def test_failed_commit_is_an_error_response(uow_app):
+    with uow_app.test_client() as server:
+        server.get('/')
+        project_id = json.loads(
+            server.get(url_for("add_project", status_code=200)).data
+        )['id']
+        resp = server.get(url_for("copy_project", project_id=project_id))
+        assert resp.status_code == 400
+        assert server.get(url_for("api.projects")).status_code == 200
+    assert count_projects(uow_app) == 1
+
+
+def test_connector_errors_are_raised_in_the_view(uow_app):
+    with uow_app.test_request_context("/"):
+        session_maker = middleware.get_app_middleware().data_provider \
+            .db_session_maker
+        session = session_maker()
+        session.add(schema.Project(title="first"))
+        session.commit()
+        project_id = session.query(schema.Project.id).scalar()
+        session.add(schema.Project(id=project_id, title="copy"))
+        with pytest.raises(sqlalchemy.exc.IntegrityError):
+            session.commit()
@@ -59,6 +59,20 @@ class TestGitVersionStrategy:
         )
         assert strategy.get_version().startswith("GIT")
 
+    @pytest.mark.parametrize("error", [
+        tyko.utils.subprocess.CalledProcessError(128, "git"),
+        FileNotFoundError("git"),
+    ])
+    def test_get_version_git_fails(self, strategy, monkeypatch, error):
+        def get_git_commit(*_):
+            raise error
+
+        monkeypatch.setattr(
+            tyko.utils.GitVersionStrategy, "get_git_commit", get_git_commit
+        )
+        with pytest.raises(tyko.utils.InvalidVersionStrategy):
+            strategy.get_version()
+
     def test_git_command_not_found(self, strategy, monkeypatch):
         with monkeypatch.context() as context:
             context.setattr(
@@ -90,3 +104,33 @@ def test_get_version_no_valid_raises():
 
     with pytest.raises(tyko.utils.NoValidStrategy):
         tyko.utils.get_version(strategies=[invalid_strategy_type])
+
+
+class TestVersionCache:
+    @pytest.fixture()
+    def strategy_type(self):
+        strategy = Mock(
+            name="strategy",
+            spec=tyko.utils.AbsGetVersionStrategy
+        )
+        strategy.get_version = Mock(side_effect=["1.0", "1.1"])
+        strategy_type = Mock(return_value=strategy)
+        strategy_type.__name__ = "strategy"
+        return strategy_type
+
+    def test_version_is_looked_up_once(self, strategy_type):
+        cache = tyko.utils.VersionCache(strategies=[strategy_type])
+        assert cache.get() == "1.0"
+        assert cache.get() == "1.0"
+        assert strategy_type.call_count == 1
+
+    def test_version_is_refreshed(self, strategy_type, monkeypatch):
+        cache = tyko.utils.VersionCache(
+            refresh=60, strategies=[strategy_type]
+        )
+        monkeypatch.setattr(tyko.utils.time, "monotonic", lambda: 100.0)
+        assert cache.get() == "1.0"
+        monkeypatch.setattr(tyko.utils.time, "monotonic", lambda: 159.0)
+        assert cache.get() == "1.0"
+        monkeypatch.setattr(tyko.utils.time, "monotonic", lambda: 161.0)
+        assert cache.get() == "1.1"
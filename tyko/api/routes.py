@@ -1,9 +1,9 @@
 from typing import List, Iterable, TypedDict
 
-from flask import Blueprint, current_app, jsonify, request
+from flask import Blueprint, current_app, jsonify, make_response, request
 from werkzeug.routing import Rule
 
-from tyko import database, data_provider, middleware, utils
+from tyko import middleware, utils
 
 from tyko.views.cassette_tape import CassetteTapeThicknessAPI, \
     CassetteTapeFormatTypesAPI, CassetteTapeTapeTypesAPI
@@ -166,28 +166,24 @@ api = Blueprint("api", __name__, url_prefix="/api")
 
 @api.route("/format")
 def formats():
-    data_prov = data_provider.DataProvider(database.db.engine)
-    return middleware.Middleware(data_prov).get_formats()
+    return middleware.get_app_middleware().formats.get_formats()
 
 
 @api.route("/collection")
 def collections():
-    data_prov = data_provider.DataProvider(database.db.engine)
-    collection_middleware = middleware.CollectionMiddlewareEntity(data_prov)
+    collection_middleware = middleware.get_app_middleware().collections
     return collection_middleware.get(True)
 
 
 @api.route("/collection", methods=["POST"])
 def add_collection():
-    data_prov = data_provider.DataProvider(database.db.engine)
-    collection_middleware = middleware.CollectionMiddlewareEntity(data_prov)
+    collection_middleware = middleware.get_app_middleware().collections
     return collection_middleware.create()
 
 
 @api.route("/collection/<int:collection_id>", methods=["GET", "PUT", "DELETE"])
 def collection(collection_id):
-    data_prov = data_provider.DataProvider(database.db.engine)
-    collection_middleware = middleware.CollectionMiddlewareEntity(data_prov)
+    collection_middleware = middleware.get_app_middleware().collections
     return views.CollectionsAPI.as_view(
         "collection",
         collection=collection_middleware
@@ -196,39 +192,34 @@ def collection(collection_id):
 
 @api.route("/project")
 def projects():
-    data_prov = data_provider.DataProvider(database.db.engine)
-    project_middleware = middleware.ProjectMiddlewareEntity(data_prov)
+    project_middleware = middleware.get_app_middleware().projects
     return project_middleware.get(serialize=True)
 
 
 @api.route("/project", methods=['POST'])
 def add_project():
-    data_prov = data_provider.DataProvider(database.db.engine)
-    project_middleware = middleware.ProjectMiddlewareEntity(data_prov)
+    project_middleware = middleware.get_app_middleware().projects
     return project_middleware.create()
 
 
 @api.route("/project/<int:project_id>", methods=["GET", "PUT", "DELETE"])
 def project(project_id):
-    data_prov = data_provider.DataProvider(database.db.engine)
-    project_middleware = middleware.ProjectMiddlewareEntity(data_prov)
+    project_middleware = middleware.get_app_middleware().projects
     return ProjectAPI.as_view(
         "projects",
         project=project_middleware
     )(project_id)
 
 
-@api.route("/project/<string:project_id>/notes", methods=["POST"])
+@api.route("/project/<int:project_id>/notes", methods=["POST"])
 def project_add_note(project_id):
-    data_prov = data_provider.DataProvider(database.db.engine)
-    project_middleware = middleware.ProjectMiddlewareEntity(data_prov)
+    project_middleware = middleware.get_app_middleware().projects
     return project_middleware.add_note(project_id)
 
 
 @api.route("/project/<int:project_id>/object", methods=["POST"])
 def project_add_object(project_id):
-    data_prov = data_provider.DataProvider(database.db.engine)
-    project_middleware = middleware.ProjectMiddlewareEntity(data_prov)
+    project_middleware = middleware.get_app_middleware().projects
     return project_middleware.add_object(project_id)
 
 
@@ -237,8 +228,7 @@ def project_add_object(project_id):
     methods=["GET", "DELETE"]
 )
 def project_object(project_id, object_id):
-    data_prov = data_provider.DataProvider(database.db.engine)
-    project_middleware = middleware.ProjectMiddlewareEntity(data_prov)
+    project_middleware = middleware.get_app_middleware().projects
     return ProjectObjectAPI.as_view(
         "project_objects",
         project=project_middleware
@@ -250,8 +240,7 @@ def project_object(project_id, object_id):
     methods=["GET", "PUT", "DELETE"]
 )
 def project_notes(project_id, note_id):
-    data_prov = data_provider.DataProvider(database.db.engine)
-    project_middleware = middleware.ProjectMiddlewareEntity(data_prov)
+    project_middleware = middleware.get_app_middleware().projects
     return ProjectNotesAPI.as_view(
         "project_notes",
         project=project_middleware
@@ -260,7 +249,7 @@ def project_notes(project_id, note_id):
 
 @api.route("/item/<int:item_id>", methods=["GET", "PUT", "DELETE"])
 def item(item_id):
-    data_prov = data_provider.DataProvider(database.db.engine)
+    data_prov = middleware.get_app_middleware().data_provider
     return ItemAPI.as_view("item", provider=data_prov)(item_id)
 
 
@@ -269,8 +258,9 @@ def item(item_id):
     methods=["POST"]
 )
 def project_object_add_note(project_id, object_id):
-    data_prov = data_provider.DataProvider(database.db.engine)
-    object_middleware = middleware.ObjectMiddlewareEntity(data_prov)
+    object_middleware = middleware.get_app_middleware().objects
+    if not object_middleware.in_project(project_id, object_id):
+        return make_response("No such object", 404)
     return object_middleware.add_note(project_id, object_id)
 
 
@@ -283,8 +273,7 @@ def project_object_add_note(project_id, object_id):
         "PUT",
     ])
 def modify_project_object(object_id):
-    data_prov = data_provider.DataProvider(database.db.engine)
-    object_middleware = middleware.ObjectMiddlewareEntity(data_prov)
+    object_middleware = middleware.get_app_middleware().objects
     return ObjectApi.as_view(
         "object", object_middleware=object_middleware
     )(object_id)
@@ -294,8 +283,7 @@ def modify_project_object(object_id):
     "/project/<int:project_id>/object/<int:object_id>/notes/<int:note_id>",
     methods=["GET", "PUT", "DELETE"])
 def object_notes(project_id, object_id, note_id):
-    data_prov = data_provider.DataProvider(database.db.engine)
-    object_middleware = middleware.ObjectMiddlewareEntity(data_prov)
+    object_middleware = middleware.get_app_middleware().objects
     return ProjectObjectNotesAPI.as_view(
         "object_notes",
         project_object=object_middleware
@@ -304,36 +292,31 @@ def object_notes(project_id, object_id, note_id):
 
 @api.route("/object", methods=["POST"])
 def add_object():
-    data_prov = data_provider.DataProvider(database.db.engine)
-    project_object_middleware = middleware.ObjectMiddlewareEntity(data_prov)
+    project_object_middleware = middleware.get_app_middleware().objects
     return project_object_middleware.create()
 
 
 @api.route("/notes/", methods=["POST"])
 def add_note():
-    data_prov = data_provider.DataProvider(database.db.engine)
-    notes_middleware = middleware.NotestMiddlewareEntity(data_prov)
+    notes_middleware = middleware.get_app_middleware().notes
     return notes_middleware.create()
 
 
 @api.route("/notes")
 def notes():
-    data_prov = data_provider.DataProvider(database.db.engine)
-    notes_middleware = middleware.NotestMiddlewareEntity(data_prov)
+    notes_middleware = middleware.get_app_middleware().notes
     return notes_middleware.get(serialize=True)
 
 
 @api.route("/note_types")
 def note_types():
-    data_prov = data_provider.DataProvider(database.db.engine)
-    notes_middleware = middleware.NotestMiddlewareEntity(data_prov)
+    notes_middleware = middleware.get_app_middleware().notes
     return notes_middleware.list_types()
 
 
 @api.route("/note/<int:note_id>", methods=["GET", "PUT", "DELETE"])
 def note(note_id):
-    data_prov = data_provider.DataProvider(database.db.engine)
-    notes_middleware = middleware.NotestMiddlewareEntity(data_prov)
+    notes_middleware = middleware.get_app_middleware().notes
     return views.NotesAPI.as_view(
         "note",
         notes_middleware=notes_middleware
@@ -348,20 +331,31 @@ def note(note_id):
              "PUT"
              ])
 def object_item(project_id, object_id):
-    data_prov = data_provider.DataProvider(database.db.engine)
+    data_prov = middleware.get_app_middleware().data_provider
     return ObjectItemAPI.as_view(
         "object_item",
         provider=data_prov
     )(project_id=project_id, object_id=object_id)
 
 
+@api.route(
+    "/project/<int:project_id>/object/<int:object_id>/item/import",
+    methods=["POST"]
+)
+def object_item_import(project_id, object_id):
+    object_middleware = middleware.get_app_middleware().objects
+    if not object_middleware.in_project(project_id, object_id):
+        return make_response("No such object", 404)
+    return object_middleware.import_items(object_id)
+
+
 @api.route(
     "/project/<int:project_id>/object/<int:object_id>/item/<int:item_id>"
     "/files",
     methods=["POST", "GET", "PUT", "DELETE"]
 )
 def item_files(project_id, object_id, item_id):
-    data_prov = data_provider.DataProvider(database.db.engine)
+    data_prov = middleware.get_app_middleware().data_provider
     return ItemFilesAPI.as_view(
         "item_files",
         provider=data_prov
@@ -373,7 +367,7 @@ def item_files(project_id, object_id, item_id):
     methods=["GET", "POST", "PUT", "DELETE"]
 )
 def file_notes(file_id):
-    data_prov = data_provider.DataProvider(database.db.engine)
+    data_prov = middleware.get_app_middleware().data_provider
     return FileNotesAPI.as_view(
         "file_notes", provider=data_prov
     )(file_id)
@@ -381,7 +375,7 @@ def file_notes(file_id):
 
 @api.route("/file/annotation_types", methods=["GET", "POST", "DELETE"])
 def file_annotation_types():
-    data_prov = data_provider.DataProvider(database.db.engine)
+    data_prov = middleware.get_app_middleware().data_provider
     return FileAnnotationTypesAPI.as_view(
         "file_annotation_types",
         provider=data_prov
@@ -393,7 +387,7 @@ def file_annotation_types():
     methods=["GET", "POST", "PUT", "DELETE"]
 )
 def file_annotations(file_id):
-    data_prov = data_provider.DataProvider(database.db.engine)
+    data_prov = middleware.get_app_middleware().data_provider
     return FileAnnotationsAPI.as_view(
         "file_annotations",
         provider=data_prov
@@ -405,7 +399,7 @@ def file_annotations(file_id):
     methods=["GET", "POST", "DELETE", "PUT"]
 )
 def cassette_tape_tape_thickness():
-    data_prov = data_provider.DataProvider(database.db.engine)
+    data_prov = middleware.get_app_middleware().data_provider
     return CassetteTapeThicknessAPI.as_view(
         "cassette_tape_tape_thickness",
         provider=data_prov)()
@@ -416,7 +410,7 @@ def cassette_tape_tape_thickness():
     methods=["GET", "POST", "DELETE", "PUT"]
 )
 def cassette_tape_format_types():
-    data_prov = data_provider.DataProvider(database.db.engine)
+    data_prov = middleware.get_app_middleware().data_provider
     return CassetteTapeFormatTypesAPI.as_view(
         "cassette_tape_format_types",
         provider=data_prov
@@ -428,7 +422,7 @@ def cassette_tape_format_types():
     methods=["GET", "POST", "DELETE", "PUT"]
 )
 def cassette_tape_tape_types():
-    data_prov = data_provider.DataProvider(database.db.engine)
+    data_prov = middleware.get_app_middleware().data_provider
     return CassetteTapeTapeTypesAPI.as_view(
         "cassette_tape_tape_types",
         provider=data_prov
@@ -437,15 +431,13 @@ def cassette_tape_tape_types():
 
 @api.route("/item")
 def items():
-    data_prov = data_provider.DataProvider(database.db.engine)
-    item_middleware = middleware.ItemMiddlewareEntity(data_prov)
+    item_middleware = middleware.get_app_middleware().items
     return item_middleware.get(True)
 
 
 @api.route("/item", methods=["POST"])
 def add_item():
-    data_prov = data_provider.DataProvider(database.db.engine)
-    item_middleware = middleware.ItemMiddlewareEntity(data_prov)
+    item_middleware = middleware.get_app_middleware().items
     return item_middleware.create()
 
 
@@ -455,8 +447,9 @@ def add_item():
     methods=["POST"]
 )
 def project_object_item_add_note(project_id, object_id, item_id):
-    data_prov = data_provider.DataProvider(database.db.engine)
-    item_middleware = middleware.ItemMiddlewareEntity(data_prov)
+    item_middleware = middleware.get_app_middleware().items
+    if not item_middleware.in_object(project_id, object_id, item_id):
+        return make_response("No such item", 404)
     return item_middleware.add_note(item_id)
 
 
@@ -465,8 +458,7 @@ def project_object_item_add_note(project_id, object_id, item_id):
     methods=["POST"]
 )
 def project_object_item_add_file(project_id, object_id, item_id):
-    data_prov = data_provider.DataProvider(database.db.engine)
-    item_middleware = middleware.ItemMiddlewareEntity(data_prov)
+    item_middleware = middleware.get_app_middleware().items
     return item_middleware.add_file(project_id, object_id, item_id)
 
 
@@ -478,8 +470,11 @@ def item_treatment(project_id, object_id):
     item_id = request.args.get('item_id')
     if not item_id:
         raise AttributeError('no valid item')
-    item_id = int(item_id)
-    data_prov = data_provider.DataProvider(database.db.engine)
+    try:
+        item_id = int(item_id)
+    except ValueError:
+        return make_response("No such item", 404)
+    data_prov = middleware.get_app_middleware().data_provider
     return ObjectItemTreatmentAPI.as_view(
         "item_treatment",
         provider=data_prov
@@ -496,8 +491,7 @@ def item_treatment(project_id, object_id):
     methods=["GET", "PUT", "DELETE"]
 )
 def item_notes(project_id, object_id, item_id, note_id):
-    data_prov = data_provider.DataProvider(database.db.engine)
-    item_middleware = middleware.ItemMiddlewareEntity(data_prov)
+    item_middleware = middleware.get_app_middleware().items
     return ObjectItemNotesAPI.as_view(
         "item_notes",
         item=item_middleware
@@ -511,18 +505,38 @@ def item_notes(project_id, object_id, item_id, note_id):
 
 @api.route("/object")
 def objects():
-    data_prov = data_provider.DataProvider(database.db.engine)
-    object_middleware = middleware.ObjectMiddlewareEntity(data_prov)
+    object_middleware = middleware.get_app_middleware().objects
     return object_middleware.get(True)
 
 
 @api.route("/object/<int:object_id>-pbcore.xml")
 def object_pbcore(object_id):
-    data_prov = data_provider.DataProvider(database.db.engine)
-    object_middleware = middleware.ObjectMiddlewareEntity(data_prov)
+    object_middleware = middleware.get_app_middleware().objects
     return object_middleware.pbcore(id=object_id)
 
 
+@api.route("/project/<int:project_id>-pbcore.zip")
+def project_pbcore(project_id):
+    project_middleware = middleware.get_app_middleware().projects
+    return project_middleware.pbcore_archive(id=project_id)
+
+
+@api.route("/collection/<int:collection_id>-pbcore.zip")
+def collection_pbcore(collection_id):
+    collection_middleware = middleware.get_app_middleware().collections
+    return collection_middleware.pbcore_archive(id=collection_id)
+
+
+@api.route("/search")
+def search():
+    return middleware.get_app_middleware().search.search()
+
+
+@api.route("/barcode/<string:barcode>")
+def barcode_lookup(barcode):
+    return middleware.get_app_middleware().search.find_barcode(barcode)
+
+
 @api.route("/")
 def list_routes():
     result_type = TypedDict(
@@ -551,8 +565,8 @@ def list_routes():
 
 @api.route("/format/<int:format_id>")
 def format_by_id(format_id):
-    data_prov = data_provider.DataProvider(database.db.engine)
-    return middleware.Middleware(data_prov).get_formats_by_id(id=format_id)
+    formats = middleware.get_app_middleware().formats
+    return formats.get_formats_by_id(id=format_id)
 
 
 @api.route('/application_data')
@@ -560,7 +574,7 @@ def get_application_data():
 
     server_color = current_app.config.get('TYKO_SERVER_COLOR')
     return {
-        "version": utils.get_version(),
+        "version": utils.version_cache.get(),
         "server_color": server_color
     }
 
@@ -571,9 +585,8 @@ def add_enum_routes():
             rule,
             endpoint=end_point,
             view_func=lambda class_name_=class_name: middleware.get_enums(
-                data_provider.DataProvider(
-                    database.db.engine
-                ).db_session_maker,
+                middleware.get_app_middleware()
+                .data_provider.db_session_maker,
                 class_name_
             )
         )
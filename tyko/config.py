@@ -1,2 +1,27 @@
 class Config:
     SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+
+    # Add a Server-Timing header and a log line with the number of queries,
+    # rows and time spent in the database to every response
+    TYKO_SQL_INSTRUMENTATION = False
+
+    # Skip creating the tables and adding the enumerated values when the
+    # application starts, if the database was already set up with the same
+    # schema version and values. The init-db command always sets it up.
+    TYKO_FAST_START = True
+
+    # Seconds the rows of lookup tables such as the format types are kept in
+    # memory. Changes made by this process are seen right away, changes made
+    # by other workers after at most this long. None keeps them until they
+    # change and 0 turns the cache off.
+    TYKO_ENUM_CACHE_TTL = 300
+
+    # Seconds the version shown by the application is kept before it is
+    # looked up again. None looks it up once, when the application starts.
+    # Set it in development to follow new commits without a restart.
+    TYKO_VERSION_REFRESH = None
+
+    # Number of processes the documents of a project or collection PBCore
+    # export are rendered with. 1 renders them in the worker handling the
+    # request.
+    TYKO_PBCORE_WORKERS = 1
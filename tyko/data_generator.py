@@ -0,0 +1,397 @@
+"""Fill a database with a synthetic catalog.
+
+The catalog has the shape of real data: projects with objects, objects
+with items of every format, and items with files, annotations, notes and
+treatments. Enumerated details are picked with a skewed distribution, so a
+few values are common and the rest are rare, the way they are in the real
+catalog. The same seed always creates the same catalog.
+
+Rows are written with batched Core inserts instead of ORM objects, so that
+catalogs of millions of rows can be created for load testing. Primary keys
+are assigned here, following the largest key already in each table. The
+search index and table versions are updated for what was added.
+
+The database has to be initialized with database.init_database() first.
+"""
+import collections
+import dataclasses
+import datetime
+import random
+from typing import Any, Callable, DefaultDict, Dict, List, Optional, Set, \
+    Type
+
+import sqlalchemy
+from sqlalchemy import orm
+
+from tyko import schema, search_index
+from tyko.data_provider import table_versions
+from tyko.schema import formats
+
+__all__ = ["CatalogSize", "generate_catalog"]
+
+# Chance that an optional enumerated detail of an item is left empty
+EMPTY_DETAIL_RATE = 0.1
+
+# Number of rows kept in memory before they are written to the database
+DEFAULT_BATCH_SIZE = 5000
+
+# Annotation types created when the database has none
+ANNOTATION_TYPES = ["Speed", "Noise", "Transfer issue"]
+
+_EARLIEST_DATE = datetime.date(1950, 1, 1)
+_DATE_RANGE_DAYS = 365 * 70
+
+_GENERATIONS = ["Preservation", "Access", "Mezzanine"]
+_TREATMENT_TYPES = ["needed", "given"]
+
+
+@dataclasses.dataclass
+class CatalogSize:
+    """Number of records to create."""
+
+    projects: int = 2
+    collections: int = 2
+    objects_per_project: int = 10
+
+    # For each of the formats, so an object gets six times as many items
+    items_per_format: int = 1
+
+    files_per_item: int = 2
+    annotations_per_file: int = 1
+    treatments_per_item: int = 1
+
+    # Added to every project, object, item and file
+    notes_per_record: int = 1
+
+
+class _Picker:
+    def __init__(self, connection, seed: int) -> None:
+        self.random = random.Random(seed)
+        self._connection = connection
+        self._values: Dict[Type[Any], List[int]] = {}
+
+    def ids(self, mapped_class: Type[Any]) -> List[int]:
+        """Get the primary keys of a lookup table, in order."""
+        if mapped_class not in self._values:
+            primary_key = sqlalchemy.inspect(mapped_class).primary_key[0]
+            self._values[mapped_class] = list(
+                self._connection.execute(
+                    sqlalchemy.select(primary_key).order_by(primary_key)
+                ).scalars()
+            )
+        return self._values[mapped_class]
+
+    def enum(self, enum_class: Type[Any]) -> Optional[int]:
+        """Pick the id of a value, with weights falling off as 1/rank."""
+        values = self.ids(enum_class)
+        if not values or self.random.random() < EMPTY_DETAIL_RATE:
+            return None
+        weights = [1 / rank for rank in range(1, len(values) + 1)]
+        return self.random.choices(values, weights=weights)[0]
+
+    def date(self) -> datetime.date:
+        return _EARLIEST_DATE + datetime.timedelta(
+            days=self.random.randrange(_DATE_RANGE_DAYS)
+        )
+
+    def text(self, prefix: str) -> str:
+        return f"{prefix} {self.random.randrange(10 ** 6)}"
+
+
+class _BulkWriter:
+    # Collects the rows of mapped classes as plain dictionaries and writes
+    # them with one executemany per table and batch. Tables are written in
+    # dependency order, so foreign keys always point to rows already there.
+
+    def __init__(self, connection, batch_size: int) -> None:
+        self.connection = connection
+        self.batch_size = batch_size
+        self.written: Set[str] = set()
+        # Table name -> first primary key added
+        self.first_ids: Dict[str, int] = {}
+        self._rows: DefaultDict[sqlalchemy.Table, List[Dict[str, Any]]] = \
+            collections.defaultdict(list)
+        self._pending = 0
+        self._next_ids: Dict[sqlalchemy.Table, int] = {}
+
+    def _next_id(self, table: sqlalchemy.Table) -> int:
+        if table not in self._next_ids:
+            largest = self.connection.execute(
+                sqlalchemy.select(
+                    sqlalchemy.func.max(table.primary_key.columns[0])
+                )
+            ).scalar()
+            self._next_ids[table] = (largest or 0) + 1
+            self.first_ids[table.name] = self._next_ids[table]
+        next_id = self._next_ids[table]
+        self._next_ids[table] += 1
+        return next_id
+
+    def add(self, mapped_class: Type[Any], **values: Any) -> int:
+        """Queue a record, given by mapped attribute names.
+
+        Returns:
+            Primary key of the new record.
+
+        """
+        mapper = sqlalchemy.inspect(mapped_class)
+        primary_key = mapper.get_property_by_column(mapper.primary_key[0])
+        record_id = self._next_id(mapper.base_mapper.local_table)
+        values[primary_key.key] = record_id
+
+        rows: Dict[sqlalchemy.Table, Dict[str, Any]] = {
+            table: {} for table in mapper.tables
+        }
+        for key, value in values.items():
+            for column in mapper.get_property(key).columns:
+                if column.table in rows:
+                    rows[column.table][column.key] = value
+        if mapper.polymorphic_on is not None:
+            rows[mapper.polymorphic_on.table][mapper.polymorphic_on.key] = \
+                mapper.polymorphic_identity
+
+        for table, row in rows.items():
+            self._queue(table, row)
+        return record_id
+
+    def link(self, relationship: orm.RelationshipProperty,
+             parent_id: int, child_id: int) -> None:
+        """Queue a row of the association table of a relationship."""
+        (_, parent_column), = relationship.synchronize_pairs
+        (_, child_column), = relationship.secondary_synchronize_pairs
+        self._queue(
+            relationship.secondary,
+            {parent_column.key: parent_id, child_column.key: child_id}
+        )
+
+    def _queue(self, table: sqlalchemy.Table, row: Dict[str, Any]) -> None:
+        self._rows[table].append(row)
+        self._pending += 1
+        if self._pending >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        for table in schema.AVTables.metadata.sorted_tables:
+            rows = self._rows.pop(table, None)
+            if not rows:
+                continue
+
+            # An executemany needs the same columns in every row
+            by_columns: DefaultDict[frozenset, List[Dict[str, Any]]] = \
+                collections.defaultdict(list)
+            for row in rows:
+                by_columns[frozenset(row)].append(row)
+            for same_columns in by_columns.values():
+                self.connection.execute(table.insert(), same_columns)
+            self.written.add(table.name)
+        self._pending = 0
+
+
+class _CatalogWriter:
+    def __init__(self, writer: _BulkWriter, picker: _Picker,
+                 size: CatalogSize) -> None:
+        self.writer = writer
+        self.picker = picker
+        self.size = size
+        self.format_classes = [
+            (format_class[0], format_id)
+            for format_id, *format_class in formats.format_types.values()
+            if format_class
+        ]
+        self._format_details = {
+            format_class: _format_detail_columns(format_class)
+            for format_class, _ in self.format_classes
+        }
+
+    def notes(self, relationship: orm.RelationshipProperty,
+              parent_id: int) -> None:
+        for _ in range(self.size.notes_per_record):
+            note_id = self.writer.add(
+                schema.Note,
+                text=self.picker.text("synthetic note"),
+                note_type_id=self.picker.random.choice(
+                    self.picker.ids(schema.NoteTypes)
+                )
+            )
+            self.writer.link(relationship, parent_id, note_id)
+
+    def project(self, number: int, collection_ids: List[int]) -> None:
+        project_id = self.writer.add(
+            schema.Project,
+            title=f"project {number}",
+            project_code=f"P{number:04d}",
+            current_location="synthetic",
+            status_id=self.picker.enum(schema.ProjectStatus)
+        )
+        self.notes(schema.Project.notes.property, project_id)
+        for object_number in range(self.size.objects_per_project):
+            object_id = self.writer.add(
+                schema.CollectionObject,
+                name=f"object {number}-{object_number + 1}",
+                project_id=project_id,
+                collection_id=self.picker.random.choice(collection_ids)
+                if collection_ids else None,
+                originals_rec_date=self.picker.date()
+            )
+            self.notes(schema.CollectionObject.notes.property, object_id)
+            self.items(object_id)
+
+    def items(self, object_id: int) -> None:
+        sequence = 0
+        for format_class, format_type_id in self.format_classes:
+            for _ in range(self.size.items_per_format):
+                sequence += 1
+                barcode = f"{self.picker.random.randrange(10 ** 12):012d}"
+                item_id = self.writer.add(
+                    format_class,
+                    name=f"{format_class.__name__} {sequence}",
+                    format_type_id=format_type_id,
+                    object_id=object_id,
+                    obj_sequence=sequence,
+                    barcode=barcode,
+                    inspection_date=self.picker.date(),
+                    **self.details(format_class)
+                )
+                self.notes(formats.AVFormat.notes.property, item_id)
+                self.files(item_id, barcode)
+                for _ in range(self.size.treatments_per_item):
+                    self.writer.add(
+                        schema.Treatment,
+                        item_id=item_id,
+                        treatment_type=self.picker.random.choice(
+                            _TREATMENT_TYPES
+                        ),
+                        message=self.picker.text("synthetic treatment"),
+                        date=self.picker.date()
+                    )
+
+    def details(self, format_class: Type[formats.AVFormat]) -> Dict[str, Any]:
+        enum_columns, date_columns = self._format_details[format_class]
+        details: Dict[str, Any] = {
+            key: self.picker.enum(enum_class)
+            for key, enum_class in enum_columns
+        }
+        for key, precision_key in date_columns:
+            details[key] = self.picker.date()
+            if precision_key is not None:
+                details[precision_key] = self.picker.random.choice([1, 2, 3])
+        return details
+
+    def files(self, item_id: int, barcode: str) -> None:
+        annotation_types = self.picker.ids(schema.FileAnnotationType)
+        for file_number in range(self.size.files_per_item):
+            file_id = self.writer.add(
+                schema.InstantiationFile,
+                file_name=f"{barcode}_{file_number + 1:03d}.wav",
+                generation=self.picker.random.choice(_GENERATIONS),
+                item_id=item_id
+            )
+            for _ in range(self.size.notes_per_record):
+                self.writer.add(
+                    schema.FileNotes,
+                    message="synthetic file note",
+                    file_id=file_id
+                )
+            for _ in range(self.size.annotations_per_file):
+                self.writer.add(
+                    schema.FileAnnotation,
+                    file_id=file_id,
+                    type_id=self.picker.random.choice(annotation_types),
+                    annotation_content=self.picker.text("synthetic annotation")
+                )
+
+
+def _format_detail_columns(format_class: Type[formats.AVFormat]):
+    # Foreign keys to enumerated values, and dates with their precision,
+    # that belong to the format itself and not to every item
+    mapper = sqlalchemy.inspect(format_class)
+    enum_columns = []
+    for relationship in mapper.relationships:
+        if relationship.parent is mapper and \
+                relationship.direction is orm.MANYTOONE and \
+                issubclass(relationship.mapper.class_, formats.EnumTable):
+            local_column, = relationship.local_columns
+            enum_columns.append(
+                (
+                    mapper.get_property_by_column(local_column).key,
+                    relationship.mapper.class_
+                )
+            )
+
+    date_columns = []
+    for column_property in mapper.column_attrs:
+        column = column_property.columns[0]
+        if column.table is not mapper.local_table or \
+                not isinstance(column.type, sqlalchemy.Date):
+            continue
+        precision_key = f"{column_property.key}_precision"
+        date_columns.append(
+            (
+                column_property.key,
+                precision_key if precision_key in mapper.column_attrs
+                else None
+            )
+        )
+    return enum_columns, date_columns
+
+
+def _add_annotation_types(connection) -> None:
+    annotation_types = schema.FileAnnotationType.__table__
+    has_types = connection.execute(
+        sqlalchemy.select(annotation_types.c.type_id).limit(1)
+    ).first()
+    if has_types is None:
+        connection.execute(
+            annotation_types.insert(),
+            [{"name": name, "active": True} for name in ANNOTATION_TYPES]
+        )
+
+
+def generate_catalog(
+        engine: sqlalchemy.engine.Engine,
+        size: Optional[CatalogSize] = None,
+        seed: int = 0,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        progress: Optional[Callable[[int, int], None]] = None
+) -> None:
+    """Add a synthetic catalog to a database.
+
+    Each project is added in a transaction of its own.
+
+    Args:
+        engine: Database to add the catalog to.
+        size: Number of records to create.
+        seed: Seed of the random choices.
+        batch_size: Number of rows written to the database at a time.
+        progress: Called with the number of projects done and the total
+            after each project.
+
+    """
+    size = size or CatalogSize()
+    with engine.begin() as connection:
+        _add_annotation_types(connection)
+        writer = _BulkWriter(connection, batch_size)
+        collection_ids = [
+            writer.add(
+                schema.Collection,
+                collection_name=f"collection {number + 1}"
+            ) for number in range(size.collections)
+        ]
+        writer.flush()
+        table_versions.bump(connection, writer.written)
+
+    picker_seed = random.Random(seed)
+    for project_number in range(1, size.projects + 1):
+        with engine.begin() as connection:
+            writer = _BulkWriter(connection, batch_size)
+            catalog = _CatalogWriter(
+                writer,
+                _Picker(connection, picker_seed.randrange(2 ** 32)),
+                size
+            )
+            catalog.project(project_number, collection_ids)
+            writer.flush()
+            search_index.index_new_records(connection, writer.first_ids)
+            table_versions.bump(connection, writer.written)
+        if progress is not None:
+            progress(project_number, size.projects)
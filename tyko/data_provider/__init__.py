@@ -14,11 +14,22 @@ from tyko.data_provider.data_provider import \
     ProjectDataConnector, \
     get_schema_version,\
     NotesDataConnector, \
+    PageRequest, \
+    encode_cursor, \
+    loader_options, \
+    LOADER_PROFILES, \
     enum_getter
-from . import formats
+from tyko.data_provider.barcodes import BarcodeLookup
+from tyko.data_provider.hierarchy import HierarchyValidator
+from tyko.data_provider.item_import import ItemImporter, read_csv_rows
+from tyko.data_provider.search import SearchConnector
+from . import enum_cache, formats, search, table_versions
 
 __all__ = [
+    "enum_cache",
     "formats",
+    "search",
+    "table_versions",
     "AbsDataProviderConnector",
     "AbsNotesConnector",
     "CollectionDataConnector",
@@ -31,6 +42,15 @@ __all__ = [
     "FileNotesDataConnector",
     "NotesDataConnector",
     "ProjectDataConnector",
+    "PageRequest",
+    "BarcodeLookup",
+    "HierarchyValidator",
+    "ItemImporter",
+    "SearchConnector",
+    "read_csv_rows",
+    "encode_cursor",
+    "loader_options",
+    "LOADER_PROFILES",
     "get_schema_version",
     "enum_getter"
 ]
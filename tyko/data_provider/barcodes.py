@@ -0,0 +1,65 @@
+"""Find the items and objects with a barcode."""
+from typing import Any, Dict, List
+
+import sqlalchemy
+from sqlalchemy import orm
+
+from tyko.schema import CollectionObject
+from tyko.schema.formats import AVFormat
+
+__all__ = ["BarcodeLookup"]
+
+
+class BarcodeLookup:
+    """Look barcodes up with one query, using the barcode indexes."""
+
+    def __init__(self, session_maker: orm.sessionmaker) -> None:
+        self.session_maker = session_maker
+
+    def find(self, barcode: str) -> List[Dict[str, Any]]:
+        """Find every item and object with a barcode.
+
+        Barcodes are not unique, so there can be more than one match.
+
+        Returns:
+            Type, id and name of each match with the ids of its parent
+            projects and objects.
+
+        """
+        items = sqlalchemy.select(
+            sqlalchemy.literal("item").label("type"),
+            AVFormat.table_id.label("id"),
+            AVFormat.name.label("name"),
+            AVFormat.object_id.label("object_id"),
+            CollectionObject.project_id.label("project_id")
+        ).outerjoin(
+            CollectionObject, CollectionObject.id == AVFormat.object_id
+        ).where(AVFormat.barcode == barcode)
+
+        objects = sqlalchemy.select(
+            sqlalchemy.literal("object"),
+            CollectionObject.id,
+            CollectionObject.name,
+            sqlalchemy.null(),
+            CollectionObject.project_id
+        ).where(CollectionObject.barcode == barcode)
+
+        session = self.session_maker()
+        try:
+            rows = session.execute(sqlalchemy.union_all(items, objects))
+            return [
+                {
+                    "type": row.type,
+                    "id": row.id,
+                    "name": row.name,
+                    "parent_project_ids":
+                        [row.project_id] if row.project_id is not None
+                        else [],
+                    "parent_object_ids":
+                        [row.object_id] if row.object_id is not None
+                        else [],
+                    "parent_item_ids": [],
+                } for row in rows
+            ]
+        finally:
+            session.close()
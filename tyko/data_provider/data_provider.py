@@ -1,4 +1,7 @@
 import abc
+import base64
+import binascii
+import dataclasses
 import warnings
 from abc import ABC, ABCMeta
 from datetime import datetime
@@ -11,26 +14,241 @@ from typing import \
     TypedDict, \
     Mapping, \
     Union, \
-    Callable
+    Callable, \
+    Sequence, \
+    Tuple
 
 import sqlalchemy
 from sqlalchemy import true, orm
 import sqlalchemy.exc
 import tyko
-from tyko import schema, utils, database
+from tyko import schema, utils, database, unit_of_work
 from tyko.exceptions import DataError, NotValidRequest
+from tyko.data_provider import enum_cache, read_models, table_versions
 
 from tyko.schema import NoteTypes, Note, formats, CollectionItem, \
     InstantiationFile, Project, ProjectStatus, CollectionObject, Collection, \
     FileNotes, FileAnnotation, FileAnnotationType, CassetteType, \
     CassetteTapeType, Treatment
-from tyko.schema.formats import AVFormat
+from tyko.schema.formats import AVFormat, item_has_notes_table
+from tyko.schema.objects import object_has_notes_table
+from tyko.schema.projects import project_has_notes_table
 
 DATE_FORMAT = '%Y-%m-%d'
 
 TykoEnumData = TypedDict('TykoEnumData', {'name': str, 'id': int})
 
 
+@dataclasses.dataclass
+class PageRequest:
+    """Slice of a list of records requested by a client.
+
+    Attributes:
+        limit: Maximum number of records to return. None returns all of them.
+        offset: Number of records to skip before the first one returned.
+        sort: Field to sort by. Prefix with "-" for descending order.
+        filters: Field names mapped to the value they have to match.
+        after: Cursor of the last record of the previous page. Records are
+            then sought by primary key instead of skipped with an OFFSET.
+    """
+
+    limit: Optional[int] = None
+    offset: int = 0
+    sort: Optional[str] = None
+    filters: Mapping[str, str] = dataclasses.field(default_factory=dict)
+    after: Optional[str] = None
+
+
+def encode_cursor(primary_key_value: int) -> str:
+    """Create an opaque cursor pointing after the given record."""
+    return base64.urlsafe_b64encode(
+        str(primary_key_value).encode("ascii")
+    ).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> int:
+    """Get the primary key value a cursor points after."""
+    try:
+        return int(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (binascii.Error, UnicodeError, ValueError) as error:
+        raise ValueError(f"Invalid cursor {cursor}") from error
+
+
+def apply_page_request(
+        query: orm.Query,
+        page_request: PageRequest,
+        fields: Mapping[str, Any],
+        primary_key
+) -> Tuple[orm.Query, int]:
+    """Translate a page request into WHERE, ORDER BY and LIMIT/OFFSET.
+
+    Text fields match on a substring, everything else on equality. Records
+    are always ordered by their primary key last so pages are stable. When
+    the page request has a cursor, the page starts at the first primary key
+    past it, which costs the same no matter how deep into the list it is.
+
+    Args:
+        query: Query selecting all the records of the list.
+        page_request: Requested page.
+        fields: Public field names mapped to the columns they refer to.
+        primary_key: Primary key column of the records in the list.
+
+    Returns:
+        The query for the requested page and the number of records matching
+        the filters.
+
+    """
+    for field_name, value in page_request.filters.items():
+        column = fields.get(field_name)
+        if column is None:
+            raise ValueError(f"Unable to filter by {field_name}")
+        if isinstance(column.type, sqlalchemy.Integer):
+            query = query.filter(column == int(value))
+        else:
+            query = query.filter(column.contains(value, autoescape=True))
+
+    total = query.with_entities(sqlalchemy.func.count(primary_key)).scalar()
+
+    if page_request.after is not None:
+        if page_request.sort or page_request.offset:
+            raise ValueError(
+                "A cursor cannot be combined with sort or offset"
+            )
+        query = query.filter(primary_key > decode_cursor(page_request.after))
+
+    if page_request.sort:
+        field_name = page_request.sort.lstrip("-")
+        column = fields.get(field_name)
+        if column is None:
+            raise ValueError(f"Unable to sort by {field_name}")
+        if page_request.sort.startswith("-"):
+            query = query.order_by(column.desc())
+        else:
+            query = query.order_by(column.asc())
+
+    query = query.order_by(primary_key)
+
+    if page_request.offset:
+        query = query.offset(page_request.offset)
+
+    if page_request.limit is not None:
+        query = query.limit(page_request.limit)
+
+    return query, total
+
+
+def _item_loader_options(items) -> List[orm.Load]:
+    """Eager load everything AVFormat.serialize() reads from an item.
+
+    Args:
+        items: with_polymorphic() entity the items are queried through.
+
+    """
+    options = [
+        orm.joinedload(items.format_type),
+        orm.selectinload(items.notes).joinedload(Note.note_type),
+        orm.selectinload(items.files),
+        orm.selectinload(items.treatments),
+    ]
+
+    # enumerated details of each format, such as AudioCassette.generation
+    for mapper in sqlalchemy.inspect(AVFormat).self_and_descendants:
+        if mapper.class_ is AVFormat:
+            continue
+        format_entity = getattr(items, mapper.class_.__name__)
+        for relationship in mapper.relationships:
+            if relationship.parent is not mapper or \
+                    relationship.direction is not orm.MANYTOONE:
+                continue
+            options.append(
+                orm.selectinload(getattr(format_entity, relationship.key))
+            )
+    return options
+
+
+def _object_detail_options(
+        collection_object: CollectionObject
+) -> List[orm.Load]:
+    items = orm.with_polymorphic(AVFormat, "*")
+    return [
+        orm.selectinload(collection_object.items.of_type(items))
+        .options(*_item_loader_options(items)),
+        orm.selectinload(collection_object.notes)
+        .joinedload(Note.note_type),
+        orm.joinedload(collection_object.collection)
+        .joinedload(Collection.contact),
+        orm.joinedload(collection_object.contact),
+        orm.joinedload(collection_object.project)
+        .options(
+            orm.joinedload(Project.status),
+            orm.selectinload(Project.notes).joinedload(Note.note_type),
+        ),
+    ]
+
+
+def _project_detail_options(project: Project) -> List[orm.Load]:
+    return [
+        orm.joinedload(project.status),
+        orm.selectinload(project.notes).joinedload(Note.note_type),
+        orm.selectinload(project.objects).options(
+            orm.selectinload(CollectionObject.items)
+            .joinedload(AVFormat.format_type),
+            orm.selectinload(CollectionObject.notes),
+            orm.joinedload(CollectionObject.collection),
+            orm.joinedload(CollectionObject.contact),
+        ),
+    ]
+
+
+def _pbcore_options(
+        collection_object: CollectionObject
+) -> List[orm.Load]:
+    """Eager load what a PBCore document of an object is made from."""
+    return [
+        orm.joinedload(collection_object.project),
+        orm.selectinload(collection_object.notes)
+        .joinedload(Note.note_type),
+        orm.selectinload(collection_object.items).options(
+            orm.selectinload(AVFormat.notes).joinedload(Note.note_type),
+            orm.selectinload(AVFormat.files).options(
+                orm.selectinload(InstantiationFile.notes),
+                orm.selectinload(InstantiationFile.annotations)
+                .joinedload(FileAnnotation.annotation_type),
+            ),
+        ),
+    ]
+
+
+LOADER_PROFILES: Dict[str, Callable[[Any], List[orm.Load]]] = {
+    "item_list": _item_loader_options,
+    "object_detail": _object_detail_options,
+    "project_detail": _project_detail_options,
+    "pbcore": _pbcore_options,
+}
+
+
+def loader_options(profile: str, entity) -> List[orm.Load]:
+    """Get the eager loading options of a named loader profile.
+
+    Each profile loads the relationships a serialize() tree walks up front,
+    so serializing runs a fixed number of queries no matter how many
+    records are in the tree.
+
+    Args:
+        profile: Name of the profile in LOADER_PROFILES.
+        entity: Class or alias being queried for.
+
+    Returns:
+        Options to pass to Query.options().
+
+    """
+    try:
+        options_factory = LOADER_PROFILES[profile]
+    except KeyError as error:
+        raise ValueError(f"Unknown loader profile {profile}") from error
+    return options_factory(entity)
+
+
 class AbsDataProviderConnector(metaclass=abc.ABCMeta):
 
     def __init__(self, session_maker: orm.sessionmaker) -> None:
@@ -79,6 +297,167 @@ class AbsNotesConnector(AbsDataProviderConnector, ABC):  # noqa: E501 pylint: di
         return new_note
 
 
+class PagedListConnector(abc.ABC):
+    """Read the records of a list one page at a time."""
+
+    session_maker: orm.sessionmaker
+
+    LIST_FIELDS: Mapping[str, Any] = {}
+
+    # Number of records fetched from the database at a time while streaming
+    STREAM_BATCH_SIZE = 500
+
+    # Fields of the list that can be read from columns alone, when only
+    # some of them are requested
+    READ_MODEL: Optional[read_models.ReadModel] = None
+
+    @abc.abstractmethod
+    def _page_query(
+            self,
+            session: orm.Session,
+            page_request: PageRequest,
+            eager: bool
+    ) -> Tuple[orm.Query, int]:
+        """Get the query for a page and the number of records matching it.
+
+        Args:
+            session: Session to query with.
+            page_request: Requested page.
+            eager: Eager load what serializing the records needs.
+
+        """
+
+    @abc.abstractmethod
+    def _serialize_record(self, record) -> Mapping[str, Any]:
+        """Serialize one record of the list."""
+
+    def _fields_query(
+            self,
+            session: orm.Session,
+            page_request: PageRequest,
+            fields: Sequence[str]
+    ) -> Tuple[orm.Query, int, Callable[[Any], Mapping[str, Any]]]:
+        if self.READ_MODEL is None:
+            raise ValueError("Fields cannot be selected for this list")
+        field_names = self.READ_MODEL.field_names(fields)
+        query, total = apply_page_request(
+            self.READ_MODEL.query(session, field_names),
+            page_request,
+            fields=self.LIST_FIELDS,
+            primary_key=self.READ_MODEL.primary_key
+        )
+        return query, total, self.READ_MODEL.serializer(field_names)
+
+    def _serialized_page_query(
+            self,
+            session: orm.Session,
+            page_request: PageRequest,
+            fields: Optional[Sequence[str]]
+    ) -> Tuple[orm.Query, int, Callable[[Any], Mapping[str, Any]]]:
+        if fields is not None:
+            return self._fields_query(session, page_request, fields)
+        query, total = self._page_query(session, page_request, True)
+        return query, total, self._serialize_record
+
+    def get_page(self, page_request: PageRequest, serialize=False,
+                 fields: Optional[Sequence[str]] = None):
+        """Get the records of a page.
+
+        Args:
+            page_request: Requested page.
+            serialize: Serialize the records.
+            fields: Only serialize these fields, read with the READ_MODEL.
+
+        """
+        session = self.session_maker()
+        try:
+            if fields is None and not serialize:
+                query, total = self._page_query(session, page_request, False)
+                return query.all(), total
+            query, total, serialize_record = \
+                self._serialized_page_query(session, page_request, fields)
+            return [serialize_record(r) for r in query], total
+        finally:
+            session.close()
+
+    def iter_page(
+            self,
+            page_request: PageRequest,
+            fields: Optional[Sequence[str]] = None
+    ) -> Tuple[Iterator[Mapping[str, Any]], int]:
+        """Serialize the records of a page as they are read.
+
+        Records are read STREAM_BATCH_SIZE at a time, so the whole page is
+        never held in memory. Each batch is fetched in full before its
+        records are serialized, so the queries serializing runs never share
+        the connection with an unfinished result. The session stays open
+        until the records are exhausted or the iterator is closed.
+
+        Args:
+            page_request: Requested page.
+            fields: Only serialize these fields, read with the READ_MODEL.
+
+        Returns:
+            Iterator of serialized records and the number of records matching
+            the filters.
+
+        """
+        session = self.session_maker()
+        try:
+            query, total, serialize_record = \
+                self._serialized_page_query(session, page_request, fields)
+        except Exception:
+            session.close()
+            raise
+
+        def iter_records():
+            try:
+                for batch in _iter_batches(
+                        query, page_request, self.STREAM_BATCH_SIZE
+                ):
+                    for record in batch:
+                        yield serialize_record(record)
+            finally:
+                session.close()
+
+        return iter_records(), total
+
+
+def _record_key(record) -> Any:
+    if isinstance(record, sqlalchemy.engine.Row):
+        # Rows of a READ_MODEL query start with the primary key
+        return record[0]
+    return sqlalchemy.inspect(record).identity[0]
+
+
+def _iter_batches(
+        query: orm.Query,
+        page_request: PageRequest,
+        batch_size: int
+) -> Iterator[List[Any]]:
+    """Read the records of a page query in batches.
+
+    Lists in primary key order continue after the last key read, sorted
+    lists continue at the next offset.
+    """
+    entity = query.column_descriptions[0]["entity"]
+    primary_key = sqlalchemy.inspect(entity).mapper.primary_key[0]
+    read = 0
+    batch = query.limit(batch_size).all()
+    while batch:
+        yield batch
+        if len(batch) < batch_size:
+            return
+        read += len(batch)
+        if page_request.sort:
+            batch_query = query.offset(page_request.offset + read)
+        else:
+            batch_query = query.offset(None).filter(
+                primary_key > _record_key(batch[-1])
+            )
+        batch = batch_query.limit(batch_size).all()
+
+
 def strip_empty_strings(data):
     for key, value in data.items():
         if value == '':
@@ -385,72 +764,72 @@ def update_format_specific_details(
         )
 
 
-class ItemDataConnector(AbsNotesConnector):
+class ItemDataConnector(AbsNotesConnector, PagedListConnector):
+    LIST_FIELDS = {
+        "item_id": AVFormat.table_id,
+        "name": AVFormat.name,
+        "barcode": AVFormat.barcode,
+        "obj_sequence": AVFormat.obj_sequence,
+        "format_id": AVFormat.format_type_id,
+        "parent_object_id": AVFormat.object_id,
+    }
+
+    LOADER_PROFILE = "item_list"
+    READ_MODEL = read_models.ITEMS
+
+    @staticmethod
+    def _polymorphic_query(
+            session: orm.Session,
+            profile: Optional[str] = None
+    ) -> orm.Query:
+        """Query every format subclass in a single round trip.
+
+        The subclass tables are LEFT OUTER JOINed onto formats so that the
+        columns of each item are loaded at the same time, regardless of
+        which kind of format it is. A loader profile adds the eager loading
+        needed to serialize the items.
+        """
+        items = orm.with_polymorphic(schema.formats.AVFormat, "*")
+        query = session.query(items)
+        if profile is not None:
+            query = query.options(*loader_options(profile, items))
+        return query
 
     @staticmethod
-    def _get_all(session: orm.Session) -> List[schema.formats.AVFormat]:
-        res: List[schema.formats.AVFormat] = \
-            list(session.query(schema.formats.Film).all()) + \
-            list(session.query(schema.formats.AudioCassette).all()) + \
-            list(session.query(schema.formats.GroovedDisc).all()) + \
-            list(session.query(schema.formats.OpenReel).all()) + \
-            list(session.query(schema.formats.CollectionItem).all())
-        if len(res) == 0:
-            res = list(session.query(formats.AVFormat)
-                       .all())
-        return res
+    def _get_all(
+            session: orm.Session,
+            profile: Optional[str] = None
+    ) -> List[schema.formats.AVFormat]:
+        return ItemDataConnector._polymorphic_query(session, profile).all()
 
     @staticmethod
     def _iterall(session: orm.Session) -> Iterator[schema.formats.AVFormat]:
-        yield from session.query(schema.formats.Film).all()
-        yield from session.query(schema.formats.AudioCassette).all()
-        yield from session.query(schema.formats.GroovedDisc).all()
-        yield from session.query(schema.formats.OpenReel).all()
-        yield from session.query(schema.formats.CollectionItem).all()
-        yield from session.query(schema.formats.VideoCassette).all()
+        yield from ItemDataConnector._polymorphic_query(session)
 
     @staticmethod
     def _get_one(
             session: orm.Session,
-            table_id: int
+            table_id: int,
+            profile: Optional[str] = None
     ) -> List[schema.formats.AVFormat]:
-        res = list(session.query(schema.formats.Film)
-                   .filter(schema.formats.AVFormat.table_id == table_id)
-                   .all()) + \
-              list(session.query(schema.formats.AudioCassette)
-                   .filter(schema.formats.AVFormat.table_id == table_id)
-                   .all()) + \
-              list(session.query(schema.formats.GroovedDisc)
-                   .filter(schema.formats.AVFormat.table_id == table_id)
-                   .all()) + \
-              list(session.query(schema.formats.OpenReel)
-                   .filter(schema.formats.AVFormat.table_id == table_id)
-                   .all()) + \
-              list(session.query(schema.formats.VideoCassette)
-                   .filter(schema.formats.AVFormat.table_id == table_id)
-                   .all()) + \
-              list(session.query(schema.formats.CollectionItem)
-                   .filter(schema.formats.AVFormat.table_id == table_id)
-                   .all())
-        if len(res) == 0:
-            res = list(session.query(schema.formats.AVFormat)
-                       .filter(schema.formats.AVFormat.table_id == table_id)
-                       .all())
-        return res
+        return ItemDataConnector._polymorphic_query(session, profile)\
+            .filter(schema.formats.AVFormat.table_id == table_id)\
+            .all()
 
     @staticmethod
     def _serialize(items: List[formats.CollectionItem]):
         return [
-            collection_item.serialize(true) for collection_item in items
+            collection_item.serialize(True) for collection_item in items
         ]
 
     def get(self, id=None, serialize=False):
         session = self.session_maker()
+        profile = self.LOADER_PROFILE if serialize else None
         try:
             if id is not None:
-                all_collection_item = self._get_one(session, id)
+                all_collection_item = self._get_one(session, id, profile)
             else:
-                all_collection_item = self._get_all(session)
+                all_collection_item = self._get_all(session, profile)
 
             if serialize:
                 all_collection_item = self._serialize(all_collection_item)
@@ -465,6 +844,19 @@ class ItemDataConnector(AbsNotesConnector):
         finally:
             session.close()
 
+    def _page_query(self, session, page_request, eager):
+        return apply_page_request(
+            self._polymorphic_query(
+                session, self.LOADER_PROFILE if eager else None
+            ),
+            page_request,
+            fields=self.LIST_FIELDS,
+            primary_key=AVFormat.table_id
+        )
+
+    def _serialize_record(self, record):
+        return record.serialize(True)
+
     def add_note(self, item_id: int, note_text: str, note_type_id: int):
         session = self.session_maker()
         try:
@@ -663,15 +1055,14 @@ class ItemDataConnector(AbsNotesConnector):
     def get_note_types(self):
         session = self.session_maker()
         try:
-            return session.query(NoteTypes).all()
+            return enum_cache.cache.instances(session, NoteTypes)
         finally:
             session.close()
 
     @staticmethod
     def _get_item(item_id, session):
-        for i in ItemDataConnector._iterall(session):
-            if i.table_id == item_id:
-                return i
+        for i in ItemDataConnector._get_one(session, item_id):
+            return i
         raise ValueError("Not a valid item")
 
     def remove_note(self, item_id, note_id):
@@ -857,7 +1248,12 @@ class DataProvider:
         self.engine = engine
         self.db_engine = engine
         # self.init_database()
-        self.db_session_maker = orm.sessionmaker(bind=self.db_engine)
+
+        # Shares the session of the request, in apps using the unit of work
+        self.db_session_maker = \
+            unit_of_work.RequestSessionMaker(bind=self.db_engine)
+        table_versions.track(self.db_session_maker)
+        table_versions.track(schema.Session)
 
     def init_database(self):
         database.init_database(self.engine)
@@ -866,13 +1262,14 @@ class DataProvider:
         try:
             session = self.db_session_maker()
 
-            if id:
-                all_formats = session.query(schema.formats.FormatTypes)\
-                    .filter(schema.formats.FormatTypes.id == id)\
-                    .all()
-            else:
-                all_formats = session.query(schema.formats.FormatTypes).all()
+            all_formats = enum_cache.cache.instances(
+                session, schema.formats.FormatTypes
+            )
             session.close()
+            if id:
+                all_formats = [
+                    format_ for format_ in all_formats if format_.id == int(id)
+                ]
 
         except sqlalchemy.exc.DatabaseError as error:
             raise DataError(
@@ -885,17 +1282,29 @@ class DataProvider:
         return all_formats
 
 
-class ProjectDataConnector(AbsNotesConnector):
+class ProjectDataConnector(AbsNotesConnector, PagedListConnector):
+    LIST_FIELDS = {
+        "project_id": Project.id,
+        "title": Project.title,
+        "project_code": Project.project_code,
+        "current_location": Project.current_location,
+        "status_id": Project.status_id,
+    }
+    LOADER_PROFILE = "project_detail"
+    READ_MODEL = read_models.PROJECTS
 
     def get(self, id=None, serialize=False):
         session = self.session_maker()
+        query = session.query(Project)
+        if serialize is True:
+            query = query.options(
+                *loader_options(self.LOADER_PROFILE, Project)
+            )
         if id:
-            all_projects = session.query(Project)\
-                .filter(Project.id == id)\
-                .all()
+            all_projects = query.filter(Project.id == id).all()
 
         else:
-            all_projects = session.query(Project).all()
+            all_projects = query.all()
 
         if serialize is True:
             serialized_projects = []
@@ -911,6 +1320,22 @@ class ProjectDataConnector(AbsNotesConnector):
 
         return all_projects
 
+    def _page_query(self, session, page_request, eager):
+        query = session.query(Project)
+        if eager:
+            query = query.options(
+                *loader_options(self.LOADER_PROFILE, Project)
+            )
+        return apply_page_request(
+            query,
+            page_request,
+            fields=self.LIST_FIELDS,
+            primary_key=Project.id
+        )
+
+    def _serialize_record(self, record):
+        return record.serialize(recurse=True)
+
     def get_all_project_status(self) -> List[ProjectStatus]:
         """Get the list of all possible statuses that a project can be
 
@@ -920,7 +1345,7 @@ class ProjectDataConnector(AbsNotesConnector):
         """
         session = self.session_maker()
         try:
-            return session.query(ProjectStatus).all()
+            return enum_cache.cache.instances(session, ProjectStatus)
         finally:
             session.close()
 
@@ -1082,7 +1507,7 @@ class ProjectDataConnector(AbsNotesConnector):
     def get_note_types(self):
         session = self.session_maker()
         try:
-            return session.query(NoteTypes).all()
+            return enum_cache.cache.instances(session, NoteTypes)
         finally:
             session.close()
 
@@ -1197,21 +1622,32 @@ class ProjectDataConnector(AbsNotesConnector):
             session.close()
 
 
-class ObjectDataConnector(AbsNotesConnector):
+class ObjectDataConnector(AbsNotesConnector, PagedListConnector):
+    LIST_FIELDS = {
+        "object_id": CollectionObject.id,
+        "name": CollectionObject.name,
+        "collection_id": CollectionObject.collection_id,
+        "project_id": CollectionObject.project_id,
+    }
+    LOADER_PROFILE = "object_detail"
+    READ_MODEL = read_models.OBJECTS
 
     def get(self, id=None, serialize=False):
         session = self.session_maker()
+        query = session.query(CollectionObject)
+        if serialize:
+            query = query.options(
+                *loader_options(self.LOADER_PROFILE, CollectionObject)
+            )
         try:
             if id is not None:
                 all_collection_object = \
-                    session.query(CollectionObject).filter(
-                        CollectionObject.id == id).all()
+                    query.filter(CollectionObject.id == id).all()
                 if len(all_collection_object) == 0:
                     raise DataError(message=f"Unable to find object: {id}")
             else:
                 all_collection_object = \
-                    session.query(CollectionObject).filter(
-                        CollectionObject.project is not None).all()
+                    query.filter(CollectionObject.project is not None).all()
         except sqlalchemy.exc.DatabaseError as error:
             raise DataError(
                 message=f"Unable to find object: {error}"
@@ -1231,6 +1667,22 @@ class ObjectDataConnector(AbsNotesConnector):
 
         return all_collection_object
 
+    def _page_query(self, session, page_request, eager):
+        query = session.query(CollectionObject)
+        if eager:
+            query = query.options(
+                *loader_options(self.LOADER_PROFILE, CollectionObject)
+            )
+        return apply_page_request(
+            query,
+            page_request,
+            fields=self.LIST_FIELDS,
+            primary_key=CollectionObject.id
+        )
+
+    def _serialize_record(self, record):
+        return record.serialize(False)
+
     def create(self, *args, **kwargs):
         name = kwargs["name"]
         data = self.get_data(kwargs)
@@ -1320,7 +1772,7 @@ class ObjectDataConnector(AbsNotesConnector):
     def get_note_types(self):
         session = self.session_maker()
         try:
-            return session.query(NoteTypes).all()
+            return enum_cache.cache.instances(session, NoteTypes)
         finally:
             session.close()
 
@@ -1692,7 +2144,13 @@ class FilesDataConnector(AbsDataProviderConnector):
             session.close()
 
 
-class CollectionDataConnector(AbsDataProviderConnector):
+class CollectionDataConnector(AbsDataProviderConnector, PagedListConnector):
+    LIST_FIELDS = {
+        "collection_id": Collection.id,
+        "collection_name": Collection.collection_name,
+        "department": Collection.department,
+        "record_series": Collection.record_series,
+    }
 
     def get(self, id=None, serialize=False):
         session = self.session_maker()
@@ -1716,6 +2174,17 @@ class CollectionDataConnector(AbsDataProviderConnector):
 
         return all_collections
 
+    def _page_query(self, session, page_request, eager):
+        return apply_page_request(
+            session.query(Collection),
+            page_request,
+            fields=self.LIST_FIELDS,
+            primary_key=Collection.id
+        )
+
+    def _serialize_record(self, record):
+        return record.serialize()
+
     def create(self, *args, **kwargs):
         collection_name = kwargs.get("collection_name")
         department = kwargs.get("department")
@@ -1771,48 +2240,143 @@ class CollectionDataConnector(AbsDataProviderConnector):
         return False
 
 
-class NotesDataConnector(AbsDataProviderConnector):
+class NotesDataConnector(AbsDataProviderConnector, PagedListConnector):
+    LIST_FIELDS = {
+        "note_id": Note.id,
+        "text": Note.text,
+        "note_type_id": Note.note_type_id,
+    }
 
-    def get(self, id=None, serialize=False):
-        session = self.session_maker()
-        if id:
-            all_notes = session.query(Note) \
-                .filter(Note.id == id) \
-                .all()
-        else:
-            all_notes = \
-                session.query(Note).all()
+    # Parent records of a note, by the key of their ids in the serialized
+    # note. The ids of all of them are read with one query.
+    PARENT_TABLES = {
+        "parent_project_ids":
+            (project_has_notes_table, project_has_notes_table.c.project_id),
+        "parent_object_ids":
+            (object_has_notes_table, object_has_notes_table.c.object_id),
+        "parent_item_ids":
+            (item_has_notes_table, item_has_notes_table.c.item_id),
+    }
 
-        if serialize:
-            serialized_notes = []
-            for note in all_notes:
-                note_data = note.serialize()
+    def __init__(self, session_maker: orm.sessionmaker,
+                 include_parents: bool = True) -> None:
+        """Notes connector.
 
-                projects_mentioned = [
-                    project.id for project in note.project_sources
-                ]
-                note_data['parent_project_ids'] = projects_mentioned
+        Args:
+            session_maker: Session maker for the database.
+            include_parents: Add the ids of the projects, objects and items
+                of a note when serializing it.
 
-                objects_mentioned = [
-                    obj.id for obj in note.object_sources
-                ]
-                note_data['parent_object_ids'] = objects_mentioned
+        """
+        super().__init__(session_maker)
+        self.include_parents = include_parents
 
-                items_mentioned = [
-                    obj.id for obj in note.item_source
-                ]
-                note_data['parent_item_ids'] = items_mentioned
+    def get(self, id=None, serialize=False):
+        session = self.session_maker()
+        try:
+            query = session.query(Note)
+            if id:
+                query = query.filter(Note.id == id)
+            if serialize:
+                query = query.options(orm.joinedload(Note.note_type))
+            all_notes = query.all()
 
-                serialized_notes.append(note_data)
-            all_notes = serialized_notes
+            if serialize:
+                parent_ids = self._parent_ids(
+                    session, note_id=id
+                ) if self.include_parents else None
 
-        session.close()
+                all_notes = [
+                    self._serialize_note(note, parent_ids)
+                    for note in all_notes
+                ]
+        finally:
+            session.close()
 
         if id is not None:
             return all_notes[0]
 
         return all_notes
 
+    def _parent_ids(
+            self,
+            session: orm.Session,
+            note_id: Optional[int] = None
+    ) -> Dict[int, Dict[str, List[int]]]:
+        """Get the ids of the parents of the notes, by note id.
+
+        The association tables are read with a single UNION ALL query
+        instead of loading the relationships of every note.
+        """
+        selects = []
+        for key, (table, parent_id) in self.PARENT_TABLES.items():
+            select = sqlalchemy.select(
+                table.c.notes_id.label("note_id"),
+                sqlalchemy.literal(key).label("key"),
+                parent_id.label("parent_id")
+            )
+            if note_id is not None:
+                select = select.where(table.c.notes_id == note_id)
+            selects.append(select)
+
+        parent_ids: Dict[int, Dict[str, List[int]]] = {}
+        for row in session.execute(sqlalchemy.union_all(*selects)):
+            parent_ids.setdefault(
+                row.note_id, {key: [] for key in self.PARENT_TABLES}
+            )[row.key].append(row.parent_id)
+        return parent_ids
+
+    def _page_query(self, session, page_request, eager):
+        query = session.query(Note)
+        if eager:
+            query = query.options(orm.joinedload(Note.note_type))
+            if self.include_parents:
+                query = query.options(
+                    orm.selectinload(Note.project_sources),
+                    orm.selectinload(Note.object_sources),
+                    orm.selectinload(Note.item_source),
+                )
+        return apply_page_request(
+            query,
+            page_request,
+            fields=self.LIST_FIELDS,
+            primary_key=Note.id
+        )
+
+    def _serialize_record(self, record):
+        if not self.include_parents:
+            return dict(record.serialize())
+        return self._serialize_note(record)
+
+    def _serialize_note(
+            self,
+            note: Note,
+            parent_ids: Optional[Mapping[int, Mapping[str, List[int]]]] = None
+    ) -> Dict[str, Any]:
+        note_data = dict(note.serialize())
+        if not self.include_parents:
+            return note_data
+
+        if parent_ids is not None:
+            for key in self.PARENT_TABLES:
+                note_data[key] = list(
+                    parent_ids.get(note.id, {}).get(key, [])
+                )
+            return note_data
+
+        note_data['parent_project_ids'] = [
+            project.id for project in note.project_sources
+        ]
+
+        note_data['parent_object_ids'] = [
+            obj.id for obj in note.object_sources
+        ]
+
+        note_data['parent_item_ids'] = [
+            obj.table_id for obj in note.item_source
+        ]
+        return note_data
+
     def list_types(self):
         session = self.session_maker()
         try:
@@ -2140,7 +2704,7 @@ def enum_getter(session: orm.Session, enum_name: str) -> List[TykoEnumData]:
     data_type: schema.formats.EnumTable = getattr(schema.formats, enum_name)
     return [
         {
-            "id": item.table_id,
-            "name": item.name
-        } for item in session.query(data_type).all()
+            "id": row["table_id"],
+            "name": row["name"]
+        } for row in enum_cache.cache.rows(session, data_type)
     ]
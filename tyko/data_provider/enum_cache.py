@@ -0,0 +1,154 @@
+"""Keep the contents of small lookup tables in memory.
+
+Tables such as the format types, note types, project statuses and the
+enumerated values of the formats hardly ever change but are read for almost
+every page. Their rows are cached per database engine. An entry is dropped
+when a session that wrote to its table commits, which covers every change
+made through the data connectors. Entries also expire after a time to live,
+so changes made by other processes are picked up eventually.
+"""
+import threading
+import time
+import weakref
+from typing import Any, Dict, List, Optional, Set, Type
+
+import sqlalchemy
+from sqlalchemy import orm
+
+from tyko.schema import AVTables
+
+__all__ = ["EnumCache", "cache", "configure"]
+
+DEFAULT_TTL = 300.0
+
+_CHANGED_TABLES_KEY = "tyko_enum_cache_changed_tables"
+
+
+class EnumCache:
+    """Rows of lookup tables, cached per engine and table."""
+
+    def __init__(self, ttl: Optional[float] = DEFAULT_TTL) -> None:
+        """Create an empty cache.
+
+        Args:
+            ttl: Seconds an entry is used before the table is read again.
+                None keeps entries until they are invalidated and 0 turns
+                the cache off.
+
+        """
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        # engine -> table name -> (expiry time, rows)
+        self._entries: weakref.WeakKeyDictionary = \
+            weakref.WeakKeyDictionary()
+
+    def rows(
+            self,
+            session: orm.Session,
+            table_class: Type[AVTables]
+    ) -> List[Dict[str, Any]]:
+        """Get the column values of every row of a table.
+
+        Rows are dictionaries keyed by attribute name, ordered by primary
+        key.
+        """
+        mapper = sqlalchemy.inspect(table_class)
+        bind = session.get_bind()
+        table_name = mapper.local_table.name
+        now = time.monotonic()
+        with self._lock:
+            expires, rows = \
+                self._entries.get(bind, {}).get(table_name, (0.0, None))
+        if rows is not None and (self.ttl is None or now < expires):
+            return rows
+
+        keys = [attribute.key for attribute in mapper.column_attrs]
+        rows = [
+            dict(zip(keys, values))
+            for values in session.query(
+                *[getattr(table_class, key) for key in keys]
+            ).order_by(*mapper.primary_key)
+        ]
+        if self.ttl != 0:
+            expires = now + self.ttl if self.ttl is not None else 0.0
+            with self._lock:
+                self._entries.setdefault(bind, {})[table_name] = \
+                    (expires, rows)
+        return rows
+
+    def instances(
+            self,
+            session: orm.Session,
+            table_class: Type[AVTables]
+    ) -> List[Any]:
+        """Get every row of a table as detached ORM objects.
+
+        Each call creates new objects, so callers are free to attach them to
+        a session of their own.
+        """
+        manager = sqlalchemy.inspect(table_class).class_manager
+        results = []
+        for row in self.rows(session, table_class):
+            instance = manager.new_instance()
+            for key, value in row.items():
+                setattr(instance, key, value)
+            orm.make_transient_to_detached(instance)
+            results.append(instance)
+        return results
+
+    def invalidate(self, bind, table_names) -> None:
+        """Drop the cached rows of the given tables of an engine."""
+        with self._lock:
+            entries = self._entries.get(bind)
+            if entries is None:
+                return
+            for table_name in table_names:
+                entries.pop(table_name, None)
+
+    def clear(self) -> None:
+        """Drop everything."""
+        with self._lock:
+            self._entries.clear()
+
+
+cache = EnumCache()
+
+
+def configure(ttl: Optional[float]) -> None:
+    """Set the time to live of the shared cache."""
+    cache.ttl = ttl
+    cache.clear()
+
+
+def _pending_tables(session: orm.Session) -> Set[str]:
+    return session.info.setdefault(_CHANGED_TABLES_KEY, set())
+
+
+def _after_flush(session: orm.Session, _) -> None:
+    table_names = _pending_tables(session)
+    for instance in [*session.new, *session.dirty, *session.deleted]:
+        mapper = sqlalchemy.inspect(instance).mapper
+        table_names.update(table.name for table in mapper.tables)
+
+
+def _after_bulk_change(context) -> None:
+    _pending_tables(context.session).update(
+        table.name for table in context.mapper.tables
+    )
+
+
+def _after_commit(session: orm.Session) -> None:
+    table_names = session.info.pop(_CHANGED_TABLES_KEY, None)
+    if table_names:
+        cache.invalidate(session.get_bind(), table_names)
+
+
+def _after_rollback(session: orm.Session) -> None:
+    session.info.pop(_CHANGED_TABLES_KEY, None)
+
+
+sqlalchemy.event.listen(orm.Session, "after_flush", _after_flush)
+sqlalchemy.event.listen(orm.Session, "after_bulk_update", _after_bulk_change)
+sqlalchemy.event.listen(orm.Session, "after_bulk_delete", _after_bulk_change)
+sqlalchemy.event.listen(orm.Session, "after_commit", _after_commit)
+sqlalchemy.event.listen(orm.Session, "after_rollback", _after_rollback)
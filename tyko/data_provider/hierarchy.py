@@ -0,0 +1,115 @@
+"""Check that nested ids in a route belong to each other."""
+from typing import Optional
+
+from sqlalchemy import orm
+
+from tyko.schema import CollectionObject, InstantiationFile, Treatment
+from tyko.schema.formats import AVFormat, item_has_notes_table
+from tyko.schema.objects import object_has_notes_table
+from tyko.schema.projects import project_has_notes_table
+
+__all__ = ["HierarchyValidator"]
+
+
+class HierarchyValidator:
+    """Check project, object, item and file membership with one query."""
+
+    def __init__(self, session_maker: orm.sessionmaker) -> None:
+        self.session_maker = session_maker
+
+    def exists(
+            self,
+            project_id: int,
+            object_id: int,
+            item_id: Optional[int] = None,
+            file_id: Optional[int] = None,
+            note_id: Optional[int] = None,
+            treatment_id: Optional[int] = None
+    ) -> bool:
+        """Check that each record given belongs to the one before it.
+
+        Args:
+            project_id: Project the object belongs to.
+            object_id: Object in the project.
+            item_id: Item of the object.
+            file_id: File of the item.
+            note_id: Note of the item.
+            treatment_id: Treatment of the item.
+
+        Returns:
+            True if all of the records exist and are related.
+
+        """
+        if item_id is None and \
+                any(child_id is not None
+                    for child_id in [file_id, note_id, treatment_id]):
+            raise ValueError("Files, notes and treatments need an item id")
+
+        session = self.session_maker()
+        try:
+            query = session.query(CollectionObject.id).filter(
+                CollectionObject.id == object_id,
+                CollectionObject.project_id == project_id
+            )
+            if item_id is not None:
+                query = query.join(
+                    AVFormat, AVFormat.object_id == CollectionObject.id
+                ).filter(AVFormat.table_id == item_id)
+
+            if file_id is not None:
+                query = query.join(
+                    InstantiationFile,
+                    InstantiationFile.item_id == AVFormat.table_id
+                ).filter(InstantiationFile.file_id == file_id)
+
+            if note_id is not None:
+                query = query.join(
+                    item_has_notes_table,
+                    item_has_notes_table.c.item_id == AVFormat.table_id
+                ).filter(item_has_notes_table.c.notes_id == note_id)
+
+            if treatment_id is not None:
+                query = query.join(
+                    Treatment, Treatment.item_id == AVFormat.table_id
+                ).filter(Treatment.id == treatment_id)
+
+            return session.query(query.exists()).scalar()
+        finally:
+            session.close()
+
+    def has_note(
+            self,
+            project_id: int,
+            note_id: int,
+            object_id: Optional[int] = None
+    ) -> bool:
+        """Check that a note belongs to the project, or to its object.
+
+        Args:
+            project_id: Project the note or the object belongs to.
+            note_id: Note of the project, or of the object if given.
+            object_id: Object in the project.
+
+        Returns:
+            True if the note exists and is attached to the record.
+
+        """
+        session = self.session_maker()
+        try:
+            if object_id is None:
+                query = session.query(project_has_notes_table).filter(
+                    project_has_notes_table.c.project_id == project_id,
+                    project_has_notes_table.c.notes_id == note_id
+                )
+            else:
+                query = session.query(CollectionObject.id).join(
+                    object_has_notes_table,
+                    object_has_notes_table.c.object_id == CollectionObject.id
+                ).filter(
+                    CollectionObject.id == object_id,
+                    CollectionObject.project_id == project_id,
+                    object_has_notes_table.c.notes_id == note_id
+                )
+            return session.query(query.exists()).scalar()
+        finally:
+            session.close()
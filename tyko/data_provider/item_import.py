@@ -0,0 +1,255 @@
+"""Add many items to an object at once.
+
+Every row is checked before anything is written. Enumerated values are
+resolved from lookup tables loaded once for the whole import, and all the
+items are inserted in a single transaction.
+"""
+import csv
+import dataclasses
+import io
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple, Type
+
+import sqlalchemy
+from sqlalchemy import orm
+
+from tyko import utils
+from tyko.exceptions import ImportFailed
+from tyko.schema import CollectionObject, formats
+
+__all__ = ["ItemImporter", "read_csv_rows"]
+
+# Fields every kind of item has
+COMMON_FIELDS = {
+    "name",
+    "format",
+    "format_id",
+    "barcode",
+    "obj_sequence",
+    "inspection_date",
+    "transfer_date",
+}
+
+
+def read_csv_rows(text: str) -> List[Dict[str, Any]]:
+    """Read the rows of a CSV file with a header line."""
+    return [dict(row) for row in csv.DictReader(io.StringIO(text))]
+
+
+@dataclasses.dataclass
+class _NewItem:
+    format_class: Type[formats.AVFormat]
+    values: Dict[str, Any]
+
+
+class _EnumLookup:
+    """Enumerated values of the tables used by an import, by name and id."""
+
+    def __init__(self, session: orm.Session) -> None:
+        self._session = session
+        self._tables: Dict[Type[Any], Dict[str, int]] = {}
+
+    def resolve(self, enum_class, value) -> int:
+        if enum_class not in self._tables:
+            by_name = {}
+            for table_id, name in self._session.query(
+                    enum_class.table_id, enum_class.name
+            ):
+                by_name[str(table_id)] = table_id
+                if name is not None:
+                    by_name[name.strip().lower()] = table_id
+            self._tables[enum_class] = by_name
+
+        try:
+            return self._tables[enum_class][str(value).strip().lower()]
+        except KeyError as error:
+            raise ValueError(
+                f"{value} is not a valid {enum_class.__tablename__}"
+            ) from error
+
+
+class ItemImporter:
+    """Create the items of an object from a list of rows."""
+
+    def __init__(self, session_maker: orm.sessionmaker) -> None:
+        self.session_maker = session_maker
+
+    def import_items(
+            self,
+            object_id: int,
+            rows: Iterable[Mapping[str, Any]]
+    ) -> List[int]:
+        """Add items to an object.
+
+        Args:
+            object_id: Object the items belong to.
+            rows: Field names mapped to values, one mapping per item. The
+                format is given by name with "format" or by id with
+                "format_id". Enumerated details of a format can be given by
+                name or by id.
+
+        Returns:
+            Ids of the new items, in the order of the rows.
+
+        Raises:
+            ImportFailed: One or more rows are invalid. Nothing was added.
+
+        """
+        session = self.session_maker()
+        try:
+            if session.query(CollectionObject.id).filter(
+                    CollectionObject.id == object_id
+            ).one_or_none() is None:
+                raise ImportFailed(
+                    [{"row": None,
+                      "message": f"No object with id {object_id}"}]
+                )
+
+            format_lookup = self._format_lookup(session)
+            enum_lookup = _EnumLookup(session)
+            new_items: List[_NewItem] = []
+            errors = []
+            for row_number, row in enumerate(rows, start=1):
+                try:
+                    new_items.append(
+                        self._validate_row(row, format_lookup, enum_lookup)
+                    )
+                except (ValueError, TypeError, AttributeError) as error:
+                    errors.append({"row": row_number, "message": str(error)})
+            if errors:
+                raise ImportFailed(errors)
+            if not new_items:
+                raise ImportFailed([{"row": None, "message": "No rows"}])
+
+            created = [
+                new_item.format_class(object_id=object_id, **new_item.values)
+                for new_item in new_items
+            ]
+            session.add_all(created)
+            session.commit()
+            return [item.table_id for item in created]
+        except sqlalchemy.exc.IntegrityError as error:
+            session.rollback()
+            raise ImportFailed(
+                [{"row": None, "message": str(error.orig)}]
+            ) from error
+        finally:
+            session.close()
+
+    @staticmethod
+    def _format_lookup(
+            session: orm.Session
+    ) -> Dict[str, Tuple[int, Type[formats.AVFormat]]]:
+        classes = {
+            format_id: format_class[0]
+            for format_id, *format_class in formats.format_types.values()
+            if format_class
+        }
+        lookup = {}
+        for format_id, name in session.query(
+                formats.FormatTypes.id, formats.FormatTypes.name
+        ):
+            format_class = classes.get(format_id, formats.CollectionItem)
+            lookup[str(format_id)] = (format_id, format_class)
+            lookup[name.strip().lower()] = (format_id, format_class)
+        return lookup
+
+    def _validate_row(
+            self,
+            row: Mapping[str, Any],
+            format_lookup: Mapping[str, Tuple[int, Type[formats.AVFormat]]],
+            enum_lookup: _EnumLookup
+    ) -> _NewItem:
+        for key, value in row.items():
+            # Lists and objects of a JSON row are not values of a field
+            if value is not None and \
+                    not isinstance(value, (str, int, float)):
+                raise ValueError(f"{key} must be text or a number")
+        row = {
+            key: value for key, value in row.items()
+            if value is not None and str(value).strip() != ""
+        }
+        if "name" not in row:
+            raise ValueError("Missing name")
+
+        format_key = row.get("format", row.get("format_id"))
+        if format_key is None:
+            raise ValueError("Missing format")
+        try:
+            format_id, format_class = \
+                format_lookup[str(format_key).strip().lower()]
+        except KeyError as error:
+            raise ValueError(f"{format_key} is not a valid format") from error
+
+        values: Dict[str, Any] = {
+            "name": str(row["name"]),
+            "format_type_id": format_id,
+            "barcode":
+                str(row["barcode"]) if "barcode" in row else None,
+        }
+        if "obj_sequence" in row:
+            values["obj_sequence"] = int(row["obj_sequence"])
+        for date_field in ["inspection_date", "transfer_date"]:
+            if date_field in row:
+                if not isinstance(row[date_field], str):
+                    raise ValueError(f"{date_field} must be a date as text")
+                values[date_field] = \
+                    utils.create_precision_datetime(row[date_field])
+
+        details = {
+            key: value for key, value in row.items()
+            if key not in COMMON_FIELDS
+        }
+        values.update(
+            self._format_details(format_class, details, enum_lookup)
+        )
+        return _NewItem(format_class, values)
+
+    @staticmethod
+    def _format_details(
+            format_class: Type[formats.AVFormat],
+            details: Mapping[str, Any],
+            enum_lookup: _EnumLookup
+    ) -> Dict[str, Any]:
+        mapper = sqlalchemy.inspect(format_class)
+        values: Dict[str, Any] = {}
+        for key, value in details.items():
+            relationship = mapper.relationships.get(key)
+            if relationship is not None and \
+                    relationship.parent is mapper and \
+                    relationship.direction is orm.MANYTOONE and \
+                    issubclass(relationship.mapper.class_, formats.EnumTable):
+                foreign_key, = relationship.local_columns
+                values[mapper.get_property_by_column(foreign_key).key] = \
+                    enum_lookup.resolve(relationship.mapper.class_, value)
+                continue
+
+            column = _detail_column(mapper, key)
+            if column is None:
+                raise ValueError(
+                    f"{key} is not a field of {mapper.local_table.name}"
+                )
+            if isinstance(column.type, sqlalchemy.Date):
+                precision = utils.identify_precision(str(value))
+                values[key] = \
+                    utils.create_precision_datetime(str(value), precision)
+                if f"{key}_precision" in mapper.columns:
+                    values[f"{key}_precision"] = precision
+            elif isinstance(column.type, sqlalchemy.Boolean):
+                values[key] = str(value).strip().lower() in \
+                    ["1", "true", "yes", "y"]
+            elif isinstance(column.type, sqlalchemy.Integer):
+                values[key] = int(value)
+            elif isinstance(column.type, sqlalchemy.String):
+                values[key] = str(value)
+            else:
+                values[key] = value
+        return values
+
+
+def _detail_column(mapper, key: str) -> Optional[sqlalchemy.Column]:
+    column = mapper.columns.get(key)
+    if column is None or column.table is not mapper.local_table:
+        return None
+    if column.primary_key or column.foreign_keys:
+        return None
+    return column
@@ -0,0 +1,179 @@
+"""Build list payloads from column values instead of ORM objects.
+
+A list requested with only some of its fields is read with a query for just
+the columns of those fields. No ORM instances are created for the rows and
+nothing is added to the identity map, which makes long lists much cheaper
+to build than serializing every record with its relationships.
+"""
+import dataclasses
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, \
+    Tuple
+
+from sqlalchemy import orm
+
+from tyko import utils
+from tyko.schema import CollectionObject, FormatTypes, Project, \
+    ProjectStatus
+from tyko.schema.formats import AVFormat
+
+__all__ = ["ReadField", "ReadModel", "ITEMS", "OBJECTS", "PROJECTS"]
+
+
+def _value(value: Any) -> Any:
+    return value
+
+
+def _date(value: Any) -> Optional[str]:
+    return utils.serialize_precision_datetime(value) \
+        if value is not None else None
+
+
+def _format(format_id: Optional[int],
+            name: Optional[str]) -> Optional[Dict[str, Any]]:
+    # Same as FormatTypes.serialize()
+    return {"id": format_id, "name": name} if format_id is not None else None
+
+
+@dataclasses.dataclass(frozen=True)
+class ReadField:
+    """Field of a list payload and the columns it is built from.
+
+    Attributes:
+        columns: Columns read for the field.
+        build: Creates the value of the field from the values of the
+            columns, in the same format as the serialize() of the record.
+        join: Table outer joined to read the columns, with the ON clause.
+    """
+
+    columns: Tuple[Any, ...]
+    build: Callable[..., Any] = _value
+    join: Optional[Tuple[Any, Any]] = None
+
+
+class ReadModel:
+    """Fields of a list that can be read as plain column values."""
+
+    def __init__(self,
+                 entity: Any,
+                 primary_key_field: str,
+                 fields: Mapping[str, ReadField]) -> None:
+        self.entity = entity
+        self.primary_key_field = primary_key_field
+        self.fields = fields
+
+    @property
+    def primary_key(self):
+        return self.fields[self.primary_key_field].columns[0]
+
+    def field_names(self, requested: Sequence[str]) -> List[str]:
+        """Check the requested fields.
+
+        The primary key is always included, since the cursor of the next
+        page is made from it.
+
+        Raises:
+            ValueError: A field is not part of the list.
+
+        """
+        unknown = [name for name in requested if name not in self.fields]
+        if unknown:
+            raise ValueError(
+                f"Unknown field(s) {', '.join(unknown)}. Valid fields are "
+                f"{', '.join(self.fields)}"
+            )
+        names = [self.primary_key_field]
+        for name in requested:
+            if name not in names:
+                names.append(name)
+        return names
+
+    def query(self, session: orm.Session,
+              field_names: Sequence[str]) -> orm.Query:
+        """Query the columns of the given fields, in order."""
+        columns = []
+        joins = []
+        for name in field_names:
+            field = self.fields[name]
+            columns.extend(field.columns)
+            if field.join is not None and field.join not in joins:
+                joins.append(field.join)
+        query = session.query(*columns).select_from(self.entity)
+        for target, on_clause in joins:
+            query = query.outerjoin(target, on_clause)
+        return query
+
+    def serializer(
+            self,
+            field_names: Sequence[str]
+    ) -> Callable[[Sequence[Any]], Dict[str, Any]]:
+        """Get a function turning a row of query() into a payload."""
+        slices = []
+        start = 0
+        for name in field_names:
+            field = self.fields[name]
+            end = start + len(field.columns)
+            slices.append((name, field.build, start, end))
+            start = end
+
+        def serialize(row: Sequence[Any]) -> Dict[str, Any]:
+            return {
+                name: build(*row[start:end])
+                for name, build, start, end in slices
+            }
+        return serialize
+
+
+ITEMS = ReadModel(
+    AVFormat,
+    "item_id",
+    {
+        "item_id": ReadField((AVFormat.table_id,)),
+        "name": ReadField((AVFormat.name,)),
+        "barcode": ReadField((AVFormat.barcode,)),
+        "obj_sequence": ReadField((AVFormat.obj_sequence,)),
+        "parent_object_id": ReadField((AVFormat.object_id,)),
+        "format_id": ReadField((AVFormat.format_type_id,)),
+        "format": ReadField(
+            (FormatTypes.id, FormatTypes.name),
+            build=_format,
+            join=(FormatTypes, FormatTypes.id == AVFormat.format_type_id)
+        ),
+        "inspection_date": ReadField(
+            (AVFormat.inspection_date,), build=_date
+        ),
+        "transfer_date": ReadField((AVFormat.transfer_date,), build=_date),
+    }
+)
+
+OBJECTS = ReadModel(
+    CollectionObject,
+    "object_id",
+    {
+        "object_id": ReadField((CollectionObject.id,)),
+        "name": ReadField((CollectionObject.name,)),
+        "barcode": ReadField((CollectionObject.barcode,)),
+        "collection_id": ReadField((CollectionObject.collection_id,)),
+        "parent_project_id": ReadField((CollectionObject.project_id,)),
+        "originals_rec_date": ReadField(
+            (CollectionObject.originals_rec_date,), build=_date
+        ),
+        "originals_return_date": ReadField(
+            (CollectionObject.originals_return_date,), build=_date
+        ),
+    }
+)
+
+PROJECTS = ReadModel(
+    Project,
+    "project_id",
+    {
+        "project_id": ReadField((Project.id,)),
+        "project_code": ReadField((Project.project_code,)),
+        "current_location": ReadField((Project.current_location,)),
+        "status": ReadField(
+            (ProjectStatus.name,),
+            join=(ProjectStatus, ProjectStatus.id == Project.status_id)
+        ),
+        "title": ReadField((Project.title,)),
+    }
+)
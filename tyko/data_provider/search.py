@@ -0,0 +1,185 @@
+"""Full-text search over the names and text of the catalog.
+
+The index searched is kept by tyko.search_index. Hits are completed with
+the ids of the projects, objects and items they belong to.
+"""
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import sqlalchemy
+from sqlalchemy import orm
+
+from tyko.schema import CollectionObject, InstantiationFile, Note, Project
+from tyko.schema.formats import AVFormat, item_has_notes_table
+from tyko.schema.objects import object_has_notes_table
+from tyko.schema.projects import project_has_notes_table
+from tyko.search_index import DEFAULT_LIMIT, RECORD_TYPES, get_index, \
+    split_key
+
+__all__ = ["SearchConnector"]
+
+
+class SearchConnector:
+    """Search the catalog and find where each hit belongs."""
+
+    def __init__(self, session_maker: orm.sessionmaker) -> None:
+        self.session_maker = session_maker
+
+    def search(
+            self,
+            text: str,
+            record_types: Optional[Sequence[str]] = None,
+            limit: int = DEFAULT_LIMIT,
+            offset: int = 0
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """Find the records containing every word of a text.
+
+        Args:
+            text: Words to search for. Each also matches longer words
+                starting with it.
+            record_types: Only find these types of records. Any of note,
+                item, object, project and file.
+            limit: Maximum number of hits to return.
+            offset: Number of hits to skip.
+
+        Returns:
+            Hits of the page, best first, and the number of hits. Hits have
+            the ids of their parent projects, objects and items.
+
+        """
+        for record_type in record_types or []:
+            if record_type not in RECORD_TYPES:
+                raise ValueError(f"Unable to search for {record_type}")
+
+        session = self.session_maker()
+        try:
+            connection = session.connection()
+            index = get_index(connection)
+            if index is None:
+                raise ValueError("This database has no search index")
+            rows, total = index.search(
+                connection, text, record_types, limit, offset
+            )
+
+            ids_by_type: Dict[str, List[int]] = {}
+            for key, _, _ in rows:
+                record_type, record_id = split_key(key)
+                ids_by_type.setdefault(record_type, []).append(record_id)
+            parents: Dict[Tuple[str, int], Dict[str, List[int]]] = {}
+            for record_type, record_ids in ids_by_type.items():
+                for record_id, record_parents in _PARENT_FINDERS[
+                    record_type
+                ](session, record_ids).items():
+                    parents[(record_type, record_id)] = record_parents
+        finally:
+            session.close()
+
+        hits = []
+        for key, content, score in rows:
+            record_type, record_id = split_key(key)
+            record_parents = parents.get((record_type, record_id))
+            if record_parents is None:
+                # The record was removed without the index knowing
+                continue
+            hits.append({
+                "type": record_type,
+                "id": record_id,
+                "text": content,
+                "score": score,
+                **record_parents
+            })
+        return hits, total
+
+
+def _parent_ids(project_ids=(), object_ids=(), item_ids=()):
+    return {
+        "parent_project_ids": [i for i in project_ids if i is not None],
+        "parent_object_ids": [i for i in object_ids if i is not None],
+        "parent_item_ids": [i for i in item_ids if i is not None],
+    }
+
+
+def _note_parents(session: orm.Session, note_ids: List[int]):
+    found: Dict[int, Dict[str, List[int]]] = {
+        note_id: _parent_ids()
+        for note_id, in session.query(Note.id).filter(Note.id.in_(note_ids))
+    }
+    for table, parent_column, key in [
+        (project_has_notes_table, "project_id", "parent_project_ids"),
+        (object_has_notes_table, "object_id", "parent_object_ids"),
+        (item_has_notes_table, "item_id", "parent_item_ids"),
+    ]:
+        for note_id, parent_id in session.execute(
+                sqlalchemy.select(table.c.notes_id, table.c[parent_column])
+                .where(table.c.notes_id.in_(note_ids))
+        ):
+            if note_id in found:
+                found[note_id][key].append(parent_id)
+    return found
+
+
+def _item_parents(session: orm.Session, item_ids: List[int]):
+    return {
+        item_id: _parent_ids([project_id], [object_id])
+        for item_id, object_id, project_id in session.execute(
+            sqlalchemy.select(
+                AVFormat.table_id,
+                AVFormat.object_id,
+                CollectionObject.project_id
+            )
+            .outerjoin(
+                CollectionObject,
+                CollectionObject.id == AVFormat.object_id
+            )
+            .where(AVFormat.table_id.in_(item_ids))
+        )
+    }
+
+
+def _object_parents(session: orm.Session, object_ids: List[int]):
+    return {
+        object_id: _parent_ids([project_id])
+        for object_id, project_id in session.execute(
+            sqlalchemy.select(CollectionObject.id, CollectionObject.project_id)
+            .where(CollectionObject.id.in_(object_ids))
+        )
+    }
+
+
+def _project_parents(session: orm.Session, project_ids: List[int]):
+    return {
+        project_id: _parent_ids()
+        for project_id, in session.execute(
+            sqlalchemy.select(Project.id).where(Project.id.in_(project_ids))
+        )
+    }
+
+
+def _file_parents(session: orm.Session, file_ids: List[int]):
+    return {
+        file_id: _parent_ids([project_id], [object_id], [item_id])
+        for file_id, item_id, object_id, project_id in session.execute(
+            sqlalchemy.select(
+                InstantiationFile.file_id,
+                InstantiationFile.item_id,
+                AVFormat.object_id,
+                CollectionObject.project_id
+            )
+            .outerjoin(
+                AVFormat, AVFormat.table_id == InstantiationFile.item_id
+            )
+            .outerjoin(
+                CollectionObject,
+                CollectionObject.id == AVFormat.object_id
+            )
+            .where(InstantiationFile.file_id.in_(file_ids))
+        )
+    }
+
+
+_PARENT_FINDERS = {
+    "note": _note_parents,
+    "item": _item_parents,
+    "object": _object_parents,
+    "project": _project_parents,
+    "file": _file_parents,
+}
@@ -0,0 +1,160 @@
+"""Track changes to tables so clients can cache what they have already read.
+
+Every transaction committed by the sessions of a tracked session factory adds
+one to the version of each table it wrote to. The versions are written once,
+right before the commit, so the rows of the versions table are only locked
+for as long as it takes to commit. The versions of the tables a response is
+built from are enough to tell whether it changed, without fetching or
+serializing anything.
+"""
+import hashlib
+from typing import Any, Iterable, FrozenSet, Dict, Set, Type
+
+import sqlalchemy
+from sqlalchemy import orm
+
+from tyko.schema import TableVersion, AVTables
+
+__all__ = ["tables_for", "get_versions", "make_etag", "bump", "track"]
+
+_IGNORED_TABLES = {TableVersion.__tablename__, "alembic_version"}
+
+# Tables written to by the transaction of a session, in Session.info
+_CHANGED_TABLES_KEY = "tyko_changed_tables"
+
+
+def tables_for(*classes: Type[AVTables]) -> FrozenSet[str]:
+    """Get the tables the serialized data of the given classes comes from.
+
+    This includes the tables of every subclass, the association tables of
+    their relationships and the tables of the records they refer to.
+    """
+    table_names: Set[str] = set()
+    for class_ in classes:
+        for mapper in sqlalchemy.inspect(class_).self_and_descendants:
+            table_names.update(table.name for table in mapper.tables)
+            for relationship in mapper.relationships:
+                if relationship.secondary is not None:
+                    table_names.add(relationship.secondary.name)
+                if relationship.direction is orm.MANYTOONE:
+                    table_names.update(
+                        table.name for table in relationship.mapper.tables
+                    )
+    return frozenset(table_names)
+
+
+def get_versions(
+        session: orm.Session,
+        table_names: Iterable[str]
+) -> Dict[str, int]:
+    """Read the current version of the given tables."""
+    return dict(
+        session.query(TableVersion.table_name, TableVersion.version)
+        .filter(TableVersion.table_name.in_(list(table_names)))
+    )
+
+
+def make_etag(key: str, versions: Dict[str, int]) -> str:
+    """Create an entity tag from the versions of the tables read."""
+    data = ";".join(
+        f"{table_name}={versions[table_name]}"
+        for table_name in sorted(versions)
+    )
+    return hashlib.sha256(
+        bytes(f"{key}|{data}", encoding="utf-8")
+    ).hexdigest()
+
+
+def bump(connection, table_names: Iterable[str]) -> None:
+    """Add one to the version of the given tables."""
+    table_names = set(table_names) - _IGNORED_TABLES
+    if not table_names:
+        return
+    versions_table = TableVersion.__table__
+    updated = connection.execute(
+        versions_table.update()
+        .where(versions_table.c.table_name.in_(table_names))
+        .values(version=versions_table.c.version + 1)
+    )
+    if updated.rowcount == len(table_names):
+        return
+
+    # Tables without a version yet start at 1
+    existing = {
+        row.table_name for row in connection.execute(
+            sqlalchemy.select(versions_table.c.table_name)
+            .where(versions_table.c.table_name.in_(table_names))
+        )
+    }
+    missing = table_names - existing
+    if missing:
+        connection.execute(
+            versions_table.insert(),
+            [
+                {"table_name": table_name, "version": 1}
+                for table_name in sorted(missing)
+            ]
+        )
+
+
+def _changed_tables(session: orm.Session) -> Set[str]:
+    table_names: Set[str] = set()
+    for instance in [*session.new, *session.dirty, *session.deleted]:
+        mapper = sqlalchemy.inspect(instance).mapper
+        table_names.update(table.name for table in mapper.tables)
+        for relationship in mapper.relationships:
+            if relationship.secondary is not None:
+                table_names.add(relationship.secondary.name)
+    return table_names
+
+
+def _pending_tables(session: orm.Session) -> Set[str]:
+    return session.info.setdefault(_CHANGED_TABLES_KEY, set())
+
+
+def _after_flush(session: orm.Session, _) -> None:
+    _pending_tables(session).update(_changed_tables(session))
+
+
+def _after_bulk_change(context) -> None:
+    _pending_tables(context.session).update(
+        table.name for table in context.mapper.tables
+    )
+
+
+def _before_commit(session: orm.Session) -> None:
+    # The changes still pending are otherwise flushed after this event
+    session.flush()
+    table_names = session.info.pop(_CHANGED_TABLES_KEY, None)
+    if table_names:
+        bump(session.connection(), table_names)
+
+
+def _after_rollback(session: orm.Session) -> None:
+    session.info.pop(_CHANGED_TABLES_KEY, None)
+
+
+_LISTENERS = [
+    ("after_flush", _after_flush),
+    ("after_bulk_update", _after_bulk_change),
+    ("after_bulk_delete", _after_bulk_change),
+    ("before_commit", _before_commit),
+    ("after_rollback", _after_rollback),
+]
+
+
+def track(session_factory: Any) -> None:
+    """Count the changes committed by the sessions of a session factory.
+
+    Sessions made by other factories, which may be bound to databases
+    without a versions table, are left alone.
+
+    Args:
+        session_factory: sessionmaker or scoped_session making the sessions.
+
+    """
+    for identifier, listener in _LISTENERS:
+        if not sqlalchemy.event.contains(
+                session_factory, identifier, listener
+        ):
+            sqlalchemy.event.listen(session_factory, identifier, listener)
@@ -1,5 +1,6 @@
 """Manage the database."""
 
+import hashlib
 import sys
 import itertools
 import typing
@@ -12,7 +13,8 @@ from typing import (
     Union,
     Mapping,
     cast,
-    Iterable
+    Iterable,
+    Set
 )
 from flask_sqlalchemy import SQLAlchemy
 import sqlalchemy
@@ -22,7 +24,7 @@ from sqlalchemy.orm.session import sessionmaker
 
 import tyko.schema.avtables
 
-from tyko import schema
+from tyko import schema, search_index
 from .schema import formats
 from .schema import notes
 from .schema import projects
@@ -33,6 +35,16 @@ if typing.TypedDict:
 db = SQLAlchemy()
 TykoEnumData = TypedDict('TykoEnumData', {'name': str, 'id': int})
 
+# Expected values of a table of enumerated values with hardcoded ids, by name
+ExpectedTableData = Mapping[
+    str,
+    Union[
+        Tuple[int, Any],
+        Tuple[int, Type[AVFormat]],
+        Tuple[int]
+    ]
+]
+
 
 def alembic_table_exists(engine) -> bool:
     """Check for alembic table."""
@@ -106,45 +118,70 @@ def _create_sample_collection(
     return new_collection
 
 
+ENUM_TABLE_CLASSES: List[Type[formats.EnumTable]] = [
+    formats.OpenReelSubType,
+    formats.OpenReelReelWidth,
+    formats.OpenReelReelDiameter,
+    formats.OpenReelReelThickness,
+    formats.OpenReelBase,
+    formats.OpenReelReelWind,
+    formats.OpenReelSpeed,
+    formats.OpenReelTrackConfiguration,
+    formats.OpenReelGeneration,
+    formats.OpticalType,
+    formats.VideoCassetteType,
+    formats.VideoCassetteGenerations,
+    formats.GroovedDiscDiscDiameter,
+    formats.GroovedDiscDiscMaterial,
+    formats.GroovedDiscPlaybackDirection,
+    formats.GroovedDiscDiscBase,
+    formats.GroovedDiscPlaybackSpeed,
+    formats.FilmFilmSpeed,
+    formats.FilmFilmGauge,
+    formats.FilmFilmBase,
+    formats.FilmSoundtrack,
+    formats.FilmColor,
+    formats.FilmImageType,
+    formats.FilmWind,
+    formats.FilmEmulsion,
+    formats.AudioCassetteSubtype,
+    formats.AudioCassetteGeneration
+
+]
+
+STARTING_PROJECT_STATUSES = ['In Progress', "Complete", "No Work Done"]
+
+# Name of the row of the schema_fingerprint table written by init_database()
+STARTUP_FINGERPRINT = "startup"
+
+
+def _missing_names(
+        session: sqlalchemy.orm.Session,
+        name_column: Any,
+        expected_names: Iterable[str]
+) -> List[str]:
+    """Get the expected names that are not in a table yet.
+
+    The names in the table are read with one query and compared in memory.
+    """
+    existing = {name for (name,) in session.query(name_column)}
+    missing: List[str] = []
+    for name in expected_names:
+        if name not in existing and name not in missing:
+            missing.append(name)
+    return missing
+
+
 def _get_enum_tables(
         session: sqlalchemy.orm.Session
 ) -> Iterable[formats.EnumTable]:
-    enum_table_classes: List[Type[formats.EnumTable]] = [
-        formats.OpenReelSubType,
-        formats.OpenReelReelWidth,
-        formats.OpenReelReelDiameter,
-        formats.OpenReelReelThickness,
-        formats.OpenReelBase,
-        formats.OpenReelReelWind,
-        formats.OpenReelSpeed,
-        formats.OpenReelTrackConfiguration,
-        formats.OpenReelGeneration,
-        formats.OpticalType,
-        formats.VideoCassetteType,
-        formats.VideoCassetteGenerations,
-        formats.GroovedDiscDiscDiameter,
-        formats.GroovedDiscDiscMaterial,
-        formats.GroovedDiscPlaybackDirection,
-        formats.GroovedDiscDiscBase,
-        formats.GroovedDiscPlaybackSpeed,
-        formats.FilmFilmSpeed,
-        formats.FilmFilmGauge,
-        formats.FilmFilmBase,
-        formats.FilmSoundtrack,
-        formats.FilmColor,
-        formats.FilmImageType,
-        formats.FilmWind,
-        formats.FilmEmulsion,
-        formats.AudioCassetteSubtype,
-        formats.AudioCassetteGeneration
-
-    ]
-    for enum_table_class in enum_table_classes:
-        for new_type_name in enum_table_class.default_values:
-            if session.query(
-                enum_table_class
-            ).filter_by(name=new_type_name).first() is None:
-                yield enum_table_class(name=new_type_name)
+    for enum_table_class in ENUM_TABLE_CLASSES:
+        for new_type_name in _missing_names(
+                session,
+                enum_table_class.name,
+                enum_table_class.default_values
+        ):
+            yield enum_table_class(name=new_type_name)
 
 
 def create_samples(engine: sqlalchemy.engine.Engine) -> None:
@@ -189,12 +226,6 @@ def init_database(engine: sqlalchemy.engine.Engine) -> None:
 
     session.commit()
 
-    for i in session.query(notes.NoteTypes):
-        session.delete(i)
-
-    for i in session.query(formats.FormatTypes):
-        session.delete(i)
-
     session.add_all(
         itertools.chain(
             _iter_format_types_table(session),
@@ -203,53 +234,231 @@ def init_database(engine: sqlalchemy.engine.Engine) -> None:
             _iter_starting_project_status(
                 session,
                 project_status_table=projects.ProjectStatus
-            )
+            ),
+            _iter_table_versions(session)
         )
     )
 
     session.commit()
     session.close()
 
+    search_index.create_index(engine)
+
     if not validate_tables(engine):
         raise IOError("Newly created database is invalid")
 
     if not validate_enumerated_tables(engine):
         raise IOError("Table data has changed")
 
+    _record_startup_fingerprint(engine)
+
+
+def startup_fingerprint() -> str:
+    """Fingerprint of what init_database() sets up.
+
+    It covers the schema version, the tables and columns of the schema and
+    the enumerated values added to them.
+    """
+    parts = [schema.ALEMBIC_VERSION]
+    for table in sorted(
+            tyko.schema.avtables.AVTables.metadata.tables.values(),
+            key=lambda table: table.name
+    ):
+        # init_database() adds alembic_version to the metadata when the
+        # database does not have it yet
+        if table.name == "alembic_version":
+            continue
+        columns = ",".join(sorted(column.name for column in table.columns))
+        parts.append(f"table {table.name}({columns})")
+
+    for (format_type, format_metadata) in sorted(formats.format_types.items()):
+        parts.append(f"format_types {format_type}={format_metadata[0]}")
+
+    for (note_type, note_metadata) in sorted(notes.note_types.items()):
+        parts.append(f"note_types {note_type}={note_metadata[0]}")
+
+    parts.append(f"project_status {','.join(STARTING_PROJECT_STATUSES)}")
+
+    for enum_table_class in ENUM_TABLE_CLASSES:
+        parts.append(
+            f"{enum_table_class.__tablename__} "
+            f"{','.join(enum_table_class.default_values)}"
+        )
+
+    return hashlib.sha256(
+        bytes("\n".join(parts), encoding="utf-8")
+    ).hexdigest()
+
+
+def database_is_current(engine: sqlalchemy.engine.Engine) -> bool:
+    """Check if init_database() already set up the database as it is now.
+
+    This only reads the fingerprint recorded by the last init_database(), so
+    it is cheap enough to check every time the application starts.
+    """
+    if not sqlalchemy.inspect(engine).has_table(
+            schema.SchemaFingerprint.__tablename__
+    ):
+        return False
+    session = sessionmaker(bind=engine)()
+    try:
+        recorded = session.query(
+            schema.SchemaFingerprint.fingerprint
+        ).filter(
+            schema.SchemaFingerprint.name == STARTUP_FINGERPRINT
+        ).scalar()
+    finally:
+        session.close()
+    return recorded == startup_fingerprint()
+
+
+def _record_startup_fingerprint(engine: sqlalchemy.engine.Engine) -> None:
+    session = sessionmaker(bind=engine)()
+    try:
+        session.merge(
+            schema.SchemaFingerprint(
+                name=STARTUP_FINGERPRINT,
+                fingerprint=startup_fingerprint()
+            )
+        )
+        session.commit()
+    finally:
+        session.close()
+
+
+def _iter_table_versions(
+        session: sqlalchemy.orm.Session
+) -> Iterable[schema.TableVersion]:
+    existing_versions = {
+        table_name for (table_name,) in
+        session.query(schema.TableVersion.table_name)
+    }
+    for table_name in tyko.schema.avtables.AVTables.metadata.tables.keys():
+        if table_name in ["alembic_version", "table_versions"]:
+            continue
+        if table_name not in existing_versions:
+            yield schema.TableVersion(table_name=table_name, version=0)
+
 
 def _iter_note_type_table(
         session: sqlalchemy.orm.Session
 ) -> Iterable[notes.NoteTypes]:
-    for (note_type, note_metadata) in notes.note_types.items():
-        if session.query(notes.NoteTypes).filter_by(
-                name=note_type
-        ).first() is None:
-            yield notes.NoteTypes(name=note_type, id=note_metadata[0])
+    return _iter_fixed_id_table(session, notes.NoteTypes, notes.note_types)
 
 
 def _iter_starting_project_status(
         session: sqlalchemy.orm.Session,
         project_status_table: Type[projects.ProjectStatus]
 ) -> Iterable[projects.ProjectStatus]:
-    statuses = ['In Progress', "Complete", "No Work Done"]
-    for status in statuses:
-        if session.query(
-                project_status_table
-        ).filter_by(name=status).first() is None:
-            yield project_status_table(name=status)
+    for status in _missing_names(
+            session,
+            project_status_table.name,
+            STARTING_PROJECT_STATUSES
+    ):
+        yield project_status_table(name=status)
 
 
 def _iter_format_types_table(
         session: sqlalchemy.orm.Session
 ) -> Iterable[formats.FormatTypes]:
+    return _iter_fixed_id_table(
+        session, formats.FormatTypes, formats.format_types
+    )
+
+
+def _iter_fixed_id_table(
+        session: sqlalchemy.orm.Session,
+        sql_table_type: Type[AVTables],
+        expected_table: ExpectedTableData
+) -> Iterable[AVTables]:
+    """Make a table of enumerated values with hardcoded ids match them.
 
-    for (format_type, format_metadata) in formats.format_types.items():
-        if session.query(
-            formats.FormatTypes
-        ).filter_by(
-            name=format_type,
-        ).first() is None:
-            yield formats.FormatTypes(name=format_type, id=format_metadata[0])
+    The table is read with one query. Any drift from the expected values is
+    reported, rows with another name than expected for their id are renamed
+    and rows with an unknown id are removed, unless other records still refer
+    to them. Those are kept with a warning.
+
+    Yields:
+        New rows for the ids missing from the table.
+
+    """
+    expected_names = {
+        metadata[0]: name for (name, metadata) in expected_table.items()
+    }
+    rows = session.query(sql_table_type).all()
+    for message in _enumerated_table_drift(
+            ((row.id, row.name) for row in rows), expected_table
+    ):
+        print(message, file=sys.stderr)
+
+    in_use = _referenced_ids(
+        session,
+        sql_table_type,
+        [row.id for row in rows if row.id not in expected_names]
+    )
+    existing_ids = set()
+    for row in rows:
+        expected_name = expected_names.get(row.id)
+        if expected_name is None:
+            if row.id in in_use:
+                print(f"Warning: Type {row.name} with id {row.id} is not "
+                      f"removed because it is still in use.",
+                      file=sys.stderr)
+            else:
+                session.delete(row)
+            continue
+        existing_ids.add(row.id)
+        if row.name != expected_name:
+            row.name = expected_name
+
+    for (table_id, name) in expected_names.items():
+        if table_id not in existing_ids:
+            yield sql_table_type(id=table_id, name=name)
+
+
+def _referenced_ids(
+        session: sqlalchemy.orm.Session,
+        sql_table_type: Type[AVTables],
+        ids: List[int]
+) -> Set[int]:
+    """Find which of the ids are referred to by a foreign key of a table."""
+    if not ids:
+        return set()
+    referenced: Set[int] = set()
+    table = sql_table_type.__table__
+    for other_table in table.metadata.tables.values():
+        for foreign_key in other_table.foreign_keys:
+            if not foreign_key.references(table):
+                continue
+            column = foreign_key.parent
+            referenced.update(
+                value for value, in session.query(column)
+                .filter(column.in_(ids))
+                .distinct()
+            )
+    return referenced
+
+
+def _enumerated_table_drift(
+        rows: Iterable[Tuple[int, str]],
+        expected_table: ExpectedTableData
+) -> List[str]:
+    """Describe how the id and name of each row differ from the expected."""
+    messages = []
+    for (table_id, name) in rows:
+        expected_item = expected_table.get(name)
+
+        if expected_item is None:
+            messages.append(f"Type {name} with id {table_id} is not expected.")
+            continue
+
+        expected_id = expected_item[0]
+
+        if expected_id != table_id:
+            messages.append(f"Type {name} does not match expected id. "
+                            f"expected {expected_id}. "
+                            f"got {table_id}.")
+    return messages
 
 
 def validate_enumerated_tables(engine: sqlalchemy.engine.Engine) -> bool:
@@ -284,40 +493,38 @@ def validate_enumerated_tables(engine: sqlalchemy.engine.Engine) -> bool:
 def validate_enumerate_table_data(
         engine: sqlalchemy.engine.Engine,
         sql_table_type: Type[AVTables],
-        expected_table: Mapping[
-            str,
-            Union[
-                Tuple[int, Any],
-                Tuple[int, Type[AVFormat]],
-                Tuple[int]
-            ]
-        ]
+        expected_table: ExpectedTableData
 ) -> bool:
     """Validate enumerated table data."""
     session = sessionmaker(bind=engine)()
-    valid = True
-
-    for table_entry in session.query(sql_table_type):
-        expected_item = expected_table.get(table_entry.name)
-
-        if expected_item is None:
-            return False
-
-        expected_id = expected_item[0]
-
-        if expected_id != table_entry.id:
-            print(f"Type {table_entry.name} does not match expected id. "
-                  f"expected {expected_id}. "
-                  f"got {table_entry.id}.",
-                  file=sys.stderr)
-            valid = False
+    try:
+        rows = session.query(sql_table_type.id, sql_table_type.name).all()
+        expected_ids = {metadata[0] for metadata in expected_table.values()}
+
+        # Unknown rows still in use are kept on purpose by init_database()
+        in_use = _referenced_ids(
+            session,
+            sql_table_type,
+            [row.id for row in rows if row.id not in expected_ids]
+        )
+        drift = _enumerated_table_drift(
+            ((row.id, row.name) for row in rows if row.id not in in_use),
+            expected_table
+        )
+    finally:
+        session.close()
 
-    session.close()
-    return valid
+    for message in drift:
+        print(message, file=sys.stderr)
+    return not drift
 
 
 def validate_tables(engine: sqlalchemy.engine.Engine) -> bool:
-    """Validate all required tables exist."""
+    """Validate all required tables exist.
+
+    The tables of the search index are not part of the schema and are
+    ignored.
+    """
     tables_to_discard = [
         "alembic_version"
     ]
@@ -332,7 +539,8 @@ def validate_tables(engine: sqlalchemy.engine.Engine) -> bool:
     existing_tables = {
         table_name for table_name in
         sqlalchemy.inspect(engine).get_table_names()
-        if table_name not in tables_to_discard
+        if table_name not in tables_to_discard and
+        not search_index.is_index_table(table_name)
     }
     for table in existing_tables:
         if table not in expected_table_names:
@@ -345,4 +553,46 @@ def validate_tables(engine: sqlalchemy.engine.Engine) -> bool:
         missing_tables = ",".join(expected_table_names)
         print(f"Missing tables [{missing_tables}]")
         valid = False
+
+    # A missing index only makes the database slower, so it is not invalid
+    for table_name, index_name, column_names in missing_indexes(engine):
+        print(f"Missing index {index_name} on "
+              f"{table_name}({', '.join(column_names)}). "
+              f"Run the database migrations to add it.",
+              file=sys.stderr)
     return valid
+
+
+def missing_indexes(
+        engine: sqlalchemy.engine.Engine
+) -> List[Tuple[str, str, List[str]]]:
+    """Find the indexes of the schema that the database does not have.
+
+    An index counts as there when an index or primary key of the database
+    starts with the same columns, whatever its name.
+
+    Returns:
+        Table name, index name and column names of each missing index.
+
+    """
+    inspector = sqlalchemy.inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    missing = []
+    for table in tyko.schema.avtables.AVTables.metadata.sorted_tables:
+        if table.name not in existing_tables or not table.indexes:
+            continue
+        existing_columns = [
+            index['column_names'] for index in
+            inspector.get_indexes(table.name)
+        ]
+        existing_columns.append(
+            inspector.get_pk_constraint(table.name)['constrained_columns']
+        )
+        for index in sorted(table.indexes, key=lambda index: index.name):
+            column_names = [column.name for column in index.columns]
+            if not any(
+                    columns[:len(column_names)] == column_names
+                    for columns in existing_columns
+            ):
+                missing.append((table.name, index.name, column_names))
+    return missing
@@ -29,3 +29,17 @@ class NoTable(DataError):
 
 class NotValidRequest(DataError):
     pass
+
+
+class ImportFailed(NotValidRequest):
+    """Rows of an import were rejected. Nothing was added."""
+
+    def __init__(self, errors, *args, **kwargs):
+        super().__init__(
+            *args,
+            message="Unable to import rows",
+            status_code=400,
+            payload={"errors": errors},
+            **kwargs
+        )
+        self.errors = errors
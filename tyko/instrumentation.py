@@ -0,0 +1,140 @@
+"""Measure the database work done by each request.
+
+Instrumentation is opt-in with the TYKO_SQL_INSTRUMENTATION configuration
+value. When enabled, every response gets a Server-Timing header with the
+number of statements executed, the rows they returned or changed and the
+time spent in the database, and the same numbers are logged. For streamed
+responses the header only covers the work done before the body is sent,
+while the log line covers the whole request.
+"""
+import dataclasses
+import time
+
+import flask
+import sqlalchemy
+
+from tyko.schema.avtables import AVTables
+
+__all__ = ["QueryStats", "init_app", "current_stats"]
+
+_STATS_KEY = "tyko_query_stats"
+_START_TIMES_KEY = "tyko_query_start_times"
+
+
+@dataclasses.dataclass
+class QueryStats:
+    """Database activity of a single request."""
+
+    statements: int = 0
+    rows: int = 0
+    duration: float = 0.0
+
+    def server_timing(self) -> str:
+        """Format the statistics as a Server-Timing header value."""
+        return f'db;dur={self.duration * 1000:.2f};' \
+               f'desc="{self.statements} queries, {self.rows} rows"'
+
+
+def current_stats():
+    """Get the statistics of the request being handled, if any."""
+    if not flask.has_request_context():
+        return None
+    return flask.g.get(_STATS_KEY)
+
+
+def _before_cursor_execute(conn, _cursor, _statement, _parameters, context,
+                           *_):
+    # Keyed by execution, so a statement that fails does not leave a start
+    # time behind for the next statement on the connection to pick up
+    conn.info.setdefault(_START_TIMES_KEY, {})[id(context)] = \
+        time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, _statement, _parameters, context,
+                          *_):
+    start_time = conn.info[_START_TIMES_KEY].pop(id(context))
+    stats = current_stats()
+    if stats is None:
+        return
+    stats.statements += 1
+    stats.duration += time.perf_counter() - start_time
+
+    # Rows read are counted as they are loaded by the ORM. The row count of
+    # a SELECT is not reported by every driver.
+    if cursor.rowcount > 0 and cursor.description is None:
+        stats.rows += cursor.rowcount
+
+
+def _handle_error(exception_context) -> None:
+    conn = exception_context.connection
+    if conn is not None:
+        conn.info.get(_START_TIMES_KEY, {}).pop(
+            id(exception_context.execution_context), None
+        )
+
+
+def _on_load(*_):
+    stats = current_stats()
+    if stats is not None:
+        stats.rows += 1
+
+
+def _start_request():
+    flask.g.setdefault(_STATS_KEY, QueryStats())
+
+
+def _finish_request(response: flask.Response) -> flask.Response:
+    stats = current_stats()
+    if stats is None:
+        return response
+
+    response.headers.add("Server-Timing", stats.server_timing())
+
+    logger = flask.current_app.logger
+    method = flask.request.method
+    path = flask.request.path
+
+    def log_stats():
+        logger.info(
+            "sql method=%s path=%s status=%d queries=%d rows=%d "
+            "duration_ms=%.2f",
+            method,
+            path,
+            response.status_code,
+            stats.statements,
+            stats.rows,
+            stats.duration * 1000
+        )
+
+    if response.is_streamed:
+        # Most of the work of a streamed response happens after the headers
+        # are sent. The log line has the totals once the body is written.
+        response.call_on_close(log_stats)
+    else:
+        log_stats()
+    return response
+
+
+def init_app(app: flask.Flask, engine: sqlalchemy.engine.Engine) -> None:
+    """Collect the query statistics of every request handled by the app.
+
+    Args:
+        app: Flask application to add the Server-Timing header to.
+        engine: Engine used by the application to access the database.
+
+    """
+    if not sqlalchemy.event.contains(
+            engine, "before_cursor_execute", _before_cursor_execute
+    ):
+        sqlalchemy.event.listen(
+            engine, "before_cursor_execute", _before_cursor_execute
+        )
+        sqlalchemy.event.listen(
+            engine, "after_cursor_execute", _after_cursor_execute
+        )
+        sqlalchemy.event.listen(engine, "handle_error", _handle_error)
+    if not sqlalchemy.event.contains(AVTables, "load", _on_load):
+        sqlalchemy.event.listen(AVTables, "load", _on_load, propagate=True)
+
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
@@ -1,31 +1,166 @@
 # pylint: disable=redefined-builtin, invalid-name
 from __future__ import annotations
 import abc
-import hashlib
-import json
 import sys
 import traceback
 import typing
-from typing import List, Dict, Any, Iterator, Mapping
+from typing import List, Dict, Any, Iterator, Mapping, FrozenSet
 
 import flask
 from flask import jsonify, make_response, abort, request, url_for
 
 import tyko.data_provider
-from . import pbcore
-from .exceptions import DataError
+from tyko.data_provider.table_versions import tables_for
+from . import database, pbcore, schema, search_index
+from .exceptions import DataError, ImportFailed
 from .views import files
 
 CACHE_HEADER = "private, max-age=0"
 
 if typing.TYPE_CHECKING:
     from sqlalchemy import orm
-    from tyko import schema
+
+
+def get_page_request(args) -> tyko.data_provider.PageRequest:
+    """Read the paging, sorting and filtering options of a list request.
+
+    Supported query string parameters are ``limit``, ``offset``, ``sort``
+    (prefix the field with "-" for descending order), ``filter`` in the
+    form of ``<field>:<value>`` which can be repeated, and ``after`` with
+    the cursor returned as ``next`` by the previous page.
+    """
+    filters = {}
+    for filter_arg in args.getlist("filter"):
+        field_name, separator, value = filter_arg.partition(":")
+        if not separator:
+            raise ValueError(
+                f"Invalid filter {filter_arg}. Expected <field>:<value>"
+            )
+        filters[field_name] = value
+
+    limit = args.get("limit")
+    offset = args.get("offset")
+    page_request = tyko.data_provider.PageRequest(
+        limit=int(limit) if limit else None,
+        offset=int(offset) if offset else 0,
+        sort=args.get("sort") or None,
+        filters=filters,
+        after=args.get("after")
+    )
+    if page_request.offset < 0 or \
+            (page_request.limit is not None and page_request.limit < 0):
+        raise ValueError("limit and offset cannot be negative")
+    return page_request
+
+
+def get_fields(args) -> typing.Optional[List[str]]:
+    """Read the fields requested for the records of a list.
+
+    ``fields`` is a comma separated list of field names, and can be
+    repeated. Without it, records are serialized in full.
+    """
+    if "fields" not in args:
+        return None
+    return [
+        name.strip()
+        for fields_arg in args.getlist("fields")
+        for name in fields_arg.split(",")
+        if name.strip()
+    ]
+
+
+def add_next_cursor(
+        data: Dict[str, Any],
+        page_request: tyko.data_provider.PageRequest,
+        records: List[Mapping[str, Any]],
+        key: str
+) -> None:
+    """Add the cursor of the following page to a list response.
+
+    A cursor is only given when the page is full and in primary key order.
+    """
+    if page_request.sort or not page_request.limit:
+        return
+    if len(records) < page_request.limit:
+        return
+    data["next"] = tyko.data_provider.encode_cursor(records[-1][key])
+
+
+def not_modified_response(etag: str) -> flask.Response:
+    response = make_response("", 304)
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = CACHE_HEADER
+    return response
+
+
+def stream_list_response(
+        key: str,
+        records: Iterator[Mapping[str, Any]],
+        total: int,
+        etag: typing.Optional[str] = None
+) -> flask.Response:
+    """Write a list response as its records are read from the database.
+
+    The body is the same JSON document as a regular list response, encoded
+    one record at a time so the list is never held in memory all at once.
+    The status has been sent by the time the records are read. If reading
+    them fails, the document ends with an "error" member in place of
+    "total", so clients can tell the list is incomplete.
+    """
+    def generate() -> Iterator[str]:
+        yield f"{{{flask.json.dumps(key)}: ["
+        try:
+            for index, record in enumerate(records):
+                yield ("," if index else "") + flask.json.dumps(record)
+        except Exception:  # pylint: disable=broad-except
+            traceback.print_exc(file=sys.stderr)
+            yield '], "error": "Unable to read all of the records"}'
+            return
+        yield f'], "total": {total}}}'
+
+    response = flask.Response(
+        flask.stream_with_context(generate()),
+        mimetype="application/json"
+    )
+    if etag is not None:
+        response.set_etag(etag)
+    response.headers["Cache-Control"] = CACHE_HEADER
+    return response
+
+
+def pbcore_archive_response(
+        data_provider: tyko.data_provider.DataProvider,
+        parent,
+        parent_id: int
+) -> flask.Response:
+    """Send the PBCore documents of a project or collection as a ZIP file.
+
+    The file is written while it is sent.
+    """
+    try:
+        archive = pbcore.create_pbcore_archive(
+            data_provider,
+            parent,
+            parent_id,
+            workers=flask.current_app.config.get("TYKO_PBCORE_WORKERS", 1)
+        )
+    except DataError as error:
+        return make_response(error.message, error.status_code)
+
+    response = flask.Response(archive, mimetype="application/zip")
+    response.headers["Content-Disposition"] = \
+        f'attachment; filename="{parent.__tablename__}-{parent_id}' \
+        f'-pbcore.zip"'
+    return response
 
 
 class AbsMiddlewareEntity(metaclass=abc.ABCMeta):
     WRITABLE_FIELDS: List[str] = []
 
+    # Tables the serialized list is read from. Any change to them changes
+    # the entity tag of the list.
+    ETAG_TABLES: FrozenSet[str] = frozenset()
+
     @classmethod
     def field_can_edit(cls, field) -> bool:
         return field in cls.WRITABLE_FIELDS
@@ -33,6 +168,19 @@ class AbsMiddlewareEntity(metaclass=abc.ABCMeta):
     def __init__(self, data_provider) -> None:
         self._data_provider = data_provider
 
+    def list_etag(self) -> str:
+        """Get the entity tag of the requested list without reading it."""
+        session = self._data_provider.db_session_maker()
+        try:
+            versions = tyko.data_provider.table_versions.get_versions(
+                session, self.ETAG_TABLES
+            )
+        finally:
+            session.close()
+        return tyko.data_provider.table_versions.make_etag(
+            request.full_path, versions
+        )
+
     @abc.abstractmethod
     def get(self, serialize=False, **kwargs):
         """Add a new entity"""
@@ -101,18 +249,45 @@ class ObjectMiddlewareEntity(AbsMiddlewareEntity):
             tyko.data_provider.ObjectDataConnector(
                 data_provider.db_session_maker
             )
+        self._hierarchy = tyko.data_provider.HierarchyValidator(
+            data_provider.db_session_maker
+        )
+
+    def in_project(self, project_id: int, object_id: int) -> bool:
+        """Check that an object is part of the project."""
+        return self._hierarchy.exists(project_id, object_id)
+
+    def has_note(self, project_id: int, object_id: int, note_id: int) -> bool:
+        """Check that a note belongs to an object of the project."""
+        return self._hierarchy.has_note(project_id, note_id, object_id)
 
     def get(self, serialize=False, **kwargs) -> flask.Response:
         if "id" in kwargs:
             return self.object_by_id(id=kwargs["id"])
 
-        objects = self._data_connector.get(serialize=serialize)
+        if not serialize:
+            return self._data_connector.get(serialize=False)
+
+        try:
+            page_request = get_page_request(request.args)
+            fields = get_fields(request.args)
+            if page_request.limit is None:
+                return stream_list_response(
+                    "objects",
+                    *self._data_connector.iter_page(page_request, fields)
+                )
+            objects, total_objects = self._data_connector.get_page(
+                page_request, serialize=True, fields=fields
+            )
+        except ValueError as reason:
+            return make_response(f"Invalid request. Reason: {reason}", 400)
 
         if serialize:
             data = {
                 "objects": objects,
-                "total": len(objects)
+                "total": total_objects
             }
+            add_next_cursor(data, page_request, objects, "object_id")
             return make_response(jsonify(data), 200)
 
         return objects
@@ -208,6 +383,32 @@ class ObjectMiddlewareEntity(AbsMiddlewareEntity):
             "url": url_for("api.object", object_id=new_object_id)
         })
 
+    def import_items(self, object_id: int) -> flask.Response:
+        """Add the items of a JSON array or a CSV file to an object."""
+        if request.mimetype == "text/csv":
+            rows = tyko.data_provider.read_csv_rows(
+                request.get_data(as_text=True)
+            )
+        else:
+            rows = request.get_json(silent=True)
+            if not isinstance(rows, list) or \
+                    not all(isinstance(row, dict) for row in rows):
+                return make_response(
+                    "Invalid request. Expected a JSON array of items", 400
+                )
+        importer = tyko.data_provider.ItemImporter(
+            self._data_provider.db_session_maker
+        )
+        try:
+            item_ids = importer.import_items(object_id, rows)
+        except ImportFailed as error:
+            return make_response(jsonify(error.payload), error.status_code)
+
+        return make_response(
+            jsonify({"item_ids": item_ids, "total": len(item_ids)}),
+            201
+        )
+
     def add_note(self, project_id, object_id):  # pylint: disable=W0613
         data = request.get_json()
         try:
@@ -268,6 +469,7 @@ class CollectionMiddlewareEntity(AbsMiddlewareEntity):
         "record_series",
         "department"
     ]
+    ETAG_TABLES = tables_for(schema.Collection)
 
     def __init__(self, data_provider) -> None:
         super().__init__(data_provider)
@@ -277,25 +479,44 @@ class CollectionMiddlewareEntity(AbsMiddlewareEntity):
                 data_provider.db_session_maker
             )
 
+    def pbcore_archive(self, id: int) -> flask.Response:
+        return pbcore_archive_response(
+            self._data_provider, schema.Collection, id
+        )
+
     def get(self, serialize=False, **kwargs):
         if "id" in kwargs:
             return self.collection_by_id(id=kwargs["id"])
 
-        collections = self._data_connector.get(serialize=serialize)
+        if not serialize:
+            return self._data_connector.get(serialize=False)
+
+        etag = self.list_etag()
+        if request.if_none_match.contains(etag):
+            return not_modified_response(etag)
+
+        try:
+            page_request = get_page_request(request.args)
+            if page_request.limit is None:
+                return stream_list_response(
+                    "collections",
+                    *self._data_connector.iter_page(page_request),
+                    etag=etag
+                )
+            collections, total_collections = self._data_connector.get_page(
+                page_request, serialize=True
+            )
+        except ValueError as reason:
+            return make_response(f"Invalid request. Reason: {reason}", 400)
 
         if serialize:
             data = {
                 "collections": collections,
-                "total": len((collections))
+                "total": total_collections
             }
-
-            json_data = json.dumps(data)
+            add_next_cursor(data, page_request, collections, "collection_id")
             response = make_response(jsonify(data), 200)
-
-            hash_value = \
-                hashlib.sha256(bytes(json_data, encoding="utf-8")).hexdigest()
-
-            response.headers["ETag"] = str(hash_value)
+            response.set_etag(etag)
             response.headers["Cache-Control"] = CACHE_HEADER
             return response
 
@@ -381,6 +602,12 @@ class ProjectMiddlewareEntity(AbsMiddlewareEntity):
         "status",
         "current_location"
     ]
+    ETAG_TABLES = tables_for(
+        schema.Project,
+        schema.Note,
+        schema.CollectionObject,
+        schema.formats.AVFormat
+    )
 
     def __init__(self, data_provider) -> None:
         super().__init__(data_provider)
@@ -389,6 +616,18 @@ class ProjectMiddlewareEntity(AbsMiddlewareEntity):
             tyko.data_provider.ProjectDataConnector(
                 data_provider.db_session_maker
             )
+        self._hierarchy = tyko.data_provider.HierarchyValidator(
+            data_provider.db_session_maker
+        )
+
+    def has_note(self, project_id: int, note_id: int) -> bool:
+        """Check that a note belongs to the project."""
+        return self._hierarchy.has_note(project_id, note_id)
+
+    def pbcore_archive(self, id: int) -> flask.Response:
+        return pbcore_archive_response(
+            self._data_provider, schema.Project, id
+        )
 
     def get(self, serialize=False, **kwargs):
         if "id" in kwargs:
@@ -398,29 +637,36 @@ class ProjectMiddlewareEntity(AbsMiddlewareEntity):
                 }
             )
 
-        limit = request.args.get("limit")
-        offset = request.args.get("offset")
-        projects = self._data_connector.get(serialize=serialize)
-        total_projects = len(projects)
+        if not serialize:
+            return self._data_connector.get(serialize=False)
 
-        if limit:
-            offset_value = int(offset)
-            limit_value = int(limit)
-            projects = projects[offset_value:limit_value+offset_value]
+        etag = self.list_etag()
+        if request.if_none_match.contains(etag):
+            return not_modified_response(etag)
+
+        try:
+            page_request = get_page_request(request.args)
+            fields = get_fields(request.args)
+            if page_request.limit is None:
+                return stream_list_response(
+                    "projects",
+                    *self._data_connector.iter_page(page_request, fields),
+                    etag=etag
+                )
+            projects, total_projects = self._data_connector.get_page(
+                page_request, serialize=True, fields=fields
+            )
+        except ValueError as reason:
+            return make_response(f"Invalid request. Reason: {reason}", 400)
 
         if serialize:
             data = {
                 "projects": projects,
                 "total": total_projects
             }
+            add_next_cursor(data, page_request, projects, "project_id")
             response = make_response(jsonify(data), 200)
-
-            hash_value = \
-                hashlib.sha256(
-                    bytes(json.dumps(data), encoding="utf-8")
-                ).hexdigest()
-
-            response.headers["ETag"] = str(hash_value)
+            response.set_etag(etag)
             response.headers["Cache-Control"] = CACHE_HEADER
             return response
 
@@ -669,6 +915,12 @@ class ItemMiddlewareEntity(AbsMiddlewareEntity):
         "obj_sequence",
         "files"
     ]
+    ETAG_TABLES = tables_for(
+        schema.formats.AVFormat,
+        schema.Note,
+        schema.InstantiationFile,
+        schema.Treatment
+    )
 
     def __init__(self, data_provider) -> None:
         super().__init__(data_provider)
@@ -677,25 +929,58 @@ class ItemMiddlewareEntity(AbsMiddlewareEntity):
             tyko.data_provider.ItemDataConnector(
                 data_provider.db_session_maker
             )
+        self._hierarchy = tyko.data_provider.HierarchyValidator(
+            data_provider.db_session_maker
+        )
+
+    def in_object(
+            self,
+            project_id: int,
+            object_id: int,
+            item_id: int,
+            **child_ids: int
+    ) -> bool:
+        """Check that an item, and any of its records given, are part of an
+        object of the project.
+        """
+        return self._hierarchy.exists(
+            project_id, object_id, item_id, **child_ids
+        )
 
     def get(self, serialize=False, **kwargs):
         if "id" in kwargs:
             return self.item_by_id(kwargs["id"])
 
-        items = self._data_connector.get(serialize=serialize)
+        if not serialize:
+            return self._data_connector.get(serialize=False)
+
+        etag = self.list_etag()
+        if request.if_none_match.contains(etag):
+            return not_modified_response(etag)
+
+        try:
+            page_request = get_page_request(request.args)
+            fields = get_fields(request.args)
+            if page_request.limit is None:
+                return stream_list_response(
+                    "items",
+                    *self._data_connector.iter_page(page_request, fields),
+                    etag=etag
+                )
+            items, total_items = self._data_connector.get_page(
+                page_request, serialize=True, fields=fields
+            )
+        except ValueError as reason:
+            return make_response(f"Invalid request. Reason: {reason}", 400)
+
         if serialize:
             data = {
                 "items": items,
-                "total": len(items)
+                "total": total_items
             }
-
-            json_data = json.dumps(data)
+            add_next_cursor(data, page_request, items, "item_id")
             response = make_response(jsonify(data), 200)
-
-            hash_value = \
-                hashlib.sha256(bytes(json_data, encoding="utf-8")).hexdigest()
-
-            response.headers["ETag"] = str(hash_value)
+            response.set_etag(etag)
             response.headers["Cache-Control"] = CACHE_HEADER
             return response
 
@@ -822,6 +1107,7 @@ class NotestMiddlewareEntity(AbsMiddlewareEntity):
         "text",
         "note_type_id"
     ]
+    ETAG_TABLES = tables_for(schema.Note)
 
     def __init__(self, data_provider) -> None:
         super().__init__(data_provider)
@@ -831,6 +1117,13 @@ class NotestMiddlewareEntity(AbsMiddlewareEntity):
                 data_provider.db_session_maker
             )
 
+        # Lists do not show the parents of the notes, so they are not read
+        self._list_connector = \
+            tyko.data_provider.NotesDataConnector(
+                data_provider.db_session_maker,
+                include_parents=False
+            )
+
     @staticmethod
     def resolve_parents(source: dict) -> dict:
         newone = source.copy()
@@ -863,27 +1156,37 @@ class NotestMiddlewareEntity(AbsMiddlewareEntity):
 
             return jsonify({"note": note_data})
 
-        notes = self._data_connector.get(serialize=serialize)
+        if not serialize:
+            return self._data_connector.get(serialize=False)
+
+        etag = self.list_etag()
+        if request.if_none_match.contains(etag):
+            return not_modified_response(etag)
+
+        try:
+            page_request = get_page_request(request.args)
+            if page_request.limit is None:
+                return stream_list_response(
+                    "notes",
+                    *self._list_connector.iter_page(page_request),
+                    etag=etag
+                )
+            notes, total_notes = self._list_connector.get_page(
+                page_request, serialize=True
+            )
+        except ValueError as reason:
+            return make_response(f"Invalid request. Reason: {reason}", 400)
+
         if serialize:
-            note_data = []
-            for n in notes:
-                new_data = n.copy()
-                del new_data['parent_project_ids']
-                del new_data['parent_object_ids']
-                del new_data['parent_item_ids']
-                note_data.append(new_data)
             data = {
-                "notes": note_data,
-                "total": len(note_data)
+                "notes": notes,
+                "total": total_notes
             }
-            json_data = json.dumps(data)
-            response = make_response(jsonify(data), 200)
+            add_next_cursor(data, page_request, notes, "note_id")
 
-            hash_value = \
-                hashlib.sha256(bytes(json_data, encoding="utf-8")).hexdigest()
-
-            response.headers["ETag"] = str(hash_value)
-            response.headers["Cache-Control"] = "private, max-age=0"
+            response = make_response(jsonify(data), 200)
+            response.set_etag(etag)
+            response.headers["Cache-Control"] = CACHE_HEADER
             return response
         return notes
 
@@ -933,6 +1236,99 @@ class NotestMiddlewareEntity(AbsMiddlewareEntity):
         return {"types": self._data_connector.list_types()}
 
 
+class SearchMiddleware:
+    """Full-text search over notes, items, objects, projects and files, and
+    barcode lookup of items and objects.
+    """
+
+    def __init__(self, data_provider) -> None:
+        self._data_connector = tyko.data_provider.SearchConnector(
+            data_provider.db_session_maker
+        )
+        self._barcodes = tyko.data_provider.BarcodeLookup(
+            data_provider.db_session_maker
+        )
+
+    @staticmethod
+    def _route(hit: Mapping[str, Any]) -> typing.Optional[str]:
+        record_type = hit["type"]
+        if record_type == "project":
+            return url_for("api.project", project_id=hit["id"])
+        if record_type == "object":
+            return url_for("api.object", object_id=hit["id"])
+        if record_type == "item":
+            return url_for("api.item", item_id=hit["id"])
+        if record_type == "note":
+            return url_for("api.note", note_id=hit["id"])
+        if hit["parent_item_ids"] and hit["parent_object_ids"] and \
+                hit["parent_project_ids"]:
+            return url_for(
+                "api.item_files",
+                project_id=hit["parent_project_ids"][0],
+                object_id=hit["parent_object_ids"][0],
+                item_id=hit["parent_item_ids"][0],
+                id=hit["id"]
+            )
+        return None
+
+    def search(self) -> flask.Response:
+        """Search with the words given as ``q``.
+
+        ``type`` limits the hits to one type of record and can be repeated.
+        Hits are ranked, so only ``limit`` and ``offset`` of the list
+        options apply.
+        """
+        text = request.args.get("q", "")
+        try:
+            page_request = get_page_request(request.args)
+            if page_request.sort or page_request.filters or \
+                    page_request.after:
+                raise ValueError(
+                    "Search results are sorted by rank and cannot be "
+                    "sorted, filtered or paged with a cursor"
+                )
+            hits, total = self._data_connector.search(
+                text,
+                record_types=request.args.getlist("type"),
+                limit=page_request.limit
+                if page_request.limit is not None
+                else search_index.DEFAULT_LIMIT,
+                offset=page_request.offset
+            )
+        except ValueError as reason:
+            return make_response(f"Invalid request. Reason: {reason}", 400)
+
+        return jsonify({
+            "results": [self._with_routes(hit) for hit in hits],
+            "total": total
+        })
+
+    def find_barcode(self, barcode: str) -> flask.Response:
+        """Get the items and objects with a barcode."""
+        matches = self._barcodes.find(barcode)
+        if not matches:
+            return make_response(f"No item or object with barcode {barcode}",
+                                 404)
+        return jsonify({
+            "barcode": barcode,
+            "results": [self._with_routes(match) for match in matches],
+        })
+
+    @classmethod
+    def _with_routes(cls, hit: Mapping[str, Any]) -> Dict[str, Any]:
+        result = dict(hit)
+        result["route"] = cls._route(hit)
+        result["parents"] = [
+            *[url_for("api.project", project_id=parent_id)
+              for parent_id in result.pop("parent_project_ids")],
+            *[url_for("api.object", object_id=parent_id)
+              for parent_id in result.pop("parent_object_ids")],
+            *[url_for("api.item", item_id=parent_id)
+              for parent_id in result.pop("parent_item_ids")],
+        ]
+        return result
+
+
 def get_enums(
         session_maker: orm.sessionmaker,
         enum_type: str
@@ -943,3 +1339,51 @@ def get_enums(
     finally:
         session.close()
     return jsonify(results)
+
+
+class AppMiddleware:
+    """Data provider, connectors and middleware shared by every request.
+
+    None of these keep state between calls. Each call opens a session from
+    the shared sessionmaker, which is the session of the request in apps
+    using the unit of work, so one set per app is enough.
+    """
+
+    def __init__(self, engine) -> None:
+        self.data_provider = tyko.data_provider.DataProvider(engine)
+        session_maker = self.data_provider.db_session_maker
+
+        self.formats = Middleware(self.data_provider)
+        self.collections = CollectionMiddlewareEntity(self.data_provider)
+        self.projects = ProjectMiddlewareEntity(self.data_provider)
+        self.objects = ObjectMiddlewareEntity(self.data_provider)
+        self.items = ItemMiddlewareEntity(self.data_provider)
+        self.notes = NotestMiddlewareEntity(self.data_provider)
+        self.search = SearchMiddleware(self.data_provider)
+
+        self.project_connector = \
+            tyko.data_provider.ProjectDataConnector(session_maker)
+        self.object_connector = \
+            tyko.data_provider.ObjectDataConnector(session_maker)
+        self.item_connector = \
+            tyko.data_provider.ItemDataConnector(session_maker)
+
+
+def init_app(app: flask.Flask, engine) -> AppMiddleware:
+    """Create the middleware used by the routes of an app."""
+    app_middleware = AppMiddleware(engine)
+    app.extensions["tyko"] = app_middleware
+    return app_middleware
+
+
+def get_app_middleware() -> AppMiddleware:
+    """Get the middleware of the current app.
+
+    Apps not set up with init_app get theirs created on first use.
+    """
+    app_middleware = flask.current_app.extensions.get("tyko")
+    if app_middleware is None:
+        app_middleware = init_app(
+            flask.current_app, database.db.get_engine(flask.current_app)
+        )
+    return app_middleware
@@ -1,3 +1,8 @@
-from .pbcore import create_pbcore_from_object
+from .pbcore import create_pbcore_from_object, create_pbcore_archive, \
+    iter_rendered_objects
 
-__all__ = ['create_pbcore_from_object']
+__all__ = [
+    'create_pbcore_from_object',
+    'create_pbcore_archive',
+    'iter_rendered_objects',
+]
@@ -1,55 +1,259 @@
 from __future__ import annotations
+import collections
+import concurrent.futures
+import functools
+import io
 from importlib.resources import read_text
 import typing
+from typing import Any, Dict, Iterable, Iterator, List, Sequence, Tuple, \
+    Type, Union
+import zipfile
 from jinja2 import Template
+from sqlalchemy import orm
+import sqlalchemy.exc
 
-from tyko.data_provider import ProjectDataConnector, \
-    ObjectDataConnector, FilesDataConnector
+from tyko.data_provider import loader_options
+from tyko.exceptions import DataError
+from tyko.schema import CollectionObject, Collection, Project
 
 if typing.TYPE_CHECKING:
     from tyko.data_provider import DataProvider
+    from tyko.schema import AVFormat
 
+IDENTIFIER_SOURCE = "University of Illinois at Urbana-Champaign"
 
-def resolve_project_data(
-        project_connector: ProjectDataConnector,
-        unresolved_object: dict
-):
-    project_id = unresolved_object.get("parent_project_id")
-    if project_id is None:
-        return None
-    return project_connector.get(project_id, serialize=True)
+# Number of objects read from the database at a time for an archive
+ARCHIVE_BATCH_SIZE = 100
 
+_ARCHIVE_PARENTS = {
+    Project: CollectionObject.project_id,
+    Collection: CollectionObject.collection_id,
+}
 
-def create_pbcore_from_object(object_id: int,
-                              data_provider: DataProvider) -> str:
-    template = Template(
+
+@functools.lru_cache(maxsize=None)
+def get_template() -> Template:
+    """Get the PBCore template, compiled the first time it is used."""
+    return Template(
         read_text("tyko.pbcore.templates", "pbcore.xml"),
         keep_trailing_newline=True
     )
 
-    connector = ObjectDataConnector(data_provider.db_session_maker)
-    resulting_object = connector.get(object_id, serialize=True)
-    file_connector = FilesDataConnector(data_provider.db_session_maker)
-    project_connector = ProjectDataConnector(data_provider.db_session_maker)
 
-    resulting_object['project'] = resolve_project_data(
-        project_connector, resulting_object)
+def object_context(collection_object: CollectionObject) -> Dict[str, Any]:
+    """Get the data of an object that goes into its PBCore document.
+
+    The object should be loaded with the "pbcore" loader profile, otherwise
+    every item and file is read with a query of its own.
+    """
+    project = collection_object.project
+    items = [
+        {
+            "name": item.name,
+            "notes": [note.serialize() for note in item.notes],
+            "files": [
+                item_file.serialize(recurse=True)
+                for item_file in item.files
+            ],
+        } for item in _sorted_items(collection_object.items)
+    ]
+    return {
+        "object_id": collection_object.id,
+        "name": collection_object.name,
+        "barcode": collection_object.barcode,
+        "project":
+            {"title": project.title} if project is not None else None,
+        "notes": [note.serialize() for note in collection_object.notes],
+        "items": items,
+    }
+
+
+def _sorted_items(items: List[AVFormat]) -> List[AVFormat]:
+    # Items in sequence order, followed by the ones without a sequence
+    return sorted(
+        items,
+        key=lambda item: (
+            item.obj_sequence is None,
+            item.obj_sequence or 0,
+            item.table_id
+        )
+    )
 
-    for item in resulting_object.get("items", []):
-        item['files'] = resolve_files(file_connector, item)
 
-    return template.render(
-        obj=resulting_object,
-        identifier_source="University of Illinois at Urbana-Champaign"
+def render_object(context: Dict[str, Any]) -> str:
+    """Render the PBCore document of an object from its object_context()."""
+    return get_template().render(
+        obj=context,
+        identifier_source=IDENTIFIER_SOURCE
     )
 
 
-def resolve_files(file_connector: FilesDataConnector, item):
-    # The files comibg back aren't complete, get the rest of the metadata
-    # before passing it on to the PBCore template
-    resolved_files = []
-    for item_file in item.get("files", []):
-        file_id = item_file['id']
-        res = file_connector.get(file_id, serialize=True)
-        resolved_files.append(res)
-    return resolved_files
+def create_pbcore_from_object(object_id: int,
+                              data_provider: DataProvider) -> str:
+    session = data_provider.db_session_maker()
+    try:
+        collection_object = session.query(CollectionObject)\
+            .options(*loader_options("pbcore", CollectionObject))\
+            .filter(CollectionObject.id == object_id)\
+            .one_or_none()
+
+        if collection_object is None:
+            raise DataError(message=f"Unable to find object: {object_id}")
+        context = object_context(collection_object)
+    except sqlalchemy.exc.DatabaseError as error:
+        raise DataError(
+            message=f"Unable to find object: {error}"
+        ) from error
+    finally:
+        session.close()
+
+    return render_object(context)
+
+
+def iter_object_contexts(
+        session: orm.Session,
+        object_ids: Sequence[int],
+        batch_size: int = ARCHIVE_BATCH_SIZE
+) -> Iterator[Dict[str, Any]]:
+    """Get the object_context() of many objects, reading them in batches.
+
+    Everything in a batch is loaded with the same few queries. Objects are
+    released from the session once their batch is done.
+    """
+    for start in range(0, len(object_ids), batch_size):
+        batch = session.query(CollectionObject)\
+            .options(*loader_options("pbcore", CollectionObject))\
+            .filter(
+                CollectionObject.id.in_(object_ids[start:start + batch_size])
+            )\
+            .order_by(CollectionObject.id)\
+            .all()
+        for collection_object in batch:
+            yield object_context(collection_object)
+        session.expunge_all()
+
+
+class _ArchiveBuffer(io.RawIOBase):
+    # Write only file object that hands over what was written so far, so
+    # that a ZIP file can be sent while it is being created.
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def take(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_rendered_objects(
+        contexts: Iterable[Dict[str, Any]],
+        workers: int = 1
+) -> Iterator[Tuple[int, str]]:
+    """Render the PBCore documents of many objects, in order.
+
+    Args:
+        contexts: object_context() of each object.
+        workers: Number of processes to render with. With 1 or less, the
+            documents are rendered in this process.
+
+    Yields:
+        Object id and PBCore document of each object.
+
+    """
+    if workers <= 1:
+        for context in contexts:
+            yield context["object_id"], render_object(context)
+        return
+
+    # Only a few documents per worker are in flight, so that the contexts
+    # are still read from the database a batch at a time
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+        pending: typing.Deque[Tuple[int, concurrent.futures.Future]] = \
+            collections.deque()
+        for context in contexts:
+            pending.append(
+                (context["object_id"], pool.submit(render_object, context))
+            )
+            if len(pending) >= workers * 2:
+                object_id, document = pending.popleft()
+                yield object_id, document.result()
+        while pending:
+            object_id, document = pending.popleft()
+            yield object_id, document.result()
+
+
+def iter_archive(documents: Iterable[Tuple[int, str]]) -> Iterator[bytes]:
+    """Create a ZIP file from the PBCore documents of objects.
+
+    Each document is named after its object, the same way as the
+    single object route. The file is yielded a piece at a time, after each
+    document is added.
+    """
+    buffer = _ArchiveBuffer()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for object_id, document in documents:
+            archive.writestr(f"{object_id}-pbcore.xml", document)
+            data = buffer.take()
+            if data:
+                yield data
+    yield buffer.take()
+
+
+def create_pbcore_archive(
+        data_provider: DataProvider,
+        parent: Type[Union[Project, Collection]],
+        parent_id: int,
+        workers: int = 1
+) -> Iterator[bytes]:
+    """Create a ZIP file of the PBCore documents of a project or collection.
+
+    Args:
+        data_provider: Source of the data.
+        parent: Project or Collection.
+        parent_id: Id of the project or collection.
+        workers: Number of processes to render the documents with.
+
+    Returns:
+        Contents of the ZIP file, created while it is read.
+
+    Raises:
+        DataError: There is no such project or collection.
+
+    """
+    session = data_provider.db_session_maker()
+    try:
+        if session.get(parent, parent_id) is None:
+            raise DataError(
+                message=f"Unable to find {parent.__tablename__}: {parent_id}",
+                status_code=404
+            )
+        object_ids = [
+            object_id for object_id, in session.query(CollectionObject.id)
+            .filter(_ARCHIVE_PARENTS[parent] == parent_id)
+            .order_by(CollectionObject.id)
+        ]
+    finally:
+        session.close()
+
+    def generate():
+        archive_session = data_provider.db_session_maker()
+        try:
+            yield from iter_archive(
+                iter_rendered_objects(
+                    iter_object_contexts(archive_session, object_ids),
+                    workers
+                )
+            )
+        finally:
+            archive_session.close()
+
+    return generate()
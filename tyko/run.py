@@ -1,5 +1,7 @@
+import argparse
 import sys
 import logging
+from typing import List
 
 from flask import Flask, make_response, Response
 from sqlalchemy.exc import OperationalError
@@ -7,9 +9,12 @@ from sqlalchemy.exc import OperationalError
 import tyko
 from tyko.exceptions import DataError
 import tyko.data_provider
+from tyko import data_generator, utils
 from tyko.site import site
 from tyko.api import api
-from .database import init_database, create_samples, db
+from . import instrumentation, middleware, unit_of_work
+from .database import init_database, create_samples, db, \
+    database_is_current
 from .exceptions import NoTable, NotValidRequest
 from .schema import ALEMBIC_VERSION
 
@@ -51,22 +56,119 @@ def create_app() -> Flask:
     # app.logger.info("Configuring database")
     db.init_app(app)
     engine = db.get_engine(app)
-    init_database(engine)
-    create_samples(engine)
+    middleware.init_app(app, engine)
+    unit_of_work.init_app(app)
+    tyko.data_provider.enum_cache.configure(
+        ttl=app.config.get("TYKO_ENUM_CACHE_TTL")
+    )
+    load_version(app)
+    if app.config.get("TYKO_SQL_INSTRUMENTATION"):
+        instrumentation.init_app(app, engine)
+    if app.config.get("TYKO_FAST_START") and database_is_current(engine):
+        app.logger.info("Database is up to date, skipping initialization")
+    else:
+        init_database(engine)
+        create_samples(engine)
     return app
 
 
+def load_version(app: Flask) -> None:
+    """Look up the version of the application once, when it starts."""
+    utils.version_cache.refresh = app.config.get("TYKO_VERSION_REFRESH")
+    utils.version_cache.clear()
+    try:
+        utils.version_cache.get()
+    except utils.NoValidStrategy as error:
+        app.logger.warning("Unable to find the version. Reason: %s", error)
+
+
 def page_failed_on_startup() -> Response:
     return make_response("Tyko failed during started", 503)
 
 
+def _cli_app() -> Flask:
+    my_app = Flask(__name__)
+    my_app.logger.setLevel(logging.INFO)  # pylint: disable=E1101
+    my_app.config.from_object("tyko.config.Config")
+    my_app.config.from_envvar("TYKO_SETTINGS", True)
+    db.init_app(my_app)
+    return my_app
+
+
+def generate_data_args(args: List[str]) -> argparse.Namespace:
+    """Parse the options of the generate-data command."""
+    defaults = data_generator.CatalogSize()
+    parser = argparse.ArgumentParser(
+        prog="tyko generate-data",
+        description="Add a synthetic catalog to the database for load tests"
+    )
+    parser.add_argument("--projects", type=int, default=defaults.projects)
+    parser.add_argument(
+        "--collections", type=int, default=defaults.collections)
+    parser.add_argument(
+        "--objects", type=int, default=defaults.objects_per_project,
+        help="objects per project"
+    )
+    parser.add_argument(
+        "--items-per-format", type=int, default=defaults.items_per_format,
+        help="items of each format per object"
+    )
+    parser.add_argument(
+        "--files", type=int, default=defaults.files_per_item,
+        help="files per item"
+    )
+    parser.add_argument(
+        "--annotations", type=int, default=defaults.annotations_per_file,
+        help="annotations per file"
+    )
+    parser.add_argument(
+        "--treatments", type=int, default=defaults.treatments_per_item,
+        help="treatments per item"
+    )
+    parser.add_argument(
+        "--notes", type=int, default=defaults.notes_per_record,
+        help="notes per project, object, item and file"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--batch-size", type=int, default=data_generator.DEFAULT_BATCH_SIZE,
+        help="rows written to the database at a time"
+    )
+    return parser.parse_args(args)
+
+
+def generate_data(my_app: Flask, args: argparse.Namespace) -> None:
+    """Initialize the database and add a synthetic catalog to it."""
+    engine = db.get_engine(my_app)
+    init_database(engine)
+    size = data_generator.CatalogSize(
+        projects=args.projects,
+        collections=args.collections,
+        objects_per_project=args.objects,
+        items_per_format=args.items_per_format,
+        files_per_item=args.files,
+        annotations_per_file=args.annotations,
+        treatments_per_item=args.treatments,
+        notes_per_record=args.notes
+    )
+
+    def report(done: int, total: int) -> None:
+        my_app.logger.info(  # pylint: disable=E1101
+            "Generated project %d of %d", done, total)
+
+    data_generator.generate_catalog(
+        engine,
+        size,
+        seed=args.seed,
+        batch_size=args.batch_size,
+        progress=report
+    )
+
+
 def main() -> None:
 
     if "init-db" in sys.argv:
-        my_app = Flask(__name__)
-        my_app.config.from_object("tyko.config.Config")
-        my_app.config.from_envvar("TYKO_SETTINGS", True)
-        db.init_app(my_app)
+        my_app = _cli_app()
         engine = db.get_engine(my_app)
         data_provider = tyko.data_provider.DataProvider(engine)
         my_app.logger.info("Initializing Database")  # pylint: disable=E1101
@@ -74,6 +176,12 @@ def main() -> None:
         if "--create-samples" in sys.argv:
             create_samples(data_provider.db_engine)
         sys.exit(0)
+    if "generate-data" in sys.argv:
+        args = generate_data_args(
+            sys.argv[sys.argv.index("generate-data") + 1:]
+        )
+        generate_data(_cli_app(), args)
+        sys.exit(0)
     my_app = create_app()
     if my_app is not None:
         # Run as a local program and not for production
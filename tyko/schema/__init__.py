@@ -1,6 +1,6 @@
 # pylint: disable=too-few-public-methods, invalid-name
 from sqlalchemy.orm import scoped_session, sessionmaker
-from .avtables import AVTables
+from .avtables import AVTables, index_foreign_keys
 from .projects import Project, ProjectStatus
 from .contacts import Contact
 from .collection import Collection
@@ -18,8 +18,12 @@ from .formats import \
 from .objects import CollectionObject
 from .instantiation import FileAnnotationType, InstantiationFile, \
     FileAnnotation, FileNotes
+from .table_versions import TableVersion
+from .schema_fingerprint import SchemaFingerprint
 
-ALEMBIC_VERSION: str = "d008a138763c"
+index_foreign_keys(AVTables.metadata)
+
+ALEMBIC_VERSION: str = "b7d3e5a90f12"
 
 Session = scoped_session(sessionmaker(expire_on_commit=False))
 
@@ -45,6 +49,8 @@ __all__ = [
     "OpenReel",
     "Project",
     "ProjectStatus",
+    "SchemaFingerprint",
+    "TableVersion",
     "Treatment",
     "Vendor",
     "VendorTransfer",
@@ -3,7 +3,8 @@ import datetime
 from typing import Union, List, Optional, Mapping
 
 from sqlalchemy.orm import DeclarativeMeta, declarative_base
-from sqlalchemy import Column, Date, Text, Integer, Boolean
+from sqlalchemy import Column, Date, Text, Integer, Boolean, Index, \
+    MetaData, Table
 
 
 SerializedData = \
@@ -35,3 +36,22 @@ class AVTables(declarative_base(metaclass=DeclarativeABCMeta)):
             precision: int = 3
     ):
         return date.isoformat() if isinstance(date, datetime.date) else None
+
+
+def _is_indexed(table: Table, column: Column) -> bool:
+    primary_key = list(table.primary_key.columns)
+    if primary_key and primary_key[0] is column:
+        return True
+    return any(list(index.columns)[0] is column for index in table.indexes)
+
+
+def index_foreign_keys(metadata: MetaData) -> None:
+    """Add an index to every foreign key column that does not lead one.
+
+    Unlike MySQL, SQLite does not index foreign keys by itself, so loading a
+    relationship would read the whole table.
+    """
+    for table in metadata.tables.values():
+        for column in table.columns:
+            if column.foreign_keys and not _is_indexed(table, column):
+                Index(f"ix_{table.name}_{column.name}", column)
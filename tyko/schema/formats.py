@@ -142,6 +142,11 @@ class AVFormat(AVTables, abc.ABC):
         return data
 
 
+# Barcodes are scanned to look items up. MySQL can only index the start of a
+# TEXT column.
+db.Index("ix_formats_barcode", AVFormat.barcode, mysql_length=64)
+
+
 class FormatTypes(AVTables):
     __tablename__ = "format_types"
 
@@ -39,6 +39,7 @@ class CollectionObject(AVTables):
         autoincrement=True)
 
     name = db.Column("name", db.Text)
+    barcode = db.Column("barcode", db.Text)
 
     collection_id = \
         db.Column(db.Integer, db.ForeignKey("collection.collection_id"))
@@ -63,7 +64,7 @@ class CollectionObject(AVTables):
 
         data: Dict[str, SerializedData] = {"object_id": self.id,
                                            "name": self.name,
-                                           # "barcode": self.barcode,
+                                           "barcode": self.barcode,
                                            "items": self.get_items(recurse)}
 
         if recurse is True:
@@ -146,3 +147,6 @@ class CollectionObject(AVTables):
                         if item.format_type is not None else None
                 })
         return items
+
+
+db.Index("ix_tyko_object_barcode", CollectionObject.barcode, mysql_length=64)
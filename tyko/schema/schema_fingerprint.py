@@ -0,0 +1,21 @@
+from typing import Mapping
+
+import sqlalchemy as db
+
+from tyko.schema.avtables import AVTables, SerializedData
+
+
+class SchemaFingerprint(AVTables):
+    """Fingerprint of the schema and enumerated data a database was set up
+    with."""
+
+    __tablename__ = "schema_fingerprint"
+
+    name = db.Column("name", db.String(64), primary_key=True)
+    fingerprint = db.Column("fingerprint", db.String(64), nullable=False)
+
+    def serialize(self, recurse=False) -> Mapping[str, SerializedData]:
+        return {
+            "name": self.name,
+            "fingerprint": self.fingerprint
+        }
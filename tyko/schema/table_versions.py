@@ -0,0 +1,20 @@
+from typing import Mapping
+
+import sqlalchemy as db
+
+from tyko.schema.avtables import AVTables, SerializedData
+
+
+class TableVersion(AVTables):
+    """Number of times the records of a table have been changed."""
+
+    __tablename__ = "table_versions"
+
+    table_name = db.Column("table_name", db.String(64), primary_key=True)
+    version = db.Column("version", db.Integer, nullable=False, default=0)
+
+    def serialize(self, recurse=False) -> Mapping[str, SerializedData]:
+        return {
+            "table_name": self.table_name,
+            "version": self.version
+        }
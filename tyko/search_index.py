@@ -0,0 +1,507 @@
+"""Full-text search index of the names and text of the catalog.
+
+The searchable text of notes, items, objects, projects and files is copied
+into a single index table. How the table is stored and matched depends on
+the database: an FTS5 virtual table on SQLite, a FULLTEXT index on MySQL,
+and a plain table matched with LIKE on anything else.
+
+Every session flush that adds, changes or deletes a searchable record
+updates the index in the same transaction, and so does every bulk update or
+delete of the records, so it is current for everything written through the
+ORM. The index is created, and filled from the existing records, by
+database.init_database(). Searching the index is done with
+tyko.data_provider.SearchConnector.
+"""
+import abc
+import dataclasses
+import functools
+import re
+import threading
+import weakref
+from typing import Any, Dict, Iterable, List, Mapping, Optional, \
+    Sequence, Tuple, Type
+
+import sqlalchemy
+from sqlalchemy import orm
+
+from tyko.schema import AVTables, CollectionObject, InstantiationFile, \
+    Note, Project
+from tyko.schema.formats import AVFormat
+
+__all__ = [
+    "DEFAULT_LIMIT",
+    "INDEX_TABLE",
+    "RECORD_TYPES",
+    "SOURCES",
+    "SearchIndex",
+    "create_index",
+    "get_index",
+    "index_new_records",
+    "is_index_table",
+    "rebuild",
+    "split_key",
+]
+
+INDEX_TABLE = "search_index"
+
+DEFAULT_LIMIT = 20
+
+# The record type is kept in the lowest bits of the key of an index row
+_TYPE_BITS = 3
+
+
+@dataclasses.dataclass(frozen=True)
+class _Source:
+    record_type: str
+    code: int
+    mapped_class: Type[AVTables]
+    attributes: Tuple[str, ...]
+
+    @property
+    def primary_key(self) -> sqlalchemy.Column:
+        return sqlalchemy.inspect(self.mapped_class).primary_key[0]
+
+    def key(self, record_id: int) -> int:
+        return (record_id << _TYPE_BITS) | self.code
+
+    def content(self, record: Any) -> str:
+        return " ".join(
+            str(value) for value in
+            (getattr(record, attribute) for attribute in self.attributes)
+            if value
+        )
+
+    def select_rows(self):
+        """Select the key and content of every record of the source."""
+        content = functools.reduce(
+            lambda text, more: text + " " + more,
+            [
+                sqlalchemy.func.coalesce(
+                    getattr(self.mapped_class, attribute), ""
+                ) for attribute in self.attributes
+            ]
+        )
+        return sqlalchemy.select(
+            self.primary_key * (1 << _TYPE_BITS) + self.code,
+            content
+        )
+
+
+SOURCES: Tuple[_Source, ...] = (
+    _Source("note", 1, Note, ("text",)),
+    _Source("item", 2, AVFormat, ("name", "barcode")),
+    _Source("object", 3, CollectionObject, ("name",)),
+    _Source("project", 4, Project, ("title",)),
+    _Source("file", 5, InstantiationFile, ("file_name",)),
+)
+
+_SOURCES_BY_TYPE = {source.record_type: source for source in SOURCES}
+_SOURCES_BY_CODE = {source.code: source for source in SOURCES}
+
+RECORD_TYPES: Tuple[str, ...] = tuple(_SOURCES_BY_TYPE)
+
+
+def split_key(key: int) -> Tuple[str, int]:
+    """Get the record type and the record id of the key of an index row."""
+    source = _SOURCES_BY_CODE[key & ((1 << _TYPE_BITS) - 1)]
+    return source.record_type, key >> _TYPE_BITS
+
+
+def is_index_table(table_name: str) -> bool:
+    """Check if a table belongs to the search index.
+
+    SQLite keeps an FTS5 index in a few tables of its own next to it.
+    """
+    return table_name == INDEX_TABLE or \
+        table_name.startswith(f"{INDEX_TABLE}_")
+
+
+def _terms(text: str) -> List[str]:
+    terms = re.findall(r"\w+", text)
+    if not terms:
+        raise ValueError("Nothing to search for")
+    return terms
+
+
+class SearchIndex(abc.ABC):
+    """Storage and matching of the index table for one kind of database."""
+
+    table: sqlalchemy.sql.expression.TableClause
+
+    @property
+    def key(self) -> sqlalchemy.sql.expression.ColumnClause:
+        return self.table.c[0]
+
+    @property
+    def content(self) -> sqlalchemy.sql.expression.ColumnClause:
+        return self.table.c.content
+
+    @abc.abstractmethod
+    def create(self, connection) -> None:
+        """Create the index table if it does not exist yet."""
+
+    @abc.abstractmethod
+    def match(self, terms: Sequence[str]):
+        """Get the condition of rows containing all of the terms."""
+
+    @abc.abstractmethod
+    def ranked(self, terms: Sequence[str]):
+        """Get the score of a row and the ordering of the best rows first."""
+
+    def replace(self, connection, rows: Mapping[int, str]) -> None:
+        """Write index rows, replacing the rows with the same keys."""
+        self.remove(connection, rows.keys())
+        if rows:
+            connection.execute(
+                self.table.insert(),
+                [
+                    {self.key.name: key, "content": content}
+                    for key, content in rows.items()
+                ]
+            )
+
+    def remove(self, connection, keys: Iterable[int]) -> None:
+        keys = list(keys)
+        if keys:
+            connection.execute(
+                self.table.delete().where(self.key.in_(keys))
+            )
+
+    def fill(self, connection, source: _Source, condition=None) -> None:
+        """Add the rows of the records of a source, selected in SQL."""
+        rows = source.select_rows()
+        if condition is not None:
+            rows = rows.where(condition)
+        connection.execute(
+            self.table.insert().from_select([self.key, self.content], rows)
+        )
+
+    def clear(self, connection, source: _Source) -> None:
+        connection.execute(
+            self.table.delete().where(
+                self.key % (1 << _TYPE_BITS) == source.code
+            )
+        )
+
+    def search(
+            self,
+            connection,
+            text: str,
+            record_types: Optional[Sequence[str]] = None,
+            limit: int = DEFAULT_LIMIT,
+            offset: int = 0
+    ) -> Tuple[List[Tuple[int, str, Optional[float]]], int]:
+        """Find the rows containing every word of a text, best first.
+
+        Returns:
+            Key, content and score of the rows of the page, and the number of
+            rows matching.
+
+        """
+        terms = _terms(text)
+        condition = self.match(terms)
+        if record_types:
+            condition = sqlalchemy.and_(
+                condition,
+                (self.key % (1 << _TYPE_BITS)).in_(
+                    [_SOURCES_BY_TYPE[name].code for name in record_types]
+                )
+            )
+        total = connection.execute(
+            sqlalchemy.select(sqlalchemy.func.count())
+            .select_from(self.table)
+            .where(condition)
+        ).scalar()
+
+        score, order = self.ranked(terms)
+        rows = connection.execute(
+            sqlalchemy.select(self.key, self.content, score)
+            .select_from(self.table)
+            .where(condition)
+            .order_by(order, self.key)
+            .limit(limit)
+            .offset(offset)
+        )
+        return [tuple(row) for row in rows], total
+
+
+class Fts5SearchIndex(SearchIndex):
+    """SQLite FTS5 virtual table, ranked by bm25."""
+
+    table = sqlalchemy.table(
+        INDEX_TABLE,
+        sqlalchemy.column("rowid", sqlalchemy.Integer),
+        sqlalchemy.column("content", sqlalchemy.Text),
+    )
+
+    def create(self, connection) -> None:
+        connection.execute(
+            sqlalchemy.text(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {INDEX_TABLE} "
+                f"USING fts5(content)"
+            )
+        )
+
+    def match(self, terms: Sequence[str]):
+        return sqlalchemy.literal_column(INDEX_TABLE).op("MATCH")(
+            " ".join(f'"{term}"*' for term in terms)
+        )
+
+    def ranked(self, terms: Sequence[str]):
+        # FTS5 ranks with bm25, where lower is better
+        rank = sqlalchemy.literal_column("rank")
+        return rank, rank
+
+
+class MySQLFullTextIndex(SearchIndex):
+    """Table with a MySQL FULLTEXT index, matched in boolean mode.
+
+    InnoDB leaves words shorter than its minimum token size and its
+    stopwords out of the index, so a required term of that kind would never
+    match. Those terms are matched with LIKE instead.
+    """
+
+    # Default of the innodb_ft_min_token_size server variable
+    MIN_TOKEN_SIZE = 3
+
+    # Default stopword list of InnoDB, see
+    # INFORMATION_SCHEMA.INNODB_FT_DEFAULT_STOPWORD
+    STOPWORDS = frozenset([
+        "a", "about", "an", "are", "as", "at", "be", "by", "com", "de", "en",
+        "for", "from", "how", "i", "in", "is", "it", "la", "of", "on", "or",
+        "that", "the", "this", "to", "was", "what", "when", "where", "who",
+        "will", "with", "und", "www",
+    ])
+
+    _metadata = sqlalchemy.MetaData()
+    table = sqlalchemy.Table(
+        INDEX_TABLE,
+        _metadata,
+        sqlalchemy.Column(
+            "search_key", sqlalchemy.BigInteger,
+            primary_key=True, autoincrement=False
+        ),
+        sqlalchemy.Column("content", sqlalchemy.Text),
+        sqlalchemy.Index(
+            f"ix_{INDEX_TABLE}_content", "content", mysql_prefix="FULLTEXT"
+        ),
+        mysql_engine="InnoDB",
+    )
+
+    def create(self, connection) -> None:
+        self.table.create(connection, checkfirst=True)
+
+    def _indexed(self, term: str) -> bool:
+        return len(term) >= self.MIN_TOKEN_SIZE and \
+            term.lower() not in self.STOPWORDS
+
+    def _full_text(self, terms: Sequence[str]):
+        indexed = [term for term in terms if self._indexed(term)]
+        if not indexed:
+            return None
+        return self.content.match(
+            " ".join(f"+{term}*" for term in indexed)
+        )
+
+    def match(self, terms: Sequence[str]):
+        conditions = [
+            self.content.contains(term, autoescape=True)
+            for term in terms if not self._indexed(term)
+        ]
+        full_text = self._full_text(terms)
+        if full_text is not None:
+            conditions.insert(0, full_text)
+        return sqlalchemy.and_(*conditions)
+
+    def ranked(self, terms: Sequence[str]):
+        score = self._full_text(terms)
+        if score is None:
+            return sqlalchemy.null(), self.key
+        return score, score.desc()
+
+
+class LikeSearchIndex(SearchIndex):
+    """Plain table matched with LIKE, for databases without full-text.
+
+    Every search reads the whole table and hits are not ranked.
+    """
+
+    _metadata = sqlalchemy.MetaData()
+    table = sqlalchemy.Table(
+        INDEX_TABLE,
+        _metadata,
+        sqlalchemy.Column(
+            "search_key", sqlalchemy.BigInteger,
+            primary_key=True, autoincrement=False
+        ),
+        sqlalchemy.Column("content", sqlalchemy.Text),
+    )
+
+    def create(self, connection) -> None:
+        self.table.create(connection, checkfirst=True)
+
+    def match(self, terms: Sequence[str]):
+        return sqlalchemy.and_(
+            *[
+                self.content.contains(term, autoescape=True)
+                for term in terms
+            ]
+        )
+
+    def ranked(self, terms: Sequence[str]):
+        return sqlalchemy.null(), self.key
+
+
+_INDEX_TYPES: Dict[str, Type[SearchIndex]] = {
+    "sqlite": Fts5SearchIndex,
+    "mysql": MySQLFullTextIndex,
+}
+
+_lock = threading.Lock()
+
+# engine -> index, or None if the database has no index table
+_indexes: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def _index_type(dialect_name: str) -> Type[SearchIndex]:
+    return _INDEX_TYPES.get(dialect_name, LikeSearchIndex)
+
+
+def get_index(connection) -> Optional[SearchIndex]:
+    """Get the search index of a database, if it has one."""
+    engine = connection.engine
+    with _lock:
+        if engine in _indexes:
+            return _indexes[engine]
+    index: Optional[SearchIndex] = None
+    if sqlalchemy.inspect(connection).has_table(INDEX_TABLE):
+        index = _index_type(engine.dialect.name)()
+    with _lock:
+        _indexes[engine] = index
+    return index
+
+
+def create_index(engine: sqlalchemy.engine.Engine) -> SearchIndex:
+    """Create the search index of a database.
+
+    A new index is filled from the records already in the database.
+    """
+    index = _index_type(engine.dialect.name)()
+    with engine.begin() as connection:
+        exists = sqlalchemy.inspect(connection).has_table(INDEX_TABLE)
+        index.create(connection)
+        if not exists:
+            rebuild(connection, index)
+    with _lock:
+        _indexes[engine] = index
+    return index
+
+
+def rebuild(connection,
+            index: Optional[SearchIndex] = None,
+            record_types: Optional[Iterable[str]] = None) -> None:
+    """Fill the index again from the records of the given types."""
+    index = index or get_index(connection)
+    if index is None:
+        return
+    for record_type in record_types or _SOURCES_BY_TYPE:
+        source = _SOURCES_BY_TYPE[record_type]
+        index.clear(connection, source)
+        index.fill(connection, source)
+
+
+def index_new_records(connection, first_ids: Mapping[str, int]) -> None:
+    """Add records written without the ORM to the index.
+
+    Args:
+        connection: Connection the records were written with.
+        first_ids: Table names mapped to the first primary key added. Every
+            record of the table from that key on is added.
+
+    """
+    index = get_index(connection)
+    if index is None:
+        return
+    for source in SOURCES:
+        first_id = first_ids.get(source.primary_key.table.name)
+        if first_id is not None:
+            index.fill(connection, source, source.primary_key >= first_id)
+
+
+def _source_of_class(mapped_class: type) -> Optional[_Source]:
+    for source in SOURCES:
+        if issubclass(mapped_class, source.mapped_class):
+            return source
+    return None
+
+
+def _source_of(instance) -> Optional[_Source]:
+    return _source_of_class(type(instance))
+
+
+def _record_id(instance) -> int:
+    # New records get their identity only after the flush is over
+    mapper = sqlalchemy.inspect(instance).mapper
+    record_id, = mapper.primary_key_from_instance(instance)
+    return record_id
+
+
+def _after_flush(session: orm.Session, _) -> None:
+    changed: Dict[int, str] = {}
+    removed: List[int] = []
+    for instance in [*session.new, *session.dirty]:
+        source = _source_of(instance)
+        if source is not None:
+            record_id = _record_id(instance)
+            changed[source.key(record_id)] = source.content(instance)
+    for instance in session.deleted:
+        source = _source_of(instance)
+        if source is not None:
+            record_id = _record_id(instance)
+            removed.append(source.key(record_id))
+    if not changed and not removed:
+        return
+
+    connection = session.connection()
+    index = get_index(connection)
+    if index is None:
+        return
+    index.remove(connection, removed)
+    index.replace(connection, changed)
+
+
+def _on_bulk_change(orm_execute_state: orm.ORMExecuteState):
+    # Bulk updates and deletes skip the flush, so the records they match are
+    # looked up before the statement runs and only their rows are changed
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return None
+    mapper = orm_execute_state.bind_mapper
+    source = None if mapper is None else _source_of_class(mapper.class_)
+    if source is None:
+        return None
+    connection = orm_execute_state.session.connection()
+    index = get_index(connection)
+    if index is None:
+        return None
+
+    matching = sqlalchemy.select(source.primary_key)
+    whereclause = orm_execute_state.statement.whereclause
+    if whereclause is not None:
+        matching = matching.where(whereclause)
+    record_ids = [record_id for record_id, in connection.execute(matching)]
+
+    result = orm_execute_state.invoke_statement()
+    if record_ids:
+        index.remove(
+            connection,
+            [source.key(record_id) for record_id in record_ids]
+        )
+        if orm_execute_state.is_update:
+            index.fill(
+                connection, source, source.primary_key.in_(record_ids)
+            )
+    return result
+
+
+sqlalchemy.event.listen(orm.Session, "after_flush", _after_flush)
+sqlalchemy.event.listen(orm.Session, "do_orm_execute", _on_bulk_change)
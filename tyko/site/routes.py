@@ -1,5 +1,5 @@
 from flask import Blueprint, render_template
-from tyko import frontend, data_provider, database, middleware
+from tyko import frontend, middleware
 from . import views
 
 site = Blueprint("site", __name__, template_folder='templates')
@@ -19,7 +19,7 @@ def page_about():
 
 @site.route("/project")
 def page_projects():
-    data_prov = data_provider.DataProvider(database.db.engine)
+    data_prov = middleware.get_app_middleware().data_provider
     project_frontend = frontend.ProjectFrontend(data_prov)
     return project_frontend.list()
 
@@ -32,22 +32,21 @@ def page_more():
 
 @site.route("/project/create/")
 def page_project_new():
-    data_prov = data_provider.DataProvider(database.db.engine)
+    data_prov = middleware.get_app_middleware().data_provider
     project_frontend = frontend.ProjectFrontend(data_prov)
     return project_frontend.create()
 
 
 @site.route("/collection")
 def page_collections():
-    data_prov = data_provider.DataProvider(database.db.engine)
+    data_prov = middleware.get_app_middleware().data_provider
     collection_frontend = frontend.CollectionFrontend(data_prov)
     return collection_frontend.list()
 
 
 @site.route("/formats")
 def page_formats():
-    data_prov = data_provider.DataProvider(database.db.engine)
-    middleware_source = middleware.Middleware(data_prov)
+    middleware_source = middleware.get_app_middleware().formats
     formats = middleware_source.get_formats(serialize=False)
     return render_template(
         "formats.html",
@@ -64,23 +63,22 @@ def form_new_collection():
 
 @site.route("/collection/<int:collection_id>")
 def page_collection_details(collection_id):
-    data_prov = data_provider.DataProvider(database.db.engine)
+    data_prov = middleware.get_app_middleware().data_provider
     collection_frontend = frontend.CollectionFrontend(data_prov)
     return collection_frontend.display_details(collection_id=collection_id)
 
 
 @site.route("/project/<int:project_id>")
 def page_project_details(project_id):
-    data_prov = data_provider.DataProvider(database.db.engine)
+    data_prov = middleware.get_app_middleware().data_provider
     project_frontend = frontend.ProjectFrontend(data_prov)
     return project_frontend.display_details(project_id)
 
 
 @site.route("/project/<int:project_id>/addObject", methods=['POST'])
 def add_new_object(project_id):
-    data_prov = data_provider.DataProvider(database.db.engine)
-    project_data_connector = data_provider.ProjectDataConnector(
-        data_prov.db_session_maker)
+    project_data_connector = \
+        middleware.get_app_middleware().project_connector
     return views.ProjectNewObject.as_view(
         "add_new_object",
         data_connector=project_data_connector)(project_id=project_id)
@@ -88,9 +86,8 @@ def add_new_object(project_id):
 
 @site.route("/project/<int:project_id>/addNote", methods=['POST'])
 def add_project_note(project_id):
-    data_prov = data_provider.DataProvider(database.db.engine)
     project_data_connector = \
-        data_provider.ProjectDataConnector(data_prov.db_session_maker)
+        middleware.get_app_middleware().project_connector
 
     return views.ProjectNewNote.as_view(
             "add_project_note",
@@ -100,9 +97,8 @@ def add_project_note(project_id):
 
 @site.route("/project/<int:project_id>/updateNote", methods=['POST'])
 def update_project_note(project_id):
-    data_prov = data_provider.DataProvider(database.db.engine)
-    project_data_connector = data_provider.ProjectDataConnector(
-        data_prov.db_session_maker)
+    project_data_connector = \
+        middleware.get_app_middleware().project_connector
     return \
         views.ProjectNoteUpdate.as_view(
             "update_project_note",
@@ -112,21 +108,21 @@ def update_project_note(project_id):
 
 @site.route("/project/<int:project_id>/object/<int:object_id>")
 def page_project_object_details(project_id, object_id):
-    data_prov = data_provider.DataProvider(database.db.engine)
+    data_prov = middleware.get_app_middleware().data_provider
     object_frontend = frontend.ObjectFrontend(data_prov)
     return object_frontend.display_details(object_id, show_bread_crumb=True)
 
 
 @site.route("/object")
 def page_object():
-    data_prov = data_provider.DataProvider(database.db.engine)
+    data_prov = middleware.get_app_middleware().data_provider
     object_frontend = frontend.ObjectFrontend(data_prov)
     return object_frontend.list()
 
 
 @site.route("/object/<int:object_id>")
 def page_object_details(object_id):
-    data_prov = data_provider.DataProvider(database.db.engine)
+    data_prov = middleware.get_app_middleware().data_provider
     object_frontend = frontend.ObjectFrontend(data_prov)
     return object_frontend.display_details(
         object_id, show_bread_crumb=False)
@@ -136,7 +132,7 @@ def page_object_details(object_id):
     "/project/<int:project_id>/object/<int:object_id>/item/<int:item_id>"
 )
 def page_project_object_item_details(project_id, object_id, item_id):
-    data_prov = data_provider.DataProvider(database.db.engine)
+    data_prov = middleware.get_app_middleware().data_provider
     item_pages = frontend.ItemFrontend(data_prov)
     return item_pages.display_details(
                 item_id,
@@ -150,7 +146,7 @@ def page_project_object_item_details(project_id, object_id, item_id):
     "/<int:file_id>"
 )
 def page_file_details(project_id, object_id, item_id, file_id):
-    data_prov = data_provider.DataProvider(database.db.engine)
+    data_prov = middleware.get_app_middleware().data_provider
     file_details = frontend.FileDetailsFrontend(data_prov)
     return file_details.display_details(
         project_id=project_id,
@@ -165,10 +161,8 @@ def page_file_details(project_id, object_id, item_id, file_id):
     methods=['POST']
 )
 def update_object_note(project_id, object_id):
-    data_prov = data_provider.DataProvider(database.db.engine)
-    object_data_connector = data_provider.ObjectDataConnector(
-        data_prov.db_session_maker
-    )
+    object_data_connector = \
+        middleware.get_app_middleware().object_connector
     return views.ObjectUpdateNotes.as_view(
         "update_object_note",
         data_connector=object_data_connector
@@ -180,9 +174,8 @@ def update_object_note(project_id, object_id):
     methods=['POST']
 )
 def add_object_note(project_id, object_id):
-    data_prov = data_provider.DataProvider(database.db.engine)
     object_data_connector = \
-        data_provider.ObjectDataConnector(data_prov.db_session_maker)
+        middleware.get_app_middleware().object_connector
 
     return views.ObjectNewNotes.as_view(
         "add_object_note",
@@ -195,9 +188,8 @@ def add_object_note(project_id, object_id):
     methods=['POST']
 )
 def object_new_item(project_id, object_id):
-    data_prov = data_provider.DataProvider(database.db.engine)
     object_data_connector = \
-        data_provider.ObjectDataConnector(data_prov.db_session_maker)
+        middleware.get_app_middleware().object_connector
 
     return views.NewItem.as_view(
         "object_new_item",
@@ -211,9 +203,8 @@ def object_new_item(project_id, object_id):
     methods=['POST']
 )
 def item_new_file(project_id, object_id, item_id):
-    data_prov = data_provider.DataProvider(database.db.engine)
     item_data_connector = \
-        data_provider.ItemDataConnector(data_prov.db_session_maker)
+        middleware.get_app_middleware().item_connector
 
     return views.ObjectItemNewFile.as_view(
         "item_new_file",
@@ -225,9 +216,8 @@ def item_new_file(project_id, object_id, item_id):
             "<int:item_id>/addNote",
             methods=['POST'])
 def add_item_note(project_id, object_id, item_id):
-    data_prov = data_provider.DataProvider(database.db.engine)
     item_data_connector = \
-        data_provider.ItemDataConnector(data_prov.db_session_maker)
+        middleware.get_app_middleware().item_connector
 
     return views.ObjectItemNewNotes.as_view(
         "add_item_note",
@@ -241,9 +231,8 @@ def add_item_note(project_id, object_id, item_id):
     methods=['POST']
 )
 def update_item_note(project_id, object_id, item_id):
-    data_prov = data_provider.DataProvider(database.db.engine)
     item_data_connector = \
-        data_provider.ItemDataConnector(data_prov.db_session_maker)
+        middleware.get_app_middleware().item_connector
 
     return views.ObjectItemNotes.as_view(
         "update_item_note",
@@ -253,13 +242,13 @@ def update_item_note(project_id, object_id, item_id):
 
 @site.route("/item")
 def page_item():
-    data_prov = data_provider.DataProvider(database.db.engine)
+    data_prov = middleware.get_app_middleware().data_provider
     item_pages = frontend.ItemFrontend(data_prov)
     return item_pages.list()
 
 
 @site.route('/item/<int:item_id>')
 def page_item_details(item_id):
-    data_prov = data_provider.DataProvider(database.db.engine)
+    data_prov = middleware.get_app_middleware().data_provider
     item_pages = frontend.ItemFrontend(data_prov)
     return item_pages.display_details(item_id, show_bread_crumb=False)
@@ -0,0 +1,127 @@
+"""Share one session between all the data connectors used by a request.
+
+Once enabled with init_app(), every session a connector opens while a
+request is handled is the request's tyko.schema.Session, so the records
+read by one connector are in the identity map for the next and the request
+holds on to a single connection. Connectors still commit and close their
+session as before. Committing only flushes the changes, and closing leaves
+the session open for the next connector. The request's changes are
+committed once, when the response is ready, or rolled back if the response
+is an error. Because committing flushes, constraint errors are still raised
+by the connector that made the change. If the final commit fails anyway, the
+changes are rolled back and the response is replaced by an error. Outside of
+a request, connectors get sessions of their own.
+"""
+import sys
+import traceback
+from typing import Any, Optional
+
+import flask
+import sqlalchemy
+from sqlalchemy import orm
+
+from tyko import schema
+
+__all__ = ["RequestSession", "RequestSessionMaker", "init_app"]
+
+_ENABLED_KEY = "tyko_unit_of_work"
+
+
+class RequestSession:
+    """The session of a request, as used by one data connector call."""
+
+    def __init__(self, session: orm.Session) -> None:
+        self.session = session
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.session, name)
+
+    def __enter__(self) -> "RequestSession":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def commit(self) -> None:
+        """Send the changes to the database.
+
+        They are committed with the rest of the request.
+        """
+        self.session.flush()
+
+    def close(self) -> None:
+        """Keep the session open for the rest of the request."""
+
+
+class RequestSessionMaker(orm.sessionmaker):
+    """Sessionmaker handing out the session of the current request.
+
+    Outside of a request, or in an app without init_app(), new sessions are
+    made like with a regular sessionmaker.
+    """
+
+    def __call__(self, **local_kw):
+        if not local_kw and _enabled():
+            session = _request_session(self.kw.get("bind"))
+            if session is not None:
+                return RequestSession(session)
+        return super().__call__(**local_kw)
+
+
+def _enabled() -> bool:
+    return flask.has_request_context() and \
+        flask.current_app.extensions.get(_ENABLED_KEY, False)
+
+
+def _request_session(
+        bind: Optional[sqlalchemy.engine.Engine]
+) -> Optional[orm.Session]:
+    if not schema.Session.registry.has():
+        return schema.Session(bind=bind)
+    session = schema.Session()
+
+    # A connector for another database does not share the session
+    return session if session.bind is bind else None
+
+
+def _finish_request(response: flask.Response) -> flask.Response:
+    if not schema.Session.registry.has():
+        return response
+    session = schema.Session()
+    if response.status_code >= 400:
+        session.rollback()
+        return response
+    try:
+        session.commit()
+    except sqlalchemy.exc.IntegrityError as error:
+        session.rollback()
+        traceback.print_exc(file=sys.stderr)
+        return flask.make_response(
+            f"Unable to save the changes. Reason: {error.orig}", 400
+        )
+    except sqlalchemy.exc.DatabaseError as error:
+        session.rollback()
+        traceback.print_exc(file=sys.stderr)
+        return flask.make_response(
+            f"Unable to save the changes. Reason: {error.orig}", 500
+        )
+    return response
+
+
+def _end_request(error: Optional[BaseException]) -> None:
+    if not schema.Session.registry.has():
+        return
+    try:
+        if error is not None:
+            schema.Session().rollback()
+    finally:
+        schema.Session.remove()
+
+
+def init_app(app: flask.Flask) -> None:
+    """Use one session for all the database work of each request."""
+    if app.extensions.get(_ENABLED_KEY):
+        return
+    app.extensions[_ENABLED_KEY] = True
+    app.after_request(_finish_request)
+    app.teardown_request(_end_request)
@@ -5,6 +5,8 @@ import os.path
 import re
 import datetime
 import shutil
+import threading
+import time
 import typing
 import subprocess  # nosec # noqa: S404
 
@@ -137,7 +139,11 @@ class GitVersionStrategy(AbsGetVersionStrategy):
 
     def get_version(self) -> str:
         """Get a git commit hash for a version."""
-        git_hash = str(self.get_git_commit())
+        try:
+            git_hash = str(self.get_git_commit())
+        except (subprocess.CalledProcessError, OSError) as error:
+            # Not a git checkout, or git could not be run
+            raise InvalidVersionStrategy(str(error)) from error
         return f"GIT:{git_hash}"
 
 
@@ -175,3 +181,54 @@ def get_version(
         ",".join(strategy.__name__ for strategy in strategies)
 
     raise NoValidStrategy(f"Tried [{tried_strategies}]")
+
+
+class VersionCache:
+    """Version information resolved once and then served from memory.
+
+    Finding the version can mean importing pkg_resources or running git, so
+    it should not be done for every request.
+    """
+
+    def __init__(
+            self,
+            refresh: typing.Optional[float] = None,
+            strategies: typing.Optional[
+                typing.List[typing.Type[AbsGetVersionStrategy]]
+            ] = None
+    ) -> None:
+        """Create an empty cache.
+
+        Args:
+            refresh: Seconds the version is used before it is looked up
+                again. None keeps it for the life of the process.
+            strategies: Strategies passed to get_version().
+
+        """
+        self.refresh = refresh
+        self.strategies = strategies
+        self._lock = threading.Lock()
+        self._version: typing.Optional[str] = None
+        self._expires = 0.0
+
+    def get(self) -> str:
+        """Get the version, looking it up if it is not known yet."""
+        now = time.monotonic()
+        with self._lock:
+            if self._version is not None and \
+                    (self.refresh is None or now < self._expires):
+                return self._version
+
+            version = get_version(self.strategies)
+            self._version = version
+            if self.refresh is not None:
+                self._expires = now + self.refresh
+            return version
+
+    def clear(self) -> None:
+        """Forget the version, so the next get() looks it up again."""
+        with self._lock:
+            self._version = None
+
+
+version_cache = VersionCache()
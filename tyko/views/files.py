@@ -17,7 +17,10 @@ class ItemFilesAPI(views.MethodView):
         def validate(cls, func):
             @functools.wraps(func)
             def wrapper(self, project_id, object_id, item_id):
-                file_id = int(request.args['id'])
+                try:
+                    file_id = int(request.args['id'])
+                except ValueError:
+                    return make_response("No such file", 404)
 
                 if self._has_matching_file(project_id, object_id,  # noqa: E501 pylint: disable=W0212
                                            item_id, file_id) is False:
@@ -103,25 +106,14 @@ class ItemFilesAPI(views.MethodView):
                            file_id: int
                            ) -> bool:
         """Check if there is a matching file that matches all the ids"""
-
-        project_connector = tyko.data_provider.ProjectDataConnector(
-            self._data_provider.db_session_maker)
-        item_connector = tyko.data_provider.ItemDataConnector(
-            self._data_provider.db_session_maker)
-
-        project = project_connector.get(project_id, serialize=True)
-
-        for obj in filter(lambda obj: obj['object_id'] == object_id,
-                          project['objects']):
-            for item in filter(lambda i: i['item_id'] == item_id,
-                               obj['items']):
-
-                matching_files = list(
-                    filter(lambda f: f['id'] == file_id, item_connector.get(
-                        item['item_id'], serialize=True)['files']))
-                return len(matching_files) == 1
-
-        return False
+        return tyko.data_provider.HierarchyValidator(
+            self._data_provider.db_session_maker
+        ).exists(
+            project_id=project_id,
+            object_id=object_id,
+            item_id=item_id,
+            file_id=file_id
+        )
 
 
 class FileNotesAPI(views.MethodView):
@@ -132,6 +124,11 @@ class FileNotesAPI(views.MethodView):
                 provider.db_session_maker
             )
 
+    def dispatch_request(self, *args, **kwargs):
+        if not request.args.get("id", "0").isdigit():
+            return make_response("No such note", 404)
+        return super().dispatch_request(*args, **kwargs)
+
     def get(self, file_id: int) -> flask.Response:
         note_id = request.args.get("id")
         if note_id is not None:
@@ -11,6 +11,16 @@ class ObjectItemNotesAPI(views.MethodView):
     def __init__(self, item: middleware.ItemMiddlewareEntity) -> None:
         self._item = item
 
+    def dispatch_request(self, *args, **kwargs):
+        if not self._item.in_object(
+                kwargs["project_id"],
+                kwargs["object_id"],
+                kwargs["item_id"],
+                note_id=kwargs["note_id"]
+        ):
+            return make_response("No such note", 404)
+        return super().dispatch_request(*args, **kwargs)
+
     def put(self, project_id, object_id, item_id, note_id):  # noqa: E501 pylint: disable=W0613,C0301
         return self._item.update_note(item_id, note_id)
 
@@ -27,13 +37,10 @@ class ObjectItemAPI(views.MethodView):
         self._provider = provider
 
     def post(self, project_id, object_id):  # noqa: E501  pylint: disable=W0613,C0301
-        current_project = middleware.ProjectMiddlewareEntity(
-            self._provider).get_project_by_id(project_id)
         # make sure that the project has that object
-        for child_object in current_project['objects']:
-            if child_object['object_id'] == object_id:
-                break
-        else:
+        if not data_provider.HierarchyValidator(
+                self._provider.db_session_maker
+        ).exists(project_id, object_id):
             return make_response(
                 f"Project with id {project_id} does not have an object with an"
                 f" id of {object_id}",
@@ -246,6 +253,23 @@ class ObjectItemTreatmentAPI(views.MethodView):
         self.data_connector = \
             data_provider.ItemDataConnector(self._provider.db_session_maker)
 
+    def dispatch_request(self, *args, **kwargs):
+        treatment_id = request.args.get("treatment_id")
+        try:
+            treatment_id = int(treatment_id) if treatment_id else None
+        except ValueError:
+            return make_response("No such item treatment", 404)
+        if not data_provider.HierarchyValidator(
+                self._provider.db_session_maker
+        ).exists(
+            kwargs["project_id"],
+            kwargs["object_id"],
+            kwargs["item_id"],
+            treatment_id=treatment_id
+        ):
+            return make_response("No such item treatment", 404)
+        return super().dispatch_request(*args, **kwargs)
+
     def put(self, project_id, object_id, item_id):
         data = request.get_json()
         if not (treatment_id := request.args.get("treatment_id")):
@@ -1,4 +1,4 @@
-from flask import views
+from flask import views, make_response
 
 from tyko import middleware
 
@@ -9,6 +9,12 @@ class ProjectNotesAPI(views.MethodView):
         super().__init__()
         self._project = project
 
+    def dispatch_request(self, *args, **kwargs):
+        project_id, note_id = args
+        if not self._project.has_note(project_id, note_id):
+            return make_response("No such note", 404)
+        return super().dispatch_request(*args, **kwargs)
+
     def put(self, project_id, note_id):
         return self._project.update_note(project_id, note_id)
 
@@ -79,6 +79,12 @@ class ProjectObjectNotesAPI(views.MethodView):
 
         self._project_object = project_object
 
+    def dispatch_request(self, *args, **kwargs):
+        project_id, object_id, note_id = args
+        if not self._project_object.has_note(project_id, object_id, note_id):
+            return make_response("No such note", 404)
+        return super().dispatch_request(*args, **kwargs)
+
     def delete(self, project_id, object_id, note_id):  # pylint: disable=W0613
         return self._project_object.remove_note(object_id, note_id)
 